@@ -1,41 +1,202 @@
 """
 Context Manager
-Manages conversation history and context window
+Manages conversation history and a token-budgeted context window
 """
 
-from typing import List, Dict
+import re
+import hashlib
+from typing import List, Dict, Optional
 from datetime import datetime
 
+# Words/numbers and single punctuation marks; long words cost roughly one token per 4 chars
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# Chat formatting overhead per message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "Summary of earlier conversation (oldest first):"
+DIGEST_HEADER = "Earlier tool results (digest):"
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of the LLM token count for a piece of text"""
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_PATTERN.findall(text or ""))
+
 class ContextManager:
-    def __init__(self, max_history: int = 20):
+    """
+    Keeps the messages sent to the LLM within a token budget.
+    
+    The first system message (the system prompt) is always kept and always
+    sent first, byte for byte, so providers can cache it as a prompt prefix;
+    everything that changes per request (the rolling summary and one-off
+    instructions) is appended after the history instead of inserted into it.
+    
+    Once a new user turn starts, the previous turn's tool results are replaced
+    by their short digests. When the history still exceeds max_tokens (or
+    max_history messages), the oldest messages are folded into a rolling
+    summary that is itself capped at summary_max_tokens.
+    """
+    
+    def __init__(self, max_history: int = 20, max_tokens: int = 6000, summary_max_tokens: int = 400):
         self.max_history = max_history
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
         self.conversation_history = []
+        self.summary_lines = []
         self.user_context = {}
     
-    def add_message(self, role: str, content: str):
-        """Add a message to conversation history"""
+    def add_message(self, role: str, content: str, kind: str = "message", digest: Optional[str] = None):
+        """
+        Add a message to conversation history
+        
+        Args:
+            role: system, user or assistant
+            content: Message text
+            kind: "message" or "tool_results" (replaced by digest once stale)
+            digest: Short stand-in for tool results in later turns
+        """
+        # A new user turn makes the previous turn's tool output stale
+        if role == "user":
+            self._compact_stale_messages()
+        
         self.conversation_history.append({
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "kind": kind,
+            "digest": digest,
+            "tokens": estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
         })
         
-        # Trim history if too long
-        if len(self.conversation_history) > self.max_history:
-            # Keep system message and recent messages
-            self.conversation_history = [self.conversation_history[0]] + \
-                                       self.conversation_history[-(self.max_history-1):]
+        self._enforce_budget()
+    
+    def _compact_stale_messages(self):
+        """Swap old tool results for their digests"""
+        compacted = []
+        for msg in self.conversation_history:
+            if msg["kind"] == "tool_results" and msg["digest"]:
+                content = f"{DIGEST_HEADER}\n{msg['digest']}"
+                msg = dict(msg, content=content, kind="tool_digest",
+                           tokens=estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS)
+            compacted.append(msg)
+        self.conversation_history = compacted
+    
+    def _pinned_count(self) -> int:
+        """Number of leading messages that are never trimmed (the system prompt)"""
+        if self.conversation_history and self.conversation_history[0]["role"] == "system" \
+                and self.conversation_history[0]["kind"] == "message":
+            return 1
+        return 0
+    
+    def _current_turn_start(self) -> int:
+        """Index of the latest user message (the current turn is never summarised)"""
+        for index in range(len(self.conversation_history) - 1, -1, -1):
+            if self.conversation_history[index]["role"] == "user":
+                return index
+        return len(self.conversation_history)
+    
+    def _enforce_budget(self):
+        """Fold the oldest messages into the summary until the history fits"""
+        pinned = self._pinned_count()
+        while True:
+            over_count = len(self.conversation_history) > self.max_history
+            over_tokens = self.get_token_count() > self.max_tokens
+            if not (over_count or over_tokens) or self._current_turn_start() <= pinned:
+                break
+            self._summarise(self.conversation_history.pop(pinned))
+    
+    def _summarise(self, msg: Dict):
+        """Add a one-line description of a trimmed message to the rolling summary"""
+        content = " ".join(msg["content"].split())
+        if msg["role"] == "user":
+            line = f"User: {content[:160]}"
+        elif msg["role"] == "assistant":
+            line = f"Assistant: {content[:200]}"
+        elif msg["kind"] in ("tool_results", "tool_digest") and msg["digest"]:
+            line = "Tools: " + " | ".join(msg["digest"].splitlines())[:240]
+        else:
+            line = f"Note: {content[:160]}"
+        
+        self.summary_lines.append(line)
+        while len(self.summary_lines) > 1 and \
+                estimate_tokens("\n".join(self.summary_lines)) > self.summary_max_tokens:
+            self.summary_lines.pop(0)
+    
+    def get_summary(self) -> str:
+        """Rolling summary of trimmed messages ("" if nothing was trimmed)"""
+        if not self.summary_lines:
+            return ""
+        return SUMMARY_HEADER + "\n" + "\n".join(f"- {line}" for line in self.summary_lines)
+    
+    def get_token_count(self) -> int:
+        """Estimated prompt tokens for the current history, including the summary"""
+        total = sum(msg["tokens"] for msg in self.conversation_history)
+        summary = self.get_summary()
+        if summary:
+            total += estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+        return total
+    
+    def get_prefix(self) -> List[Dict]:
+        """The static messages every request starts with (the system prompt)"""
+        return [{"role": msg["role"], "content": msg["content"]}
+                for msg in self.conversation_history[:self._pinned_count()]]
+    
+    def get_prefix_hash(self) -> str:
+        """Stable hash of the static prefix, for keying cached responses"""
+        digest = hashlib.sha256()
+        for msg in self.get_prefix():
+            digest.update(f"{msg['role']}\n{msg['content']}\n".encode("utf-8"))
+        return digest.hexdigest()
+    
+    def build_messages(self, instructions: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Messages for an LLM request: static prefix, then history, then dynamic suffix
+        
+        Args:
+            instructions: One-off system instructions for this request only
+        """
+        messages = [{"role": msg["role"], "content": msg["content"]}
+                    for msg in self.conversation_history]
+        
+        summary = self.get_summary()
+        if summary:
+            messages.append({"role": "system", "content": summary})
+        for instruction in instructions or []:
+            messages.append({"role": "system", "content": instruction})
+        
+        return messages
     
     def get_history(self, include_system: bool = True) -> List[Dict]:
         """Get conversation history for LLM"""
         if include_system:
-            return [{"role": msg["role"], "content": msg["content"]} 
-                   for msg in self.conversation_history]
+            return self.build_messages()
         else:
-            return [{"role": msg["role"], "content": msg["content"]} 
-                   for msg in self.conversation_history 
+            return [{"role": msg["role"], "content": msg["content"]}
+                   for msg in self.conversation_history
                    if msg["role"] != "system"]
     
+    def copy(self) -> "ContextManager":
+        """Independent copy (message texts are shared, not duplicated)"""
+        clone = ContextManager(self.max_history, self.max_tokens, self.summary_max_tokens)
+        clone.conversation_history = [dict(msg) for msg in self.conversation_history]
+        clone.summary_lines = list(self.summary_lines)
+        clone.user_context = dict(self.user_context)
+        return clone
+    
+    def get_state(self) -> Dict:
+        """JSON-serialisable conversation state, without the static prefix"""
+        return {
+            "history": self.conversation_history[self._pinned_count():],
+            "summary_lines": self.summary_lines,
+            "user_context": self.user_context
+        }
+    
+    def load_state(self, state: Dict):
+        """Restore state from get_state, keeping this manager's static prefix"""
+        prefix = self.conversation_history[:self._pinned_count()]
+        self.conversation_history = prefix + [dict(msg) for msg in state.get("history", [])]
+        self.summary_lines = list(state.get("summary_lines", []))
+        self.user_context = dict(state.get("user_context", {}))
+    
     def set_user_context(self, key: str, value: any):
         """Store user context information"""
         self.user_context[key] = value
@@ -47,6 +208,7 @@ class ContextManager:
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history = []
+        self.summary_lines = []
         self.user_context = {}
     
     def get_recent_context(self, n: int = 5) -> str:
@@ -0,0 +1,242 @@
+"""
+Intent Router
+Deterministic fast path that maps simple, fully specified requests straight to a tool
+"""
+
+import re
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional
+from data.embeddings import get_embedding_model
+
+# Example phrasings per intent, used to score messages the keyword rules only half recognise
+INTENT_EXAMPLES = {
+    "view_reservations": [
+        "Show me my reservations",
+        "What bookings do I have?",
+        "List my upcoming reservations",
+        "Do I have any tables booked?"
+    ],
+    "cancel_reservation": [
+        "Cancel reservation GF-0043",
+        "Please cancel my booking GF-0012",
+        "I can't make it, cancel GF-0007",
+        "I no longer need reservation GF-0101"
+    ],
+    "check_availability": [
+        "Is restaurant 12 available tomorrow at 7pm for 4 people?",
+        "Check availability at restaurant 3 today at 19:00 for 2",
+        "Any free tables at restaurant 8 on 2025-11-11 at 8pm for 6?",
+        "Do you have seats at restaurant 5 tomorrow at 1pm for two?"
+    ]
+}
+
+INTENT_FUNCTIONS = {
+    "view_reservations": "get_user_reservations",
+    "cancel_reservation": "cancel_reservation",
+    "check_availability": "check_availability"
+}
+
+# Words that signal something the fast path can't answer on its own
+BOOK_WORDS = re.compile(r'\b(book|reserve|make a reservation|recommend|suggest|find|change|modify|move|reschedule)\b')
+CANCEL_WORDS = re.compile(r'\b(cancel|cancell?ation|call off|no longer need|can\'?t make it)\b')
+VIEW_WORDS = re.compile(r'\b(show|view|list|see|what are|what\'?s|do i have|get)\b')
+RESERVATION_WORDS = re.compile(r'\b(reservations?|bookings?|tables? booked)\b')
+MY_RESERVATIONS = re.compile(r'\bmy\s+(?:upcoming\s+|current\s+|existing\s+)?(?:reservations?|bookings?)\b')
+# Search or recommendation terms: "my reservation options for Italian places" is not a lookup
+SEARCH_WORDS = re.compile(r'\b(options?|places?|restaurants?|spots?|cuisines?|food|menus?|search|looking for|'
+                          r'recommend\w*|suggest\w*|find|near(by)?|cheap|best)\b')
+# "for Italian" or "for next week" after a lookup filters it; numbers and plain dates don't
+FOR_FILTER = re.compile(r'\bfor\s+(?!(?:\d|me\b|us\b|today\b|tonight\b|tomorrow\b|(?:mon|tues|wednes|thurs|fri|satur|sun)day\b))[a-z]')
+AVAILABILITY_WORDS = re.compile(r'\b(availab(le|ility)|free tables?|any tables?|seats?|room for)\b')
+
+# Negated, hypothetical or conditional cancels ("don't cancel", "should I cancel ...?") are not commands
+NOT_IMPERATIVE = re.compile(r'\b(don\'?t|do not|not|never|should|would|could|what if|what happens|if|whether|unless|maybe)\b|\?\s*$')
+
+CONFIRMATION_CODE = re.compile(r'\bgf-?(\d{1,6})\b')
+RESERVATION_NUMBER = re.compile(r'\b(?:reservation|booking)\s*(?:#|no\.?|number|id)?\s*(\d{1,6})\b')
+RESTAURANT_ID = re.compile(r'\brestaurant\s*(?:#|no\.?|number|id)?\s*(\d{1,6})\b')
+ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+RELATIVE_DATE = re.compile(r'\b(today|tonight|tomorrow)\b')
+CLOCK_TIME = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b([01]?\d|2[0-3]):([0-5]\d)\b')
+PARTY_SIZE = re.compile(r'\bfor\s+(\d{1,2}|' + '|'.join([
+    "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve"]) + r')\b|\b(\d{1,2})\s*(?:people|persons|guests|pax|diners)\b')
+
+MIN_PARTY_SIZE = 1
+MAX_PARTY_SIZE = 20
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12
+}
+
+class IntentRouter:
+    """
+    Classifies a user message into a directly executable tool call, or
+    returns None so the LLM handles it.
+    
+    Keyword rules give a confidence for each intent and regexes pull out the
+    arguments; for weaker keyword matches, similarity to the example phrasings
+    (when an embedding model is available) lifts or lowers that confidence. A route is only returned when
+    every required argument was extracted and confidence clears the threshold.
+    """
+    
+    def __init__(self, confidence_threshold: float = 0.85, use_embeddings: bool = True,
+                 embedding_model=None):
+        self.confidence_threshold = confidence_threshold
+        self.use_embeddings = use_embeddings or embedding_model is not None
+        self.embedding_model = embedding_model  # loaded on first use if not given
+        self._example_vectors = None
+    
+    def route(self, message: str) -> Optional[Dict]:
+        """
+        Classify a message
+        
+        Returns:
+            Dict with intent, function, args and confidence, or None when unsure
+        """
+        text = message.lower().strip()
+        if not text or len(text) > 300:
+            return None
+        
+        candidates = []
+        for intent, (confidence, args) in self._rule_scores(text).items():
+            if args is not None:
+                candidates.append((intent, confidence, args))
+        
+        # Ambiguous or compound requests ("cancel GF-0043 and show my bookings") go to the LLM
+        if len(candidates) != 1:
+            return None
+        
+        # Clear keyword matches skip the embedding model; weaker ones need its agreement
+        intent, confidence, args = candidates[0]
+        if confidence < self.confidence_threshold:
+            similarity = self._similarity(message, intent)
+            if similarity is not None:
+                confidence = 0.5 * confidence + 0.5 * similarity
+        
+        if confidence < self.confidence_threshold:
+            return None
+        
+        return {
+            "intent": intent,
+            "function": INTENT_FUNCTIONS[intent],
+            "args": args,
+            "confidence": round(float(confidence), 3)
+        }
+    
+    def _rule_scores(self, text: str) -> Dict[str, tuple]:
+        """Keyword confidence and extracted arguments (None if incomplete) per matching intent"""
+        scores = {}
+        books = bool(BOOK_WORDS.search(text))
+        cancels = bool(CANCEL_WORDS.search(text))
+        views = bool(VIEW_WORDS.search(text) and RESERVATION_WORDS.search(text))
+        
+        # View reservations: needs no arguments beyond the logged-in user. Only an
+        # explicit "show my reservations" is certain; looser matches need the
+        # embedding check, and ones mixed with search terms always go to the LLM
+        if RESERVATION_WORDS.search(text) and not books and not cancels:
+            mine = re.search(r'\b(my|i have|i\'ve got|do i)\b', text)
+            if SEARCH_WORDS.search(text) or FOR_FILTER.search(text):
+                if mine:
+                    scores["view_reservations"] = (0.4, {})
+            elif VIEW_WORDS.search(text) and MY_RESERVATIONS.search(text):
+                scores["view_reservations"] = (0.95, {})
+            elif mine:
+                scores["view_reservations"] = (0.75, {})
+        
+        # Cancel: only an imperative with an explicit reservation number; it is
+        # destructive, so anything less than a plain command goes to the LLM
+        if cancels and not books and not views and not NOT_IMPERATIVE.search(text):
+            reservation_id = self._extract_reservation_id(text)
+            confidence = 0.95 if re.search(r'\bcancel\b', text) else 0.7
+            scores["cancel_reservation"] = (
+                confidence, {"reservation_id": reservation_id} if reservation_id else None
+            )
+        
+        # Availability: restaurant id, date, time and party size must all be present
+        if AVAILABILITY_WORDS.search(text) and not books and not cancels:
+            args = self._extract_availability_args(text)
+            scores["check_availability"] = (0.9, args)
+        
+        return scores
+    
+    def _extract_reservation_id(self, text: str) -> Optional[int]:
+        """Reservation number from a GF-0043 style code or 'reservation 43'"""
+        ids = {int(m) for m in CONFIRMATION_CODE.findall(text)}
+        ids |= {int(m) for m in RESERVATION_NUMBER.findall(text)}
+        # Several ids means a bulk request; leave that to the LLM
+        return ids.pop() if len(ids) == 1 else None
+    
+    def _extract_availability_args(self, text: str) -> Optional[Dict]:
+        """Restaurant id, date, time and party size, or None if any is missing or ambiguous"""
+        restaurant_ids = set(RESTAURANT_ID.findall(text))
+        dates = {self._valid_date(d) for d in ISO_DATE.findall(text)} | {
+            "today" if d == "tonight" else d for d in RELATIVE_DATE.findall(text)
+        }
+        times = {self._normalise_time(m) for m in CLOCK_TIME.findall(text)}
+        party_sizes = set()
+        for number, count in PARTY_SIZE.findall(text):
+            value = number or count
+            size = NUMBER_WORDS.get(value) or int(value)
+            # "for 0 people" or "for 40" is a typo or a group booking; let the LLM ask
+            party_sizes.add(size if MIN_PARTY_SIZE <= size <= MAX_PARTY_SIZE else None)
+        
+        # An unparseable date, time or party size makes the request ambiguous rather than absent
+        if any(len(values) != 1 or None in values for values in (restaurant_ids, dates, times, party_sizes)):
+            return None
+        
+        return {
+            "restaurant_id": int(restaurant_ids.pop()),
+            "date": dates.pop(),
+            "time": times.pop(),
+            "party_size": party_sizes.pop()
+        }
+    
+    def _valid_date(self, date: str) -> Optional[str]:
+        """The YYYY-MM-DD date if it exists on the calendar (2025-13-45 doesn't)"""
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            return None
+        return date
+    
+    def _normalise_time(self, match: tuple) -> Optional[str]:
+        """HH:MM from a CLOCK_TIME match (None for midnight-ish 12am or out-of-range values)"""
+        hour, minute, meridiem, hour24, minute24 = match
+        if meridiem:
+            hour = int(hour)
+            # "12am" is as often meant as noon as midnight; let the LLM ask
+            if not 1 <= hour <= 12 or (hour == 12 and meridiem == "am"):
+                return None
+            if minute and int(minute) > 59:
+                return None
+            hour = hour % 12 + (12 if meridiem == "pm" else 0)
+            return f"{hour:02d}:{minute or '00'}"
+        return f"{int(hour24):02d}:{minute24}"
+    
+    def _similarity(self, message: str, intent: str) -> Optional[float]:
+        """Max cosine similarity to the intent's examples (None without an embedding model)"""
+        if not self.use_embeddings:
+            return None
+        if self.embedding_model is None:
+            self.embedding_model = get_embedding_model()
+            if self.embedding_model is None:
+                self.use_embeddings = False
+                return None
+        
+        try:
+            if self._example_vectors is None:
+                self._example_vectors = {
+                    name: self._encode(examples) for name, examples in INTENT_EXAMPLES.items()
+                }
+            query = self._encode([message])[0]
+            return float(np.max(self._example_vectors[intent] @ query))
+        except Exception:
+            return None
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-norm embeddings"""
+        vectors = np.asarray(self.embedding_model.encode(texts), dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
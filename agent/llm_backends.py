@@ -0,0 +1,230 @@
+"""
+LLM Backends
+Chat-completion interface with a Groq implementation and an offline mock for benchmarks
+"""
+
+import re
+import math
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+class LLMBackend:
+    """Minimal chat-completion interface the orchestrator talks to"""
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        """Return the full completion text for a message list"""
+        raise NotImplementedError
+    
+    def stream(self, messages: List[Dict], **params) -> Iterator[str]:
+        """Yield the completion in chunks (default: one chunk)"""
+        yield self.complete(messages, **params)
+
+class GroqBackend(LLMBackend):
+    """Groq chat completions (the production backend)"""
+    
+    def __init__(self, api_key: str):
+        from groq import Groq
+        self.client = Groq(api_key=api_key)
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        response = self.client.chat.completions.create(messages=messages, **params)
+        return response.choices[0].message.content
+    
+    def stream(self, messages: List[Dict], **params) -> Iterator[str]:
+        stream = self.client.chat.completions.create(messages=messages, stream=True, **params)
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+class LatencyModel:
+    """
+    Simulated completion latency: a log-normal time to first token plus a
+    fixed cost per output token, so long answers take longer than tool calls.
+    """
+    
+    def __init__(self, median_ms: float = 400.0, sigma: float = 0.4,
+                 ms_per_token: float = 4.0, seed: Optional[int] = None):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.ms_per_token = ms_per_token
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def first_token_seconds(self) -> float:
+        """Sample a time to first token"""
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            noise = self._rng.gauss(0.0, self.sigma)
+        return self.median_ms * math.exp(noise) / 1000.0
+    
+    def token_seconds(self) -> float:
+        """Time per streamed output token"""
+        return max(0.0, self.ms_per_token) / 1000.0
+
+# Vocabulary of the generated catalogue (see create_proper_database.py)
+MOCK_CUISINES = ['Italian', 'Chinese', 'Thai', 'Indian', 'Mexican', 'Japanese', 'French',
+                 'American', 'Korean', 'Mediterranean']
+MOCK_LOCATIONS = ['Koramangala', 'Indiranagar', 'Whitefield', 'JP Nagar', 'HSR Layout',
+                  'Jayanagar', 'MG Road', 'Electronic City', 'Marathahalli', 'BTM Layout']
+
+def _tool_call(function_name: str, args: Dict) -> str:
+    """Tool-call XML in the format the system prompt asks for"""
+    return (f"<tool_call>\n<function>{function_name}</function>\n"
+            f"<args>{json.dumps(args)}</args>\n</tool_call>")
+
+class MockLLMBackend(LLMBackend):
+    """
+    Offline stand-in for the LLM that behaves like the prompted model.
+    
+    On a user turn it emits <tool_call> XML chosen by keyword heuristics
+    (recommend, availability, book, cancel, reservations, analytics) or asks a
+    clarifying question; once tool results follow the user message it writes a
+    short natural-language answer that mentions them. A fixed list of
+    `responses` can be given instead to script a conversation exactly.
+    """
+    
+    def __init__(self, latency: Optional[LatencyModel] = None,
+                 responses: Optional[List[str]] = None, answer_words: int = 60):
+        self.latency = latency or LatencyModel(median_ms=0, ms_per_token=0)  # no delay by default
+        self.responses = list(responses) if responses else None
+        self.answer_words = answer_words
+        self._script_index = 0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.simulated_seconds = 0.0
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        text = self._respond(messages)
+        delay = self.latency.first_token_seconds() + self.latency.token_seconds() * len(text.split())
+        self._record(delay)
+        time.sleep(delay)
+        return text
+    
+    def stream(self, messages: List[Dict], **params) -> Iterator[str]:
+        text = self._respond(messages)
+        first = self.latency.first_token_seconds()
+        per_token = self.latency.token_seconds()
+        self._record(first + per_token * len(text.split()))
+        
+        time.sleep(first)
+        for word in re.findall(r'\S+\s*', text):
+            if per_token:
+                time.sleep(per_token)
+            yield word
+    
+    def _record(self, delay: float):
+        with self._lock:
+            self.calls += 1
+            self.simulated_seconds += delay
+    
+    def _respond(self, messages: List[Dict]) -> str:
+        """Scripted response if configured, else a heuristic one"""
+        if self.responses:
+            with self._lock:
+                text = self.responses[self._script_index % len(self.responses)]
+                self._script_index += 1
+            return text
+        
+        last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=-1)
+        if last_user == -1:
+            return "Hi! How can I help you with a reservation today?"
+        
+        results = [m["content"] for m in messages[last_user + 1:]
+                   if m["role"] == "system" and m["content"].startswith("Tool Results:")]
+        if results:
+            return self._answer(results[-1])
+        return self._choose_tool(messages[last_user]["content"], messages[:last_user])
+    
+    def _choose_tool(self, user_text: str, earlier: List[Dict]) -> str:
+        """Tool call (or clarifying question) for a user message"""
+        text = user_text.lower()
+        slots = self._slots(text)
+        
+        code = re.search(r'\bgf-?(\d+)\b', text)
+        if "cancel" in text:
+            if code:
+                return _tool_call("cancel_reservation", {"reservation_id": int(code.group(1))})
+            return _tool_call("get_user_reservations", {})
+        
+        if re.search(r'\bmy (reservations?|bookings?)\b', text):
+            return _tool_call("get_user_reservations", {})
+        
+        if re.search(r'\b(analytics|popular|busiest|statistics|stats)\b', text):
+            return _tool_call("get_analytics", {})
+        
+        restaurant_id = re.search(r'\brestaurant\s*#?(\d+)\b', text)
+        if restaurant_id and re.search(r'\bavailab', text):
+            return _tool_call("check_availability", {"restaurant_id": int(restaurant_id.group(1)), **slots})
+        
+        # "Book the first one" refers to the most recent recommendation table
+        if re.search(r'\b(book|reserve)\b', text) and re.search(r'\b(first|second|third|that|it|one)\b', text):
+            ids = self._recent_restaurant_ids(earlier)
+            if ids:
+                ordinal = {"second": 1, "third": 2}.get(
+                    next((w for w in ("second", "third") if w in text), ""), 0)
+                return _tool_call("book_reservation",
+                                  {"restaurant_id": ids[min(ordinal, len(ids) - 1)], **slots})
+        
+        cuisine = next((c for c in MOCK_CUISINES if c.lower() in text), None)
+        location = next((l for l in MOCK_LOCATIONS if l.lower() in text), None)
+        if cuisine or location or re.search(r'\b(restaurants?|recommend|find|table|food|dinner|lunch)\b', text):
+            args = {"query": user_text, **slots}
+            if cuisine:
+                args["cuisine"] = cuisine
+            if location:
+                args["location"] = location
+            return _tool_call("recommend_restaurants", args)
+        
+        return "Happy to help! What date, time and party size would you like, and any cuisine or area in mind?"
+    
+    def _slots(self, text: str) -> Dict:
+        """Date, time and party size from the message, with dinner-for-two defaults"""
+        party = re.search(r'\bfor (\d+)\b|\b(\d+) (?:people|guests)\b', text)
+        hour = re.search(r'\b(\d{1,2})\s*(am|pm)\b', text)
+        date = datetime.now() + timedelta(days=0 if re.search(r'\b(today|tonight)\b', text) else 1)
+        
+        time_value = "19:00"
+        if hour:
+            value = int(hour.group(1)) % 12 + (12 if hour.group(2) == "pm" else 0)
+            time_value = f"{value:02d}:00"
+        
+        return {
+            "date": date.strftime("%Y-%m-%d"),
+            "time": time_value,
+            "party_size": int(next(g for g in party.groups() if g)) if party else 2
+        }
+    
+    def _recent_restaurant_ids(self, earlier: List[Dict]) -> List[int]:
+        """Restaurant ids from the latest recommendation result or digest in the history"""
+        for msg in reversed(earlier):
+            if msg["role"] != "system":
+                continue
+            content = msg["content"]
+            ids = [int(i) for i in re.findall(r'^(\d+)\|', content, re.MULTILINE)]
+            ids = ids or [int(i) for i in re.findall(r'#(\d+) ', content)]
+            if ids:
+                return ids
+        return []
+    
+    def _answer(self, tool_results: str) -> str:
+        """Natural-language reply that refers to the tool results"""
+        names = list(dict.fromkeys(re.findall(r'GoodFoods - [A-Za-z ]+ - [A-Za-z ]+', tool_results)))[:3]
+        codes = list(dict.fromkeys(re.findall(r'GF-\d{4}', tool_results)))[:3]
+        
+        parts = ["Here's what I found for you."]
+        if names:
+            parts.append("Top options: " + ", ".join(names) + ".")
+        if codes:
+            parts.append("Confirmation code(s): " + ", ".join(codes) + ".")
+        
+        filler = ("They all have great ratings and tables available at your requested time, "
+                  "so just let me know which one you'd like and I'll take care of the rest.").split()
+        words = " ".join(parts).split()
+        while len(words) < self.answer_words:
+            words.extend(filler[:self.answer_words - len(words)])
+        return " ".join(words)
@@ -0,0 +1,211 @@
+"""
+LLM Response Cache
+In-memory LRU plus optional SQLite store of completions, with record and replay modes
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from data.connection_pool import ConnectionPool
+
+DEFAULT_CACHE_PATH = "data/llm_cache.db"
+
+# read_write: serve hits, call the LLM on a miss and store the result
+# record:     always call the LLM and store (refreshes recordings)
+# replay:     only serve stored responses; a miss is an error, the LLM is never called
+CACHE_MODES = ("read_write", "record", "replay")
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode when no recorded response matches a request"""
+
+def _normalise_messages(messages: List[Dict]) -> List[List[str]]:
+    """Role and content only, with line endings and surrounding whitespace normalised"""
+    normalised = []
+    for msg in messages:
+        lines = (msg.get("content") or "").replace("\r\n", "\n").split("\n")
+        normalised.append([msg["role"], "\n".join(line.rstrip() for line in lines).strip()])
+    return normalised
+
+def make_cache_key(prefix_hash: str, suffix: List[Dict], params: Dict) -> str:
+    """
+    Key for a request whose first messages hash to prefix_hash
+    
+    Only the messages after the static prefix are serialised, so keying a
+    request costs O(conversation) rather than O(system prompt). params carries
+    the model name and sampling parameters.
+    """
+    payload = json.dumps([prefix_hash, _normalise_messages(suffix), params],
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SQLiteResponseStore:
+    """On-disk map from request key to completion, shared across processes and runs"""
+    
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.pool = ConnectionPool(db_path, max_connections=4)
+        
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    model_name TEXT,
+                    response TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Stored completion for a key (None if absent)"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            return row[0] if row else None
+    
+    def put(self, key: str, value: str, model_name: Optional[str] = None):
+        """Store or overwrite a completion"""
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT INTO llm_responses (cache_key, model_name, response, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    model_name = excluded.model_name,
+                    response = excluded.response,
+                    created_at = excluded.created_at
+            ''', (key, model_name, value, datetime.now().isoformat()))
+            conn.commit()
+    
+    def count(self) -> int:
+        """Number of stored completions"""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+    
+    def clear(self):
+        """Delete all stored completions"""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM llm_responses")
+            conn.commit()
+    
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close()
+
+class ResponseCache:
+    """
+    Bounded LRU map from request key to completion text, optionally backed by
+    a SQLiteResponseStore so recordings survive the process.
+    
+    Identical conversations produce identical requests, so evaluation runs and
+    load tests can be recorded once against Groq and replayed without it.
+    """
+    
+    def __init__(self, max_entries: int = 1024, store: Optional[SQLiteResponseStore] = None,
+                 mode: str = "read_write"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.max_entries = max_entries
+        self.store = store
+        self.mode = mode
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+    
+    @property
+    def allows_live_calls(self) -> bool:
+        """Whether a miss may fall through to the LLM"""
+        return self.mode != "replay"
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached completion for a key (None on a miss, and always in record mode)"""
+        if self.mode == "record":
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        
+        value = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._remember(key, value)
+        return value
+    
+    def put(self, key: str, value: str, model_name: Optional[str] = None):
+        """Store a completion in memory and, if configured, on disk"""
+        with self._lock:
+            self._remember(key, value)
+        if self.store is not None:
+            self.store.put(key, value, model_name)
+    
+    def _remember(self, key: str, value: str):
+        """Insert into the LRU, evicting beyond max_entries (caller holds the lock)"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop in-memory entries and reset counters (the disk store is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.store_hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict:
+        """Hit/miss counts and current size"""
+        stored = self.store.count() if self.store is not None else 0
+        with self._lock:
+            hits = self.hits + self.store_hits
+            lookups = hits + self.misses
+            return {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "stored_entries": stored,
+                "hits": hits,
+                "memory_hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+# One cache per process, configured from the environment
+_cache_lock = threading.Lock()
+_shared_cache = None
+_shared_cache_config = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide cache from LLM_CACHE_MODE / LLM_CACHE_PATH (None when caching is off)
+    
+    LLM_CACHE_MODE is one of off (default), read_write, record or replay.
+    """
+    global _shared_cache, _shared_cache_config
+    mode = os.getenv("LLM_CACHE_MODE", "off").strip().lower()
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if mode in ("", "off", "none"):
+        return None
+    
+    with _cache_lock:
+        if _shared_cache is None or _shared_cache_config != (mode, path):
+            _shared_cache = ResponseCache(store=SQLiteResponseStore(path), mode=mode)
+            _shared_cache_config = (mode, path)
+        return _shared_cache
@@ -5,37 +5,81 @@ Main agent loop with tool routing and LLM integration
 
 import os
 import re
+import copy
 import json
-from typing import Dict, List, Optional
-from groq import Groq
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime, timedelta
 
 from agent.prompt_manager_v6 import get_system_prompt
 from agent.context_manager import ContextManager
-from tools.recommendations import RecommendationTool
-from tools.availability import AvailabilityTool
-from tools.booking import BookingTool
-from tools.analytics import AnalyticsTool
+from agent.stream_filter import ToolCallStreamFilter
+from agent.intent_router import IntentRouter
+from agent.result_format import format_tool_results
+from agent.llm_cache import ResponseCache, ResponseCacheMiss, make_cache_key, get_response_cache
+from agent.llm_backends import LLMBackend, GroqBackend
+from tools.registry import ToolRegistry, get_default_registry
+
+# Fetched once so every request starts with the same bytes (provider prefix caching)
+SYSTEM_PROMPT = get_system_prompt("v6")
+
+# How the reply after each tool is produced: "template" renders the tool result
+# directly (no second LLM call), "llm" asks the model to phrase it
+DEFAULT_RESPONSE_MODES = {
+    "book_reservation": "template",
+    "get_user_reservations": "template",
+    "cancel_reservation": "template",
+    "recommend_restaurants": "llm",
+    "check_availability": "llm",
+    "get_analytics": "llm"
+}
+
+# Alternative slots kept in a check_availability digest for later turns
+DIGEST_ALTERNATIVES = 3
 
 class AgentOrchestrator:
-    def __init__(self, api_key: str, model_name: str = "llama-3.3-70b-versatile"):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "llama-3.3-70b-versatile",
+                 tools: Optional[ToolRegistry] = None, router: Optional[IntentRouter] = None,
+                 response_modes: Optional[Dict[str, str]] = None, result_format: str = "compact",
+                 response_cache: Optional[ResponseCache] = None, backend: Optional[LLMBackend] = None):
+        # Groq unless another backend (e.g. MockLLMBackend for offline benchmarks) is given
+        self.backend = backend or GroqBackend(api_key)
         self.model_name = model_name
-        self.context_manager = ContextManager()
-        
-        # Initialize tools
-        self.tools = {
-            "recommend_restaurants": RecommendationTool(),
-            "check_availability": AvailabilityTool(),
-            "book_reservation": BookingTool(),
-            "cancel_reservation": BookingTool(),
-            "get_user_reservations": BookingTool(),
-            "get_analytics": AnalyticsTool()
-        }
         
-        # Add system prompt to context
-        system_prompt = get_system_prompt("v6")
-        self.context_manager.add_message("system", system_prompt)
+        # Tools share one DatabaseManager and are shared across orchestrators
+        self.tools = tools or get_default_registry()
+        
+        # Simple, fully specified requests skip the LLM entirely
+        self.router = router or IntentRouter()
+        
+        # Per-tool response rendering; overrides merge over the defaults
+        self.response_modes = {**DEFAULT_RESPONSE_MODES, **(response_modes or {})}
+        
+        # "compact" (tabular, trimmed fields) or "json" (indented, full results)
+        self.result_format = result_format
+        
+        # Optional completion cache for recorded/replayed runs; off unless LLM_CACHE_MODE is set
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
+        
+        # Add system prompt to context (the static prefix of every request); new
+        # conversations copy this template instead of re-counting the prompt's tokens
+        self._context_template = ContextManager()
+        self._context_template.add_message("system", SYSTEM_PROMPT)
+        self.context_manager = self.new_context()
+    
+    def new_context(self) -> ContextManager:
+        """Fresh conversation state that starts with the system prompt"""
+        return self._context_template.copy()
+    
+    def bind(self, context_manager: ContextManager) -> "AgentOrchestrator":
+        """
+        Shallow copy that runs turns against context_manager
+        
+        The copy shares the backend, tools, router and response cache with this
+        orchestrator, so one orchestrator can serve many conversations.
+        """
+        bound = copy.copy(self)
+        bound.context_manager = context_manager
+        return bound
     
     def process_message(self, user_message: str, user_name: str = "Guest", user_id: Optional[int] = None) -> str:
         """
@@ -49,13 +93,11 @@ class AgentOrchestrator:
         Returns:
             Assistant's response
         """
-        # Store user name and ID in context
-        self.context_manager.set_user_context("user_name", user_name)
-        if user_id:
-            self.context_manager.set_user_context("user_id", user_id)
+        self._start_turn(user_message, user_name, user_id)
         
-        # Add user message to history
-        self.context_manager.add_message("user", user_message)
+        fast_response = self._try_fast_path(user_message)
+        if fast_response is not None:
+            return fast_response
         
         # Get LLM response
         assistant_response = self._get_llm_response()
@@ -65,49 +107,18 @@ class AgentOrchestrator:
         
         if tool_calls:
             # Don't show the tool call response to user - it's internal processing
-            # Execute tools and get results
-            tool_results = self._execute_tools(tool_calls)
-            
-            # Add tool results to context and get final response
-            tool_results_text = self._format_tool_results(tool_results)
-
-            self.context_manager.add_message("system", f"Tool Results:\n{tool_results_text}")
-            
+            # Execute tools and add their results to context
+            tool_results = self._apply_tool_calls(tool_calls)
             
-            # Determine what kind of response to give based on tool results
-            last_tool = tool_results[-1] if tool_results else None
-            
-            if last_tool and last_tool['function'] == 'book_reservation':
-                # Booking was just made
-                instruction = (
-                    "CRITICAL: You just called book_reservation tool and received the result above. "
-                    "Tell the user their booking is CONFIRMED. Include: "
-                    "1. Restaurant name, 2. Date and time, 3. Party size, 4. Confirmation code. "
-                    "Use a friendly tone with emoji like ✅. "
-                    "Example: '✅ Booked! Your table for 4 at GoodFoods - Indian - JP Nagar is confirmed for today at 7pm. Confirmation code: GF-0043' "
-                    "Do NOT call any more tools. Do NOT include XML tags."
-                )
-            elif last_tool and last_tool['function'] == 'recommend_restaurants':
-                # Restaurants were found
-                instruction = (
-                    "CRITICAL: You just searched for restaurants and received results above. "
-                    "Show the user the available restaurants with their details (name, location, rating, available seats). "
-                    "If user asked to book, ask which restaurant they want to book. "
-                    "If they just asked for recommendations, present the options nicely. "
-                    "Do NOT call any more tools. Do NOT include XML tags. Do NOT say 'booking confirmed' yet."
-                )
-            else:
-                # Other tools
-                instruction = (
-                    "CRITICAL: You have received tool results above. Do NOT call any more tools. "
-                    "Respond to the user in natural language using ONLY the information from the tool results. "
-                    "Do NOT include any XML tags or tool calls in your response."
-                )
+            # Results that fully determine the reply are rendered without another LLM call
+            if self._uses_template_response(tool_results):
+                return self._render_template_response(tool_results)
             
-            self.context_manager.add_message("system", instruction)
+            # Instructions go after the history so the message prefix stays stable
+            instructions = [self._tool_result_instruction(tool_results)]
             
             # Get final response incorporating tool results
-            final_response = self._get_llm_response()
+            final_response = self._get_llm_response(instructions)
             
             # Check if LLM is STILL trying to call tools (it shouldn't!)
             max_retries = 2
@@ -120,12 +131,12 @@ class AgentOrchestrator:
                 
                 # If response is now empty or too short after stripping, ask LLM again
                 if len(cleaned_response.strip()) < 20:
-                    self.context_manager.add_message("system", 
-                        f"ERROR: You must respond in plain text only. "
-                        f"Look at the tool results above and tell the user what happened. "
-                        f"If there was an error, explain it. If it was successful, confirm it. "
-                        f"NO <tool_call> TAGS. Just write a normal sentence.")
-                    final_response = self._get_llm_response()
+                    instructions.append(
+                        "ERROR: You must respond in plain text only. "
+                        "Look at the tool results above and tell the user what happened. "
+                        "If there was an error, explain it. If it was successful, confirm it. "
+                        "NO <tool_call> TAGS. Just write a normal sentence.")
+                    final_response = self._get_llm_response(instructions)
                     retry_count += 1
                 else:
                     final_response = cleaned_response
@@ -160,24 +171,227 @@ class AgentOrchestrator:
             self.context_manager.add_message("assistant", assistant_response)
             return assistant_response
     
-    def _get_llm_response(self) -> str:
+    def process_message_stream(self, user_message: str, user_name: str = "Guest",
+                               user_id: Optional[int] = None) -> Iterator[str]:
+        """
+        Streaming variant of process_message that yields text as tokens arrive
+        
+        Tool-call XML is filtered out on the fly; when the model calls tools they
+        run after its first reply finishes and the follow-up reply is streamed.
+        
+        Args:
+            user_message: User's input message
+            user_name: User's name for personalization
+            user_id: User's database ID for linking reservations
+        
+        Yields:
+            Chunks of the assistant's response, in order
+        """
+        self._start_turn(user_message, user_name, user_id)
+        
+        fast_response = self._try_fast_path(user_message)
+        if fast_response is not None:
+            yield fast_response
+            return
+        
+        stream_filter = ToolCallStreamFilter()
+        for chunk in self._stream_llm_response():
+            text = stream_filter.feed(chunk)
+            if text:
+                yield text
+        text = stream_filter.flush()
+        if text:
+            yield text
+        
+        tool_calls = self._extract_tool_calls(stream_filter.raw)
+        if not tool_calls:
+            self.context_manager.add_message("assistant", stream_filter.raw)
+            return
+        
+        tool_results = self._apply_tool_calls(tool_calls)
+        
+        # Separate any prose shown before the tool call from the final answer
+        shown = stream_filter.visible.strip()
+        if shown:
+            yield "\n\n"
+        
+        if self._uses_template_response(tool_results):
+            yield self._render_template_response(tool_results, prefix=shown)
+            return
+        
+        instructions = [self._tool_result_instruction(tool_results)]
+        
+        final_filter = ToolCallStreamFilter()
+        for chunk in self._stream_llm_response(instructions):
+            text = final_filter.feed(chunk)
+            if text:
+                yield text
+        text = final_filter.flush()
+        if text:
+            yield text
+        
+        final_response = final_filter.visible.strip()
+        
+        # Nothing usable streamed (e.g. the model only emitted tool calls again)
+        if len(final_response) < 10:
+            fallback = self._create_fallback_response(tool_results)
+            yield fallback if not final_response else "\n\n" + fallback
+            final_response = (final_response + "\n\n" + fallback).strip()
+        
+        if shown:
+            final_response = f"{shown}\n\n{final_response}"
+        
+        self.context_manager.add_message("assistant", final_response)
+    
+    def _start_turn(self, user_message: str, user_name: str, user_id: Optional[int]):
+        """Record the user and their message at the start of a turn"""
+        # Store user name and ID in context
+        self.context_manager.set_user_context("user_name", user_name)
+        if user_id:
+            self.context_manager.set_user_context("user_id", user_id)
+        
+        # Add user message to history
+        self.context_manager.add_message("user", user_message)
+    
+    def _try_fast_path(self, user_message: str) -> Optional[str]:
+        """Answer from a template when the intent router is confident, else None"""
+        route = self.router.route(user_message)
+        if route is None:
+            return None
+        
+        # Results stay in context so follow-up turns through the LLM can refer to them
+        tool_results = self._apply_tool_calls([{"function": route["function"], "args": dict(route["args"])}])
+        return self._render_template_response(tool_results)
+    
+    def _apply_tool_calls(self, tool_calls: List[Dict]) -> List[Dict]:
+        """Execute tools and add their results to context"""
+        tool_results = self._execute_tools(tool_calls)
+        
+        tool_results_text = self._format_tool_results(tool_results)
+        self.context_manager.add_message("system", f"Tool Results:\n{tool_results_text}",
+                                         kind="tool_results",
+                                         digest=self._digest_tool_results(tool_results))
+        
+        return tool_results
+    
+    def _uses_template_response(self, tool_results: List[Dict]) -> bool:
+        """Whether every tool that ran is configured for template rendering"""
+        return bool(tool_results) and all(
+            self.response_modes.get(result['function'], "llm") == "template"
+            for result in tool_results
+        )
+    
+    def _render_template_response(self, tool_results: List[Dict], prefix: str = "") -> str:
+        """Render the reply for each tool result and record it as the assistant turn"""
+        response = "\n\n".join(self._create_fallback_response([result]) for result in tool_results)
+        self.context_manager.add_message("assistant", f"{prefix}\n\n{response}" if prefix else response)
+        return response
+    
+    def _tool_result_instruction(self, tool_results: List[Dict]) -> str:
+        """Pick the follow-up instruction based on the last tool that ran"""
+        last_tool = tool_results[-1] if tool_results else None
+        
+        if last_tool and last_tool['function'] == 'book_reservation':
+            # Booking was just made
+            instruction = (
+                "CRITICAL: You just called book_reservation tool and received the result above. "
+                "Tell the user their booking is CONFIRMED. Include: "
+                "1. Restaurant name, 2. Date and time, 3. Party size, 4. Confirmation code. "
+                "Use a friendly tone with emoji like ✅. "
+                "Example: '✅ Booked! Your table for 4 at GoodFoods - Indian - JP Nagar is confirmed for today at 7pm. Confirmation code: GF-0043' "
+                "Do NOT call any more tools. Do NOT include XML tags."
+            )
+        elif last_tool and last_tool['function'] == 'recommend_restaurants':
+            # Restaurants were found
+            instruction = (
+                "CRITICAL: You just searched for restaurants and received results above. "
+                "Show the user the available restaurants with their details (name, location, rating, available seats). "
+                "If user asked to book, ask which restaurant they want to book. "
+                "If they just asked for recommendations, present the options nicely. "
+                "Do NOT call any more tools. Do NOT include XML tags. Do NOT say 'booking confirmed' yet."
+            )
+        else:
+            # Other tools
+            instruction = (
+                "CRITICAL: You have received tool results above. Do NOT call any more tools. "
+                "Respond to the user in natural language using ONLY the information from the tool results. "
+                "Do NOT include any XML tags or tool calls in your response."
+            )
+        
+        return instruction
+    
+    def _completion_params(self) -> Dict:
+        """Sampling parameters sent with every completion"""
+        return {
+            "model": self.model_name,
+            "temperature": 0.7,
+            "max_tokens": 1024,
+            "top_p": 0.9
+        }
+    
+    def _cache_key(self, messages: List[Dict], params: Dict) -> Optional[str]:
+        """Response cache key for a request (None when caching is off)"""
+        if self.response_cache is None:
+            return None
+        prefix_len = len(self.context_manager.get_prefix())
+        return make_cache_key(self.context_manager.get_prefix_hash(), messages[prefix_len:], params)
+    
+    def _cached_response(self, cache_key: str) -> Optional[str]:
+        """Cached completion, or None if the LLM should be called (raises on a replay miss)"""
+        cached = self.response_cache.get(cache_key)
+        if cached is None and not self.response_cache.allows_live_calls:
+            raise ResponseCacheMiss("no recorded response for this request (replay mode)")
+        return cached
+    
+    def _get_llm_response(self, instructions: Optional[List[str]] = None) -> str:
         """Get response from LLM"""
         try:
-            messages = self.context_manager.get_history()
+            messages = self.context_manager.build_messages(instructions)
+            params = self._completion_params()
             
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1024,
-                top_p=0.9
-            )
+            cache_key = self._cache_key(messages, params)
+            if cache_key:
+                cached = self._cached_response(cache_key)
+                if cached is not None:
+                    return cached
+            
+            content = self.backend.complete(messages, **params)
             
-            return response.choices[0].message.content
+            if cache_key and content is not None:
+                self.response_cache.put(cache_key, content, self.model_name)
+            return content
             
+        except ResponseCacheMiss:
+            raise  # a stale recording must fail the replay run, not become an apology
         except Exception as e:
             return f"I apologize, but I encountered an error: {str(e)}. Please try again."
     
+    def _stream_llm_response(self, instructions: Optional[List[str]] = None) -> Iterator[str]:
+        """Stream response tokens from LLM"""
+        try:
+            messages = self.context_manager.build_messages(instructions)
+            params = self._completion_params()
+            
+            cache_key = self._cache_key(messages, params)
+            if cache_key:
+                cached = self._cached_response(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+            
+            parts = []
+            for chunk in self.backend.stream(messages, **params):
+                parts.append(chunk)
+                yield chunk
+            
+            if cache_key:
+                self.response_cache.put(cache_key, "".join(parts), self.model_name)
+            
+        except ResponseCacheMiss:
+            raise
+        except Exception as e:
+            yield f"I apologize, but I encountered an error: {str(e)}. Please try again."
+    
     def _extract_tool_calls(self, response: str) -> List[Dict]:
         """Extract tool calls from LLM response using XML parsing"""
         tool_calls = []
@@ -241,18 +455,59 @@ class AgentOrchestrator:
                 return "I couldn't find any restaurants matching your criteria. Would you like to try different search parameters?"
         
         elif function_name == 'get_user_reservations':
+            if not result_data.get('success', True):
+                error = result_data.get('error', 'Unknown error')
+                return f"I couldn't look up your reservations: {error}. Please try again."
             reservations = result_data.get('reservations', [])
             if reservations:
-                return f"You have {len(reservations)} reservation(s). Let me know if you'd like to modify or cancel any of them."
+                lines = [f"You have {len(reservations)} reservation(s):"]
+                for res in reservations:
+                    lines.append(
+                        f"- {res.get('restaurant_name')} on {res.get('date')} at {res.get('time')} "
+                        f"for {res.get('party_size')} (confirmation code: {res.get('confirmation_code')})"
+                    )
+                lines.append("Let me know if you'd like to modify or cancel any of them.")
+                return "\n".join(lines)
             else:
                 return "You don't have any reservations at the moment. Would you like to make one?"
         
+        elif function_name == 'cancel_reservation':
+            reservation_id = result_data.get('reservation_id', result.get('args', {}).get('reservation_id'))
+            code = f"GF-{int(reservation_id):04d}" if str(reservation_id or '').isdigit() else reservation_id
+            if result_data.get('success'):
+                return f"✅ Your reservation {code} has been cancelled. Is there anything else I can help with?"
+            else:
+                error = result_data.get('error', 'Unknown error')
+                return f"I couldn't cancel reservation {code}: {error}."
+        
+        elif function_name == 'check_availability':
+            if not result_data.get('success'):
+                error = result_data.get('error', 'Unknown error')
+                return f"I couldn't check availability: {error}"
+            restaurant_name = result_data.get('restaurant_name', 'the restaurant')
+            party_size = result_data.get('party_size', '')
+            date = result_data.get('date', '')
+            time = result_data.get('time', '')
+            if result_data.get('available'):
+                return (f"✅ {restaurant_name} has a table for {party_size} on {date} at {time} "
+                        f"({result_data.get('seats_available')} seats left). Would you like me to book it?")
+            alternatives = result_data.get('alternatives', [])
+            response = f"❌ {restaurant_name} isn't available for {party_size} on {date} at {time}."
+            if alternatives:
+                options = []
+                for alternative in alternatives:
+                    place = (restaurant_name if alternative['restaurant_id'] == result_data.get('restaurant_id')
+                             else alternative['restaurant_name'])
+                    options.append(f"- {alternative['time']} at {place} ({alternative['seats_available']} seats)")
+                response += " Closest alternatives:\n" + "\n".join(options) + "\nWould you like one of those?"
+            return response
+        
         # Default fallback
         return "I've processed your request. Please let me know if you need any additional information."
     
     def _execute_tools(self, tool_calls: List[Dict]) -> List[Dict]:
-        """Execute tool calls and return results"""
-        results = []
+        """Execute tool calls and return results (read-only tools run concurrently)"""
+        prepared = []
         
         for tool_call in tool_calls:
             function_name = tool_call["function"]
@@ -269,32 +524,15 @@ class AgentOrchestrator:
             
             # Handle date/time parsing
             args = self._parse_temporal_args(args)
-            
-            # Execute tool
-            if function_name in self.tools:
-                tool = self.tools[function_name]
-                
-                # Route to correct method
-                if function_name == "cancel_reservation":
-                    result = tool.cancel(args)
-                elif function_name == "get_user_reservations":
-                    result = tool.get_user_reservations(args)
-                else:
-                    result = tool.execute(args)
-                
-                results.append({
-                    "function": function_name,
-                    "args": args,
-                    "result": result
-                })
-            else:
-                results.append({
-                    "function": function_name,
-                    "args": args,
-                    "result": {"success": False, "error": f"Unknown tool: {function_name}"}
-                })
+            prepared.append((function_name, args))
         
-        return results
+        # Registry runs read-only calls in parallel and mutating ones in emission order
+        outcomes = self.tools.execute_batch(prepared)
+        
+        return [
+            {"function": function_name, "args": args, "result": result}
+            for (function_name, args), result in zip(prepared, outcomes)
+        ]
     
     def _parse_temporal_args(self, args: Dict) -> Dict:
         """Parse and normalize date/time arguments"""
@@ -332,20 +570,60 @@ class AgentOrchestrator:
     
     def _format_tool_results(self, results: List[Dict]) -> str:
         """Format tool results for LLM context"""
-        formatted = []
+        return format_tool_results(results, self.result_format)
+    
+    def _digest_tool_results(self, results: List[Dict]) -> str:
+        """One-line-per-tool digest that replaces full results once the turn is over"""
+        lines = []
         
         for result in results:
-            formatted.append(f"Function: {result['function']}")
-            formatted.append(f"Result: {json.dumps(result['result'], indent=2)}")
-            formatted.append("---")
+            function_name = result['function']
+            data = result['result'] or {}
+            
+            if not data.get('success', True):
+                lines.append(f"{function_name}: failed ({data.get('error', 'unknown error')})")
+            elif function_name == 'recommend_restaurants':
+                options = ", ".join(
+                    f"#{r['id']} {r['name']} ({r['rating']}"
+                    + (f", {r['seats_available']} seats" if r.get('available') else "")
+                    + ")"
+                    for r in data.get('recommendations', [])
+                )
+                lines.append(f"{function_name}: {data.get('count', 0)} found: {options or 'none'}")
+            elif function_name == 'check_availability':
+                status = "available" if data.get('available') else "not available"
+                # Keep the ids of suggested restaurants so a later turn can still book them
+                alternatives = "; ".join(
+                    f"#{a['restaurant_id']} {a['restaurant_name']} {a.get('date', data.get('date'))} {a['time']}"
+                    for a in data.get('alternatives', [])[:DIGEST_ALTERNATIVES]
+                )
+                lines.append(
+                    f"{function_name}: #{data.get('restaurant_id')} {data.get('restaurant_name')} "
+                    f"{data.get('date')} {data.get('time')} for {data.get('party_size')}: {status}"
+                    + (f" (alternatives: {alternatives})" if alternatives else "")
+                )
+            elif function_name == 'book_reservation':
+                lines.append(
+                    f"{function_name}: booked {data.get('confirmation_code')} at {data.get('restaurant_name')} "
+                    f"{data.get('date')} {data.get('time')} for {data.get('party_size')}"
+                )
+            elif function_name == 'cancel_reservation':
+                lines.append(f"{function_name}: cancelled reservation #{data.get('reservation_id')}")
+            elif function_name == 'get_user_reservations':
+                bookings = "; ".join(
+                    f"{r['confirmation_code']} {r['restaurant_name']} {r['date']} {r['time']} for {r['party_size']}"
+                    for r in data.get('reservations', [])
+                )
+                lines.append(f"{function_name}: {data.get('count', 0)} reservation(s): {bookings or 'none'}")
+            else:
+                lines.append(f"{function_name}: {data.get('message', 'done')}")
         
-        return "\n".join(formatted)
+        return "\n".join(lines)
     
     def reset_conversation(self):
         """Reset conversation history"""
         self.context_manager.clear_history()
-        system_prompt = get_system_prompt("v6")
-        self.context_manager.add_message("system", system_prompt)
+        self.context_manager.add_message("system", SYSTEM_PROMPT)
     
     def get_conversation_history(self) -> List[Dict]:
         """Get conversation history"""
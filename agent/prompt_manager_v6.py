@@ -50,19 +50,23 @@ Args: query, cuisine, location, party_size, date, time
 
 ### book_reservation
 Book a table (needs restaurant_id from search results)
-Args: restaurant_id, date, time, party_size
+Args: restaurant_id, date, time, party_size (optional: duration_minutes, default 90; idempotency_key)
 NOTE: user_name is auto-added, don't include it!
 
 ### check_availability
 Check specific restaurant availability
-Args: restaurant_id, date, time, party_size
+Args: restaurant_id, date, time, party_size (optional: duration_minutes, default 90)
 
 ### get_user_reservations
 Show user's bookings
 
 ### cancel_reservation
 Cancel a booking
-Args: reservation_id
+Args: reservation_id (optional: idempotency_key)
+
+idempotency_key: any short unique string, e.g. "book-42-0915". When you retry a
+booking or cancellation whose result you didn't get (error, timeout), send the
+SAME key again so it isn't done twice. Use a new key for each new request.
 
 ## HOW TO RESPOND
 
@@ -0,0 +1,92 @@
+"""
+Tool Result Formatting
+Serialise tool results for the LLM context, either as pretty JSON or a compact tabular encoding
+"""
+
+import json
+from typing import Dict, List
+
+# Fields the prompt never needs, per tool (applied to the result and to each row of its lists)
+DROP_FIELDS = {
+    "recommend_restaurants": {"description", "capacity", "rank", "message", "filters", "query"},
+    "check_availability": {"message"},
+    "book_reservation": {"message"},
+    "cancel_reservation": {"message"},
+    "get_user_reservations": {"message"},
+    "get_analytics": {"message"}
+}
+
+FORMAT_MODES = ("compact", "json")
+
+def _scalar(value) -> str:
+    """Cell text for a table row"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return ";".join(_scalar(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+def _table(name: str, rows: List[Dict], drop: set) -> List[str]:
+    """Header of column names followed by one pipe-separated line per row"""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in drop and key not in columns:
+                columns.append(key)
+    
+    # Columns that are empty in every row carry no information
+    columns = [c for c in columns if any(row.get(c) not in (None, "", [], {}) for row in rows)]
+    
+    lines = [f"{name}[{len(rows)}] {'|'.join(columns)}"]
+    for row in rows:
+        lines.append("|".join(_scalar(row.get(c)) for c in columns))
+    return lines
+
+def _compact(data: Dict, drop: set, prefix: str = "") -> List[str]:
+    """Scalars as one line of minified JSON; lists of dicts as tables; nested dicts recursively"""
+    scalars, sections = {}, []
+    
+    for key, value in data.items():
+        if key in drop:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            sections.extend(_table(name, value, drop))
+        elif isinstance(value, dict) and value:
+            sections.extend(_compact(value, drop, prefix=f"{name}."))
+        else:
+            scalars[key] = value
+    
+    lines = []
+    if scalars:
+        encoded = json.dumps(scalars, separators=(",", ":"), ensure_ascii=False)
+        lines.append(f"{prefix[:-1]} {encoded}" if prefix else encoded)
+    return lines + sections
+
+def format_tool_result(function_name: str, result: Dict, mode: str = "compact") -> str:
+    """Serialise one tool result"""
+    if mode == "json":
+        return json.dumps(result, indent=2)
+    if not isinstance(result, dict):
+        return json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+    return "\n".join(_compact(result, DROP_FIELDS.get(function_name, set())))
+
+def format_tool_results(results: List[Dict], mode: str = "compact") -> str:
+    """Serialise a turn's tool results for the LLM context"""
+    if mode not in FORMAT_MODES:
+        raise ValueError(f"Unknown tool result format: {mode}")
+    
+    formatted = []
+    for result in results:
+        formatted.append(f"Function: {result['function']}")
+        if mode == "json":
+            formatted.append(f"Result: {format_tool_result(result['function'], result['result'], mode)}")
+        else:
+            formatted.append(format_tool_result(result['function'], result['result'], mode))
+        formatted.append("---")
+    
+    return "\n".join(formatted)
@@ -0,0 +1,227 @@
+"""
+Session Manager
+Serves many conversations from one shared orchestrator with bounded per-session state
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+from data.connection_pool import ConnectionPool
+from agent.context_manager import ContextManager
+from agent.orchestrator import AgentOrchestrator
+
+DEFAULT_SESSION_PATH = "data/sessions.db"
+
+class SQLiteSessionStore:
+    """On-disk conversation state, so evicted or restarted sessions can resume"""
+    
+    def __init__(self, db_path: str = DEFAULT_SESSION_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.pool = ConnectionPool(db_path, max_connections=4)
+        
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_conversation_sessions_updated
+                ON conversation_sessions(updated_at)
+            ''')
+            conn.commit()
+    
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Stored state for a session (None if absent)"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT state FROM conversation_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+    
+    def put(self, session_id: str, state: Dict):
+        """Store or overwrite a session's state"""
+        with self.pool.connection() as conn:
+            conn.execute('''
+                INSERT INTO conversation_sessions (session_id, state, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at
+            ''', (session_id, json.dumps(state, ensure_ascii=False), datetime.now().isoformat()))
+            conn.commit()
+    
+    def delete(self, session_id: str):
+        """Forget a session"""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM conversation_sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+    
+    def purge(self, max_age_seconds: float) -> int:
+        """Delete sessions not updated within max_age_seconds; returns how many"""
+        cutoff = (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()
+        with self.pool.connection() as conn:
+            cursor = conn.execute("DELETE FROM conversation_sessions WHERE updated_at < ?", (cutoff,))
+            conn.commit()
+            return cursor.rowcount
+    
+    def count(self) -> int:
+        """Number of stored sessions"""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM conversation_sessions").fetchone()[0]
+    
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close()
+
+class _Session:
+    """In-memory state of one conversation"""
+    
+    __slots__ = ("context", "lock", "last_active")
+    
+    def __init__(self, context: ContextManager):
+        self.context = context
+        self.lock = threading.Lock()  # one turn at a time per conversation
+        self.last_active = time.monotonic()
+
+class SessionManager:
+    """
+    Runs conversations for many users through one AgentOrchestrator.
+    
+    The orchestrator (LLM backend, tool registry, intent router, embedding model)
+    is shared; each session only owns a ContextManager, a few KB of history.
+    Sessions idle for idle_timeout seconds are evicted, as are the least
+    recently used ones beyond max_sessions. With a store, state is saved after
+    every turn and an evicted session resumes where it left off.
+    """
+    
+    def __init__(self, orchestrator: AgentOrchestrator, max_sessions: int = 1000,
+                 idle_timeout: float = 1800.0, store: Optional[SQLiteSessionStore] = None):
+        self.orchestrator = orchestrator
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.restored = 0
+        self.evicted = 0
+    
+    def process_message(self, session_id: str, user_message: str, user_name: str = "Guest",
+                        user_id: Optional[int] = None) -> str:
+        """Run one turn of a session's conversation (see AgentOrchestrator.process_message)"""
+        session = self._checkout(session_id)
+        with session.lock:
+            response = self.orchestrator.bind(session.context).process_message(
+                user_message, user_name, user_id)
+            self._save(session_id, session)
+        return response
+    
+    def process_message_stream(self, session_id: str, user_message: str, user_name: str = "Guest",
+                               user_id: Optional[int] = None) -> Iterator[str]:
+        """Streaming variant of process_message"""
+        session = self._checkout(session_id)
+        with session.lock:
+            yield from self.orchestrator.bind(session.context).process_message_stream(
+                user_message, user_name, user_id)
+            self._save(session_id, session)
+    
+    def get_context(self, session_id: str) -> ContextManager:
+        """The session's conversation state (created or restored if needed)"""
+        return self._checkout(session_id).context
+    
+    def reset(self, session_id: str):
+        """Start the session's conversation over"""
+        session = self._checkout(session_id)
+        with session.lock:
+            session.context = self.orchestrator.new_context()
+            self._save(session_id, session)
+    
+    def end_session(self, session_id: str):
+        """Drop a session from memory and the store (e.g. on logout)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.store is not None:
+            self.store.delete(session_id)
+    
+    def evict_idle(self) -> int:
+        """Evict sessions idle longer than idle_timeout; returns how many"""
+        with self._lock:
+            return self._evict(time.monotonic())
+    
+    def _checkout(self, session_id: str) -> _Session:
+        """Look up, restore or create a session and mark it most recently used"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_active = now
+                return session
+        
+        # Not in memory: load outside the lock so other sessions aren't blocked on disk
+        context = self.orchestrator.new_context()
+        state = self.store.get(session_id) if self.store is not None else None
+        if state is not None:
+            context.load_state(state)
+        
+        with self._lock:
+            # Another request for the same session may have won the race
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(context)
+                self._sessions[session_id] = session
+                if state is not None:
+                    self.restored += 1
+                else:
+                    self.created += 1
+            self._sessions.move_to_end(session_id)
+            session.last_active = now
+            self._evict(now)
+            return session
+    
+    def _evict(self, now: float) -> int:
+        """Drop idle sessions, then the least recently used beyond max_sessions (caller holds the lock)"""
+        evicted = 0
+        for session_id in list(self._sessions):
+            session = self._sessions[session_id]
+            over_cap = len(self._sessions) > self.max_sessions
+            idle = now - session.last_active > self.idle_timeout
+            if not (over_cap or idle):
+                break  # ordered by last use, so the rest are newer
+            if session.lock.locked():
+                continue  # mid-turn; evicting it would lose the turn's state
+            del self._sessions[session_id]
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+    
+    def _save(self, session_id: str, session: _Session):
+        """Persist a session's state after a turn (no-op without a store)"""
+        if self.store is not None:
+            self.store.put(session_id, session.context.get_state())
+    
+    def stats(self) -> Dict:
+        """Session counts and the serialised size of in-memory conversation state"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            counts = {
+                "active_sessions": len(sessions),
+                "created": self.created,
+                "restored": self.restored,
+                "evicted": self.evicted
+            }
+        state_bytes = sum(len(json.dumps(s.context.get_state(), ensure_ascii=False).encode("utf-8"))
+                          for s in sessions)
+        counts["state_bytes"] = state_bytes
+        counts["avg_state_bytes"] = state_bytes / len(sessions) if sessions else 0.0
+        counts["stored_sessions"] = self.store.count() if self.store is not None else 0
+        return counts
@@ -0,0 +1,94 @@
+"""
+Tool Call Stream Filter
+Hides <tool_call> blocks from streamed LLM output as tokens arrive
+"""
+
+from typing import List
+
+TOOL_CALL_OPEN = "<tool_call>"
+TOOL_CALL_CLOSE = "</tool_call>"
+STOP_MARKERS = ["Tool Results:"]
+
+def _partial_suffix(text: str, markers: List[str]) -> int:
+    """Length of the longest suffix of text that is a proper prefix of any marker"""
+    longest = 0
+    for marker in markers:
+        for size in range(min(len(marker) - 1, len(text)), longest, -1):
+            if text.endswith(marker[:size]):
+                longest = size
+                break
+    return longest
+
+class ToolCallStreamFilter:
+    """
+    Feed raw token chunks in, get user-visible text out.
+    
+    Text that could be the start of a <tool_call> tag (or a leaked
+    "Tool Results:" echo) is held back until the next chunk decides it, so
+    internal XML never reaches the user while plain prose streams with at
+    most a few characters of delay. The unfiltered text is kept in `raw`
+    for tool-call extraction once the stream ends.
+    """
+    
+    def __init__(self):
+        self.raw = ""
+        self.visible = ""
+        self.saw_tool_call = False
+        self._pending = ""
+        self._in_tool_call = False
+        self._stopped = False
+    
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return the text that is safe to show"""
+        if not chunk:
+            return ""
+        self.raw += chunk
+        if self._stopped:
+            return ""
+        
+        self._pending += chunk
+        output = []
+        
+        while self._pending:
+            if self._in_tool_call:
+                end = self._pending.find(TOOL_CALL_CLOSE)
+                if end == -1:
+                    # Keep only enough to recognise a split closing tag
+                    keep = _partial_suffix(self._pending, [TOOL_CALL_CLOSE])
+                    self._pending = self._pending[len(self._pending) - keep:] if keep else ""
+                    break
+                self._pending = self._pending[end + len(TOOL_CALL_CLOSE):]
+                self._in_tool_call = False
+                continue
+            
+            start = self._pending.find(TOOL_CALL_OPEN)
+            stop = min((i for i in (self._pending.find(m) for m in STOP_MARKERS) if i != -1), default=-1)
+            
+            if stop != -1 and (start == -1 or stop < start):
+                output.append(self._pending[:stop])
+                self._pending = ""
+                self._stopped = True
+                break
+            
+            if start != -1:
+                output.append(self._pending[:start])
+                self._pending = self._pending[start + len(TOOL_CALL_OPEN):]
+                self._in_tool_call = True
+                self.saw_tool_call = True
+                continue
+            
+            keep = _partial_suffix(self._pending, [TOOL_CALL_OPEN] + STOP_MARKERS)
+            output.append(self._pending[:len(self._pending) - keep])
+            self._pending = self._pending[len(self._pending) - keep:]
+            break
+        
+        text = "".join(output)
+        self.visible += text
+        return text
+    
+    def flush(self) -> str:
+        """Release held-back text at the end of the stream"""
+        text = "" if (self._in_tool_call or self._stopped) else self._pending
+        self._pending = ""
+        self.visible += text
+        return text
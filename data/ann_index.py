@@ -0,0 +1,133 @@
+"""
+Approximate Nearest Neighbour Index
+Pure NumPy inverted-file (IVF) index for large restaurant catalogues
+"""
+
+import threading
+import numpy as np
+from typing import Optional, Tuple
+
+class IVFIndex:
+    """
+    Clusters unit-norm vectors with spherical k-means and only scores the
+    rows in the n_probe clusters closest to the query.
+    
+    Knobs:
+        n_lists: number of clusters (default ~sqrt(N)); more lists = smaller scans
+        n_probe: clusters scanned per query; higher = better recall, more latency
+            (32 keeps recall@10 around 0.95 from 20k vectors, see ann_recall_benchmark)
+        rebuild_factor: retrain when the catalogue grows by this factor since the last build
+    """
+    
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 32,
+                 kmeans_iters: int = 10, rebuild_factor: float = 2.0, seed: int = 42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.kmeans_iters = kmeans_iters
+        self.rebuild_factor = rebuild_factor
+        self.seed = seed
+        
+        # (matrix, centroids, lists) is swapped as one snapshot so searches never see a mix
+        empty = np.zeros((0, 0), dtype=np.float32)
+        self._state = (empty, empty, [])
+        self._trained_size = 0
+        self._lock = threading.Lock()
+    
+    def copy(self) -> "IVFIndex":
+        """Index with the same settings and clusters; building or adding to it leaves this one unchanged"""
+        other = IVFIndex(self.n_lists, self.n_probe, self.kmeans_iters, self.rebuild_factor, self.seed)
+        with self._lock:
+            other._state = self._state
+            other._trained_size = self._trained_size
+        return other
+    
+    def __len__(self) -> int:
+        return self._state[0].shape[0]
+    
+    @property
+    def list_count(self) -> int:
+        """Number of clusters in the current snapshot"""
+        return len(self._state[2])
+    
+    def _train(self, matrix: np.ndarray):
+        """Spherical k-means over the rows of a unit-norm matrix, then publish the snapshot"""
+        n = matrix.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        
+        rng = np.random.default_rng(self.seed)
+        centroids = matrix[rng.choice(n, size=n_lists, replace=False)].copy()
+        
+        for _ in range(self.kmeans_iters):
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, matrix)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            
+            # Keep the previous centroid for clusters that lost all members
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+        
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        lists = [np.flatnonzero(assignments == c) for c in range(n_lists)]
+        self._state = (matrix, np.ascontiguousarray(centroids, dtype=np.float32), lists)
+        self._trained_size = n
+    
+    def build(self, matrix: np.ndarray):
+        """(Re)build the index from a unit-norm matrix"""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        with self._lock:
+            if len(matrix):
+                self._train(matrix)
+            else:
+                empty = np.zeros((0, 0), dtype=np.float32)
+                self._state = (empty, empty, [])
+                self._trained_size = 0
+    
+    def add(self, vectors: np.ndarray):
+        """Append unit-norm vectors; their rows follow the existing ones"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        
+        with self._lock:
+            matrix, centroids, lists = self._state
+            start = len(matrix)
+            matrix = vectors if start == 0 else np.vstack([matrix, vectors])
+            
+            # Retrain once the clusters no longer reflect the catalogue
+            if not self._trained_size or len(matrix) >= self._trained_size * self.rebuild_factor:
+                self._train(matrix)
+                return
+            
+            lists = list(lists)
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in np.unique(assignments):
+                new_rows = start + np.flatnonzero(assignments == c)
+                lists[c] = np.concatenate([lists[c], new_rows])
+            self._state = (matrix, centroids, lists)
+    
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, scores) of the approximate top-k rows, best first"""
+        matrix, centroids, lists = self._state
+        if not len(matrix) or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        
+        n_probe = min(n_probe or self.n_probe, len(lists))
+        centroid_scores = centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        rows = np.concatenate([lists[c] for c in probe])
+        
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        
+        scores = matrix[rows] @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
@@ -0,0 +1,191 @@
+"""
+SQLite Connection Pool
+Reuses tuned SQLite connections across queries and threads
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+class ConnectionPool:
+    def __init__(self, db_path: str, max_connections: int = 8,
+                 checkout_timeout: float = 30.0, health_check_interval: float = 30.0,
+                 busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        
+        self._idle = deque()  # (connection, last_used) pairs, most recent last
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()  # per-thread checkout depth
+        
+        self._stats = {
+            "checkouts": 0,
+            "nested_checkouts": 0,
+            "waits": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0
+        }
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection with WAL mode and statement caching"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+    
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Run a trivial query to make sure the connection is still usable"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _discard(self, conn: sqlite3.Connection):
+        """Close a connection and free its slot (caller holds the lock)"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._open -= 1
+        self._stats["connections_discarded"] += 1
+        self._cond.notify()
+    
+    def _acquire(self, nested: bool = False) -> sqlite3.Connection:
+        """
+        Take an idle connection, open a new one, or wait for one to be released
+        
+        A nested checkout (the thread already holds a connection) never waits: it
+        may open one connection beyond max_connections, since waiting on a
+        connection while holding one can deadlock once every thread does it.
+        """
+        started = time.perf_counter()
+        waited = False
+        
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise sqlite3.ProgrammingError("Connection pool is closed")
+                    
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        stale = time.monotonic() - last_used >= self.health_check_interval
+                        break
+                    
+                    if self._open < self.max_connections or nested:
+                        self._open += 1
+                        conn, stale = None, False
+                        break
+                    
+                    waited = True
+                    remaining = self.checkout_timeout - (time.perf_counter() - started)
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError(
+                            f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+            
+            # Check idle connections outside the lock so the query doesn't block other checkouts
+            if stale and not self._is_healthy(conn):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._discard(conn)
+                continue
+            break
+        
+        with self._cond:
+            wait_time = time.perf_counter() - started
+            self._stats["checkouts"] += 1
+            if nested:
+                self._stats["nested_checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["total_wait_time"] += wait_time
+            self._stats["max_wait_time"] = max(self._stats["max_wait_time"], wait_time)
+        
+        if conn is None:
+            # Open outside the lock so slow disk I/O doesn't block other checkouts
+            try:
+                conn = self._create_connection()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["connections_created"] += 1
+        
+        return conn
+    
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, rolling back any open transaction"""
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+        
+        with self._cond:
+            # Connections opened past the limit by nested checkouts are not kept
+            if self._closed or not healthy or self._open > self.max_connections:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+    
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of the block
+        
+        A nested checkout on the same thread gets a connection of its own, so
+        its commits and rollbacks never touch the outer block's transaction.
+        """
+        depth = getattr(self._local, "depth", 0)
+        conn = self._acquire(nested=depth > 0)
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        finally:
+            self._local.depth = depth
+            self._release(conn)
+    
+    def stats(self) -> Dict:
+        """Pool statistics for sizing under load"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open_connections"] = self._open
+            stats["idle_connections"] = len(self._idle)
+            stats["in_use_connections"] = self._open - len(self._idle)
+            stats["max_connections"] = self.max_connections
+            checkouts = stats["checkouts"]
+            stats["avg_wait_time"] = stats["total_wait_time"] / checkouts if checkouts else 0.0
+        return stats
+    
+    def close(self):
+        """Close idle connections; checked-out ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
@@ -6,49 +6,491 @@ Handles all database operations with connection pooling
 import sqlite3
 import json
 import hashlib
+import os
+import threading
+import time as time_module
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from contextlib import contextmanager
+from data.connection_pool import ConnectionPool
+from data.slot_inventory import SlotInventory, NO_SLOT, SLOT_MINUTES, slot_count, window_end
+
+DEFAULT_DB_PATH = "data/restaurants.db"
+
+# How long a new booking holds its table; it blocks every half-hour slot it overlaps
+DEFAULT_DURATION_MINUTES = 90
+
+# Score added for suggesting a different restaurant, in slots (30 minutes each):
+# a neighbour in the same area ranks like moving the booking by two slots
+ALTERNATIVE_PENALTIES = {
+    "same_restaurant": 0.0,
+    "same_cuisine_and_location": 1.0,
+    "same_location": 2.0,
+    "same_cuisine": 3.0
+}
+
+# Reservation ids per IN (...) list in bulk cancellation, below SQLite's bound-parameter limit
+CANCEL_BATCH_SIZE = 500
+
+# How long a retried request can still be answered from its idempotency key, and
+# how often write paths purge expired keys
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+IDEMPOTENCY_PURGE_INTERVAL = 3600
+
+# Schema checks run once per database file per process
+_schema_lock = threading.Lock()
+_initialized_schemas = set()
+
+# One in-process writer at a time per database file: threads queue on a lock that
+# wakes the next writer immediately, instead of polling SQLite's busy handler
+_write_locks_lock = threading.Lock()
+_write_locks = {}
+
+# Process-wide managers shared by tools and sessions
+_shared_lock = threading.Lock()
+_shared_managers = {}
+
+def get_database_manager(db_path: str = DEFAULT_DB_PATH) -> "DatabaseManager":
+    """Get the process-wide DatabaseManager for a database file"""
+    key = os.path.abspath(db_path)
+    with _shared_lock:
+        manager = _shared_managers.get(key)
+        if manager is None:
+            manager = DatabaseManager(db_path)
+            _shared_managers[key] = manager
+        return manager
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/restaurants.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_connections: int = 8,
+                 use_inventory: bool = True):
         self.db_path = db_path
-        self._initialize_users_table()
+        self.pool = ConnectionPool(db_path, max_connections=max_connections)
+        self._ensure_schema()
+        with _write_locks_lock:
+            self._write_lock = _write_locks.setdefault(os.path.abspath(db_path), threading.Lock())
+        self._idempotency_purged_at = None
+        # In-memory seat counts for the next 31 days; loaded on first availability check
+        self.inventory = SlotInventory(self.get_connection) if use_inventory else None
+    
+    # (version, name, method) - append new migrations, never edit ones already shipped
+    MIGRATIONS = [
+        (1, "baseline_schema", "_migrate_baseline_schema"),
+        (2, "users_table", "_migrate_users_table"),
+        (3, "embedding_cache", "_migrate_embedding_cache"),
+        (4, "catalog_version", "_migrate_catalog_version"),
+        (5, "query_indexes", "_migrate_query_indexes"),
+        (6, "analytics_rollups", "_migrate_analytics_rollups"),
+        (7, "availability_version", "_migrate_availability_version"),
+        (8, "reservation_duration", "_migrate_reservation_duration"),
+        (9, "idempotency_keys", "_migrate_idempotency_keys"),
+    ]
+    
+    def _ensure_schema(self):
+        """Apply pending migrations the first time this database is opened in the process"""
+        key = os.path.abspath(self.db_path)
+        with _schema_lock:
+            if key in _initialized_schemas:
+                return
+            self._run_migrations()
+            _initialized_schemas.add(key)
+    
+    def _run_migrations(self):
+        """Apply migrations newer than the recorded schema version in one transaction"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            
+            # Immediate lock so two processes starting together don't migrate twice
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+                current_version = cursor.fetchone()[0]
+                
+                for version, name, method in self.MIGRATIONS:
+                    if version <= current_version:
+                        continue
+                    getattr(self, method)(cursor)
+                    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                                   (version, name))
+                
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
+    def get_schema_version(self) -> int:
+        """Get the latest applied migration version"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+            return cursor.fetchone()[0]
+    
+    def explain_query_plan(self, query: str, params: Tuple = ()) -> List[str]:
+        """Get the EXPLAIN QUERY PLAN details for a query"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [row[3] for row in cursor.fetchall()]
     
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
-        try:
+        """Context manager for pooled database connections"""
+        with self.pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
     
-    def _initialize_users_table(self):
-        """Create users table if it doesn't exist"""
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool statistics (checkouts, wait time, open connections)"""
+        return self.pool.stats()
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close()
+    
+    def _migrate_baseline_schema(self, cursor: sqlite3.Cursor):
+        """Core tables (same schema as data/generator.py) so a fresh database is usable"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS restaurants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                location TEXT NOT NULL,
+                cuisine TEXT NOT NULL,
+                capacity INTEGER NOT NULL,
+                opening_hours TEXT NOT NULL,
+                rating REAL NOT NULL,
+                price_range TEXT NOT NULL,
+                special_features TEXT NOT NULL,
+                description TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reservations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                restaurant_id INTEGER NOT NULL,
+                user_name TEXT NOT NULL,
+                user_email TEXT,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                party_size INTEGER NOT NULL,
+                status TEXT DEFAULT 'confirmed',
+                special_requests TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (restaurant_id) REFERENCES restaurants (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS availability (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                restaurant_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                seats_available INTEGER NOT NULL,
+                FOREIGN KEY (restaurant_id) REFERENCES restaurants (id),
+                UNIQUE(restaurant_id, date, time)
+            )
+        ''')
+    
+    def _migrate_users_table(self, cursor: sqlite3.Cursor):
+        """Users table and the reservations.user_id link"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password_hash TEXT,
+                full_name TEXT,
+                phone TEXT,
+                google_id TEXT UNIQUE,
+                auth_provider TEXT DEFAULT 'local',
+                profile_picture TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Add user_id column to reservations if it doesn't exist
+        cursor.execute("PRAGMA table_info(reservations)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if 'user_id' not in columns:
+            cursor.execute('ALTER TABLE reservations ADD COLUMN user_id INTEGER')
+    
+    def _migrate_embedding_cache(self, cursor: sqlite3.Cursor):
+        """Restaurant embedding cache keyed by model and content hash"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS restaurant_embeddings (
+                model_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (model_name, content_hash)
+            )
+        ''')
+    
+    def _migrate_catalog_version(self, cursor: sqlite3.Cursor):
+        """Version number that changes whenever the restaurants table changes"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+        
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS restaurants_catalog_{event.lower()}
+                AFTER {event} ON restaurants
+                BEGIN
+                    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+                END
+            ''')
+    
+    def _migrate_query_indexes(self, cursor: sqlite3.Cursor):
+        """Covering and partial indexes for the availability, reservation and analytics queries"""
+        # check_availability / get_available_times read seats without touching the table
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_availability_slot_seats
+            ON availability (restaurant_id, date, time, seats_available)
+        ''')
+        
+        # get_user_reservations: filter and ORDER BY date, time straight from the index
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reservations_user_id_confirmed
+            ON reservations (user_id, date, time) WHERE status = 'confirmed'
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reservations_user_name_confirmed
+            ON reservations (user_name, date, time) WHERE status = 'confirmed'
+        ''')
+        
+        # Confirmed bookings per slot
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reservations_slot_confirmed
+            ON reservations (restaurant_id, date, time) WHERE status = 'confirmed'
+        ''')
+        
+        # get_analytics: totals, busiest times and the cuisine join read only confirmed index entries
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reservations_time_confirmed
+            ON reservations (time, restaurant_id, status) WHERE status = 'confirmed'
+        ''')
+    
+    def _migrate_analytics_rollups(self, cursor: sqlite3.Cursor):
+        """Confirmed-booking counts maintained by triggers, so analytics never scan reservations"""
+        # Rollups keyed directly by a reservations column: (table, key column)
+        column_rollups = [
+            ("analytics_time_counts", "time"),
+            ("analytics_restaurant_counts", "restaurant_id"),
+            ("analytics_daily_counts", "date"),
+        ]
+        
+        for table, key in column_rollups:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {key} {"INTEGER" if key == "restaurant_id" else "TEXT"} PRIMARY KEY,
+                    count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_cuisine_counts (
+                cuisine TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                confirmed_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        for table in ["analytics_time_counts", "analytics_restaurant_counts", "analytics_cuisine_counts"]:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_count ON {table} (count DESC)")
+        
+        # Backfill from existing reservations
+        cursor.execute("INSERT OR REPLACE INTO analytics_totals (id, confirmed_count) "
+                       "SELECT 1, COUNT(*) FROM reservations WHERE status = 'confirmed'")
+        for table, key in column_rollups:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f'''
+                INSERT INTO {table} ({key}, count)
+                SELECT {key}, COUNT(*) FROM reservations
+                WHERE status = 'confirmed' GROUP BY {key}
+            ''')
+        cursor.execute("DELETE FROM analytics_cuisine_counts")
+        cursor.execute('''
+            INSERT INTO analytics_cuisine_counts (cuisine, count)
+            SELECT rest.cuisine, COUNT(*) FROM reservations r
+            JOIN restaurants rest ON r.restaurant_id = rest.id
+            WHERE r.status = 'confirmed' GROUP BY rest.cuisine
+        ''')
+        
+        def add_statements(ref: str, delta: str) -> str:
+            """Statements applying +1/-1 for the NEW or OLD reservation row"""
+            statements = [f"UPDATE analytics_totals SET confirmed_count = confirmed_count {delta} 1 WHERE id = 1;"]
+            for table, key in column_rollups:
+                statements.append(
+                    f"INSERT INTO {table} ({key}, count) VALUES ({ref}.{key}, {delta}1) "
+                    f"ON CONFLICT({key}) DO UPDATE SET count = count {delta} 1;"
+                )
+            statements.append(
+                f"INSERT INTO analytics_cuisine_counts (cuisine, count) "
+                f"SELECT cuisine, {delta}1 FROM restaurants WHERE id = {ref}.restaurant_id "
+                f"ON CONFLICT(cuisine) DO UPDATE SET count = count {delta} 1;"
+            )
+            return "\n".join(statements)
+        
+        cursor.execute("INSERT OR IGNORE INTO analytics_totals (id, confirmed_count) VALUES (1, 0)")
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS reservations_rollup_insert
+            AFTER INSERT ON reservations WHEN NEW.status = 'confirmed'
+            BEGIN
+                {add_statements("NEW", "+")}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS reservations_rollup_delete
+            AFTER DELETE ON reservations WHEN OLD.status = 'confirmed'
+            BEGIN
+                {add_statements("OLD", "-")}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS reservations_rollup_update_old
+            AFTER UPDATE OF status, restaurant_id, date, time ON reservations
+            WHEN OLD.status = 'confirmed'
+            BEGIN
+                {add_statements("OLD", "-")}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS reservations_rollup_update_new
+            AFTER UPDATE OF status, restaurant_id, date, time ON reservations
+            WHEN NEW.status = 'confirmed'
+            BEGIN
+                {add_statements("NEW", "+")}
+            END
+        ''')
+        
+        # Keep cuisine counts equal to the reservations/restaurants join when restaurants change
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_rollup_insert
+            AFTER INSERT ON restaurants
+            BEGIN
+                INSERT INTO analytics_cuisine_counts (cuisine, count)
+                SELECT NEW.cuisine, count FROM analytics_restaurant_counts WHERE restaurant_id = NEW.id
+                ON CONFLICT(cuisine) DO UPDATE SET count = count + excluded.count;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_rollup_delete
+            AFTER DELETE ON restaurants
+            BEGIN
+                UPDATE analytics_cuisine_counts
+                SET count = count - COALESCE((SELECT count FROM analytics_restaurant_counts
+                                              WHERE restaurant_id = OLD.id), 0)
+                WHERE cuisine = OLD.cuisine;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS restaurants_rollup_update
+            AFTER UPDATE OF id, cuisine ON restaurants
+            BEGIN
+                UPDATE analytics_cuisine_counts
+                SET count = count - COALESCE((SELECT count FROM analytics_restaurant_counts
+                                              WHERE restaurant_id = OLD.id), 0)
+                WHERE cuisine = OLD.cuisine;
+                INSERT INTO analytics_cuisine_counts (cuisine, count)
+                SELECT NEW.cuisine, count FROM analytics_restaurant_counts WHERE restaurant_id = NEW.id
+                ON CONFLICT(cuisine) DO UPDATE SET count = count + excluded.count;
+            END
+        ''')
+    
+    def _migrate_availability_version(self, cursor: sqlite3.Cursor):
+        """Version number bumped for every changed availability row (slot inventory staleness check)"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS availability_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO availability_version (id, version) VALUES (1, 0)")
+        
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS availability_version_{event.lower()}
+                AFTER {event} ON availability
+                BEGIN
+                    UPDATE availability_version SET version = version + 1 WHERE id = 1;
+                END
+            ''')
+    
+    def _migrate_reservation_duration(self, cursor: sqlite3.Cursor):
+        """reservations.duration_minutes; existing bookings only ever held their own slot"""
+        cursor.execute("PRAGMA table_info(reservations)")
+        columns = [col[1] for col in cursor.fetchall()]
+        if 'duration_minutes' not in columns:
+            cursor.execute(f"ALTER TABLE reservations ADD COLUMN duration_minutes INTEGER NOT NULL "
+                           f"DEFAULT {SLOT_MINUTES}")
+    
+    def _migrate_idempotency_keys(self, cursor: sqlite3.Cursor):
+        """Responses of keyed write requests, so a retried request gets the first outcome"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                request TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created
+            ON idempotency_keys(created_at)
+        ''')
+    
+    def get_catalog_version(self) -> int:
+        """Get the restaurants table version (bumped by triggers on every change)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+            row = cursor.fetchone()
+            return row[0] if row else 0
+    
+    def get_cached_embeddings(self, model_name: str) -> Dict[str, bytes]:
+        """Get cached embedding vectors for a model, keyed by content hash"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT,
-                    full_name TEXT,
-                    phone TEXT,
-                    google_id TEXT UNIQUE,
-                    auth_provider TEXT DEFAULT 'local',
-                    profile_picture TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                SELECT content_hash, vector FROM restaurant_embeddings
+                WHERE model_name = ?
+            ''', (model_name,))
+            return {row[0]: row[1] for row in cursor.fetchall()}
+    
+    def save_cached_embeddings(self, model_name: str, entries: List[Tuple[str, int, bytes]],
+                               keep_hashes: Optional[List[str]] = None):
+        """Store (content_hash, dim, vector) entries and optionally prune stale ones"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO restaurant_embeddings (model_name, content_hash, dim, vector)
+                VALUES (?, ?, ?, ?)
+            ''', [(model_name, content_hash, dim, vector) for content_hash, dim, vector in entries])
             
-            # Add user_id column to reservations if it doesn't exist
-            cursor.execute("PRAGMA table_info(reservations)")
-            columns = [col[1] for col in cursor.fetchall()]
-            if 'user_id' not in columns:
-                cursor.execute('ALTER TABLE reservations ADD COLUMN user_id INTEGER')
+            if keep_hashes is not None:
+                # Drop vectors for restaurants that changed or no longer exist
+                cursor.execute("SELECT content_hash FROM restaurant_embeddings WHERE model_name = ?",
+                               (model_name,))
+                keep = set(keep_hashes)
+                stale = [(model_name, row[0]) for row in cursor.fetchall() if row[0] not in keep]
+                cursor.executemany(
+                    "DELETE FROM restaurant_embeddings WHERE model_name = ? AND content_hash = ?",
+                    stale
+                )
             
             conn.commit()
     
@@ -257,152 +699,487 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
     
-    def check_availability(self, restaurant_id: int, date: str, time: str, party_size: int) -> Dict:
-        """Check if restaurant has availability for given parameters"""
+    def check_availability(self, restaurant_id: int, date: str, time: str, party_size: int,
+                           duration_minutes: int = DEFAULT_DURATION_MINUTES) -> Dict:
+        """
+        Check if restaurant has availability for given parameters
+        
+        A table is available when every slot from `time` for duration_minutes
+        has party_size seats; seats_available is the fewest free in any of them.
+        """
+        slots = slot_count(duration_minutes)
+        seats_available = self.inventory.seats_at(restaurant_id, date, time, slots) if self.inventory else None
+        
+        if seats_available is None:
+            # Outside the inventory horizon (or no inventory): ask SQLite
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT MIN(seats_available), MAX(time = ?) FROM availability
+                    WHERE restaurant_id = ? AND date = ? AND time >= ? AND time < ?
+                ''', (time, restaurant_id, date, time, window_end(time, duration_minutes)))
+                
+                row = cursor.fetchone()
+                seats_available = row[0] if row and row[1] == 1 else NO_SLOT
+        
+        return self._availability_result(restaurant_id, date, time, party_size, seats_available)
+    
+    def _availability_result(self, restaurant_id: int, date: str, time: str, party_size: int,
+                             seats_available: int) -> Dict:
+        """check_availability result for a slot's seat count (NO_SLOT if the slot doesn't exist)"""
+        if seats_available == NO_SLOT:
+            return {"available": False, "reason": "No slots for this time"}
+        
+        if seats_available >= party_size:
+            return {
+                "available": True,
+                "seats_available": seats_available,
+                "restaurant_id": restaurant_id,
+                "date": date,
+                "time": time
+            }
+        else:
+            return {
+                "available": False,
+                "reason": f"Only {seats_available} seats available, need {party_size}",
+                "seats_available": seats_available
+            }
+    
+    def check_availability_bulk(self, restaurant_ids: List[int], date: str, time: str, party_size: int,
+                                duration_minutes: int = DEFAULT_DURATION_MINUTES) -> Dict[int, Dict]:
+        """Check availability for many restaurants in one query, keyed by restaurant_id"""
+        restaurant_ids = list(dict.fromkeys(int(r) for r in restaurant_ids))
+        if not restaurant_ids:
+            return {}
+        
+        slots = slot_count(duration_minutes)
+        seats_by_restaurant = (self.inventory.seats_for(restaurant_ids, date, time, slots)
+                               if self.inventory else None)
+        
+        if seats_by_restaurant is None:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                placeholders = ", ".join("?" * len(restaurant_ids))
+                cursor.execute(f'''
+                    SELECT restaurant_id, MIN(seats_available) FROM availability
+                    WHERE date = ? AND time >= ? AND time < ? AND restaurant_id IN ({placeholders})
+                    GROUP BY restaurant_id
+                    HAVING MAX(time = ?) = 1
+                ''', [date, time, window_end(time, duration_minutes)] + restaurant_ids + [time])
+                
+                seats_by_restaurant = {row[0]: row[1] for row in cursor.fetchall()}
+        
+        # Same result shape as check_availability for each restaurant
+        return {
+            restaurant_id: self._availability_result(
+                restaurant_id, date, time, party_size, seats_by_restaurant.get(restaurant_id, NO_SLOT))
+            for restaurant_id in restaurant_ids
+        }
+    
+    def get_restaurants_with_availability(self, date: str, time: str, party_size: int,
+                                          duration_minutes: int = DEFAULT_DURATION_MINUTES) -> List[int]:
+        """Ids of all restaurants with at least party_size seats free for the whole booking window"""
+        slots = slot_count(duration_minutes)
+        restaurant_ids = (self.inventory.restaurants_with_seats(date, time, party_size, slots)
+                          if self.inventory else None)
+        if restaurant_ids is not None:
+            return restaurant_ids
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
             cursor.execute('''
-                SELECT seats_available FROM availability
-                WHERE restaurant_id = ? AND date = ? AND time = ?
-            ''', (restaurant_id, date, time))
-            
-            row = cursor.fetchone()
-            
-            if not row:
-                return {"available": False, "reason": "No slots for this time"}
-            
-            seats_available = row[0]
-            
-            if seats_available >= party_size:
-                return {
-                    "available": True,
-                    "seats_available": seats_available,
-                    "restaurant_id": restaurant_id,
-                    "date": date,
-                    "time": time
-                }
-            else:
-                return {
-                    "available": False,
-                    "reason": f"Only {seats_available} seats available, need {party_size}",
-                    "seats_available": seats_available
-                }
+                SELECT restaurant_id FROM availability
+                WHERE date = ? AND time >= ? AND time < ?
+                GROUP BY restaurant_id
+                HAVING MAX(time = ?) = 1 AND MIN(seats_available) >= ?
+                ORDER BY restaurant_id
+            ''', (date, time, window_end(time, duration_minutes), time, party_size))
+            return [row[0] for row in cursor.fetchall()]
     
     def create_reservation(self, restaurant_id: int, user_name: str, date: str, 
                           time: str, party_size: int, user_id: Optional[int] = None,
                           user_email: Optional[str] = None,
-                          special_requests: Optional[str] = None) -> Dict:
-        """Create a new reservation with concurrent booking prevention"""
-        with self.get_connection() as conn:
+                          special_requests: Optional[str] = None,
+                          duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                          idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Create a new reservation with concurrent booking prevention
+        
+        The booking holds party_size seats in every slot from `time` for
+        duration_minutes, so later arrivals can't be seated at the same table.
+        With an idempotency_key, a retry after a successful booking gets the
+        same confirmation (with "replayed": True) instead of a second booking.
+        """
+        slots = slot_count(duration_minutes)
+        end = window_end(time, duration_minutes)
+        request = f"create_reservation:{json.dumps([restaurant_id, user_name, date, time, party_size, duration_minutes])}"
+        self._purge_idempotency_keys_if_due()
+        # Looked up before taking the writer lock, since it may reload the inventory
+        restaurant_name = self.get_restaurant_name(restaurant_id)
+        
+        # Writers wait for the lock before taking a pooled connection, so queued
+        # bookings don't hold connections that readers need
+        with self._write_lock, self.get_connection() as conn:
             cursor = conn.cursor()
             
             # CRITICAL: Use transaction with immediate lock to prevent race conditions
             cursor.execute("BEGIN IMMEDIATE")
             
             try:
-                # Check availability with lock (prevents double booking)
-                cursor.execute('''
-                    SELECT seats_available FROM availability
-                    WHERE restaurant_id = ? AND date = ? AND time = ?
-                ''', (restaurant_id, date, time))
-                
-                row = cursor.fetchone()
+                if idempotency_key is not None:
+                    stored = self._stored_response(cursor, idempotency_key, request)
+                    if stored is not None:
+                        conn.rollback()
+                        return stored
                 
-                if not row:
-                    conn.rollback()
-                    return {"success": False, "error": "No availability slots for this time"}
-                
-                seats_available = row[0]
+                # Take the seats only if every slot of the window has them: one
+                # conditional statement instead of read-check-write under the lock
+                cursor.execute('''
+                    UPDATE availability 
+                    SET seats_available = seats_available - ?
+                    WHERE restaurant_id = ? AND date = ? AND time >= ? AND time < ?
+                      AND (SELECT MIN(seats_available) >= ? AND MAX(time = ?) = 1
+                           FROM availability
+                           WHERE restaurant_id = ? AND date = ? AND time >= ? AND time < ?)
+                ''', (party_size, restaurant_id, date, time, end,
+                      party_size, time, restaurant_id, date, time, end))
                 
-                # Check if enough seats (with lock held)
-                if seats_available < party_size:
+                # changes() == 0: the slot doesn't exist or lacks seats somewhere in the window
+                rows_changed = cursor.rowcount
+                if rows_changed == 0:
                     conn.rollback()
-                    return {
-                        "success": False, 
-                        "error": f"Only {seats_available} seats available, need {party_size}"
+                    response = None
+                else:
+                    # Create reservation
+                    cursor.execute('''
+                        INSERT INTO reservations 
+                        (restaurant_id, user_id, user_name, user_email, date, time, party_size, status,
+                         special_requests, duration_minutes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, 'confirmed', ?, ?)
+                    ''', (restaurant_id, user_id, user_name, user_email, date, time, party_size,
+                          special_requests, duration_minutes))
+                    
+                    reservation_id = cursor.lastrowid
+                    version = self._availability_version(cursor)
+                    response = {
+                        "success": True,
+                        "reservation_id": reservation_id,
+                        "confirmation_code": f"GF-{reservation_id:04d}",
+                        "restaurant_name": restaurant_name,
+                        "date": date,
+                        "time": time,
+                        "party_size": party_size,
+                        "duration_minutes": duration_minutes
                     }
+                    # Only confirmations are stored: a rejected booking may succeed on retry
+                    if idempotency_key is not None:
+                        self._store_response(cursor, idempotency_key, request, response)
+                    
+                    # Commit transaction (releases lock)
+                    conn.commit()
                 
-                # Create reservation
-                cursor.execute('''
-                    INSERT INTO reservations 
-                    (restaurant_id, user_id, user_name, user_email, date, time, party_size, status, special_requests)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, 'confirmed', ?)
-                ''', (restaurant_id, user_id, user_name, user_email, date, time, party_size, special_requests))
+            except Exception as e:
+                conn.rollback()
+                return {
+                    "success": False,
+                    "error": f"Booking failed: {str(e)}"
+                }
+            
+            # Write through once the change is durable; still under the writer lock
+            # so deltas reach the inventory in commit order
+            if response is not None and self.inventory:
+                self.inventory.apply_delta(restaurant_id, date, time, -party_size, version,
+                                           rows_changed, slots)
+        
+        if response is None:
+            # Explained outside the writer lock: the read may reload the inventory
+            return self._booking_rejection(restaurant_id, date, time, party_size, duration_minutes)
+        return response
+    
+    def _booking_rejection(self, restaurant_id: int, date: str, time: str, party_size: int,
+                           duration_minutes: int) -> Dict:
+        """Explain why a conditional booking update changed nothing (read after the lock is released)"""
+        availability = self.check_availability(restaurant_id, date, time, party_size, duration_minutes)
+        if availability.get("available"):
+            # Another booking or cancellation moved the count between the update and this read
+            return {"success": False, "error": "Seats changed while booking, please try again"}
+        if "seats_available" not in availability:
+            return {"success": False, "error": "No availability slots for this time"}
+        return {"success": False, "error": availability["reason"]}
+    
+    def get_restaurant_name(self, restaurant_id: int) -> Optional[str]:
+        """Restaurant name, from the inventory's cache when available"""
+        name = self.inventory.restaurant_name(restaurant_id) if self.inventory else None
+        if name is None:
+            restaurant = self.get_restaurant_by_id(restaurant_id)
+            name = restaurant['name'] if restaurant else None
+        return name
+    
+    def cancel_reservation(self, reservation_id: int, idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Cancel a reservation and restore availability in one transaction
+        
+        Only a confirmed reservation is cancelled, so concurrent or repeated
+        cancels restore its seats once. With an idempotency_key, a retry after a
+        successful cancel gets its response instead of "already cancelled".
+        """
+        result = self.cancel_reservations([reservation_id], idempotency_key)
+        if not result["success"]:
+            return result
+        if result["cancelled"]:
+            response = {
+                "success": True,
+                "reservation_id": reservation_id,
+                "message": "Reservation cancelled successfully"
+            }
+        elif result["already_cancelled"]:
+            response = {"success": False, "error": "Reservation already cancelled"}
+        else:
+            response = {"success": False, "error": "Reservation not found"}
+        if result.get("replayed"):
+            response["replayed"] = True
+        return response
+    
+    def cancel_reservations(self, reservation_ids: List[int], idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Cancel many reservations in one transaction (e.g. when a restaurant closes)
+        
+        Args:
+            reservation_ids: Reservations to cancel; unknown or already cancelled ids are reported, not errors
+            idempotency_key: Optional client key; once a call with it has cancelled
+                something, a retry with the same key and ids returns that response
+                (with "replayed": True) without running again
+        
+        Returns:
+            Dict with cancelled, already_cancelled and not_found id lists
+        """
+        ids = list(dict.fromkeys(int(i) for i in reservation_ids))
+        request = f"cancel_reservations:{json.dumps(sorted(ids))}"
+        self._purge_idempotency_keys_if_due()
+        
+        with self._write_lock, self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            try:
+                if idempotency_key is not None:
+                    stored = self._stored_response(cursor, idempotency_key, request)
+                    if stored is not None:
+                        conn.rollback()
+                        return stored
                 
-                reservation_id = cursor.lastrowid
+                # Guarded status change: only rows that were still confirmed come back,
+                # and only those have seats restored
+                cancelled = []
+                for start in range(0, len(ids), CANCEL_BATCH_SIZE):
+                    batch = ids[start:start + CANCEL_BATCH_SIZE]
+                    placeholders = ", ".join("?" * len(batch))
+                    cursor.execute(f'''
+                        UPDATE reservations SET status = 'cancelled'
+                        WHERE status = 'confirmed' AND id IN ({placeholders})
+                        RETURNING id, restaurant_id, date, time, party_size, duration_minutes
+                    ''', batch)
+                    cancelled.extend(cursor.fetchall())
                 
-                # Update availability atomically
-                cursor.execute('''
-                    UPDATE availability 
-                    SET seats_available = seats_available - ?
-                    WHERE restaurant_id = ? AND date = ? AND time = ?
-                ''', (party_size, restaurant_id, date, time))
+                cancelled_ids = {row[0] for row in cancelled}
+                existing = set()
+                unchanged = [i for i in ids if i not in cancelled_ids]
+                for start in range(0, len(unchanged), CANCEL_BATCH_SIZE):
+                    batch = unchanged[start:start + CANCEL_BATCH_SIZE]
+                    placeholders = ", ".join("?" * len(batch))
+                    cursor.execute(f"SELECT id FROM reservations WHERE id IN ({placeholders})", batch)
+                    existing.update(row[0] for row in cursor.fetchall())
                 
-                # Commit transaction (releases lock)
-                    # Commit transaction (releases lock)
-                conn.commit()
+                # One range update per booked window, however many reservations share it
+                restores = {}
+                for _, restaurant_id, date, time, party_size, duration_minutes in cancelled:
+                    key = (restaurant_id, date, time, duration_minutes)
+                    restores[key] = restores.get(key, 0) + party_size
                 
-                # Get restaurant details
-                restaurant = self.get_restaurant_by_id(restaurant_id)
+                changes = []
+                for (restaurant_id, date, time, duration_minutes), seats in sorted(restores.items()):
+                    cursor.execute('''
+                        UPDATE availability 
+                        SET seats_available = seats_available + ?
+                        WHERE restaurant_id = ? AND date = ? AND time >= ? AND time < ?
+                    ''', (seats, restaurant_id, date, time, window_end(time, duration_minutes)))
+                    rows_changed = cursor.rowcount
+                    changes.append((restaurant_id, date, time, seats, self._availability_version(cursor),
+                                    rows_changed, slot_count(duration_minutes)))
                 
-                return {
+                response = {
                     "success": True,
-                    "reservation_id": reservation_id,
-                    "confirmation_code": f"GF-{reservation_id:04d}",
-                    "restaurant_name": restaurant['name'],
-                    "date": date,
-                    "time": time,
-                    "party_size": party_size
+                    "cancelled": [i for i in ids if i in cancelled_ids],
+                    "already_cancelled": [i for i in ids if i in existing],
+                    "not_found": [i for i in ids if i not in cancelled_ids and i not in existing]
                 }
+                # Only a call that cancelled something is recorded; one that found nothing
+                # to cancel changed nothing, so a retry may as well run again
+                if idempotency_key is not None and cancelled:
+                    self._store_response(cursor, idempotency_key, request, response)
+                
+                conn.commit()
                 
             except Exception as e:
                 conn.rollback()
                 return {
                     "success": False,
-                    "error": f"Booking failed: {str(e)}"
+                    "error": f"Cancellation failed: {str(e)}"
                 }
+            
+            # Write through in commit order, as in create_reservation
+            if self.inventory:
+                for change in changes:
+                    self.inventory.apply_delta(*change)
+        
+        return response
+    
+    def _stored_response(self, cursor: sqlite3.Cursor, idempotency_key: str, request: str) -> Optional[Dict]:
+        """Response recorded for an idempotency key (None if the key is new)"""
+        cursor.execute("SELECT request, response FROM idempotency_keys WHERE key = ?", (idempotency_key,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        if row[0] != request:
+            return {"success": False, "error": "Idempotency key was already used for a different request"}
+        response = json.loads(row[1])
+        response["replayed"] = True
+        return response
+    
+    def _store_response(self, cursor: sqlite3.Cursor, idempotency_key: str, request: str, response: Dict):
+        """Record a keyed request's response in the caller's transaction"""
+        cursor.execute('''
+            INSERT INTO idempotency_keys (key, request, response) VALUES (?, ?, ?)
+        ''', (idempotency_key, request, json.dumps(response)))
+    
+    def purge_idempotency_keys(self, max_age_seconds: float = IDEMPOTENCY_KEY_TTL) -> int:
+        """Forget idempotency keys older than max_age_seconds; returns how many"""
+        with self._write_lock, self.get_connection() as conn:
+            cursor = conn.execute("DELETE FROM idempotency_keys WHERE created_at < datetime('now', ?)",
+                                  (f"-{int(max_age_seconds)} seconds",))
+            conn.commit()
+            return cursor.rowcount
+    
+    def _purge_idempotency_keys_if_due(self):
+        """Purge expired idempotency keys from the write paths, at most once per IDEMPOTENCY_PURGE_INTERVAL"""
+        now = time_module.monotonic()
+        if self._idempotency_purged_at is not None and now - self._idempotency_purged_at < IDEMPOTENCY_PURGE_INTERVAL:
+            return
+        self._idempotency_purged_at = now
+        try:
+            self.purge_idempotency_keys()
+        except sqlite3.Error:
+            pass  # opportunistic; the next interval tries again
     
-    def cancel_reservation(self, reservation_id: int) -> Dict:
-        """Cancel a reservation and restore availability"""
+    def find_alternative_slots(self, restaurant_id: int, date: str, time: str, party_size: int,
+                               duration_minutes: int = DEFAULT_DURATION_MINUTES, max_slot_distance: int = 4,
+                               limit: int = 5) -> List[Dict]:
+        """
+        Nearest bookable alternatives to a request, at this restaurant or a
+        same-cuisine / same-location one, ranked by slot distance plus
+        ALTERNATIVE_PENALTIES (ties: closer in time, higher rating)
+        
+        Args:
+            max_slot_distance: How many half-hour slots earlier or later to search
+            limit: Number of alternatives to return
+        
+        Returns:
+            Dicts with restaurant_id, restaurant_name, cuisine, location, rating,
+            time, seats_available, slot_distance and score, best first
+        """
+        restaurant = self.get_restaurant_by_id(restaurant_id)
+        if not restaurant:
+            return []
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Get reservation details
-            cursor.execute('''
-                SELECT restaurant_id, date, time, party_size, status
-                FROM reservations WHERE id = ?
-            ''', (reservation_id,))
-            
-            row = cursor.fetchone()
-            if not row:
-                return {"success": False, "error": "Reservation not found"}
-            
-            restaurant_id, date, time, party_size, status = row
-            
-            if status == 'cancelled':
-                return {"success": False, "error": "Reservation already cancelled"}
-            
-            # Update reservation status
             cursor.execute('''
-                UPDATE reservations SET status = 'cancelled'
-                WHERE id = ?
-            ''', (reservation_id,))
-            
-            # Restore availability
-            cursor.execute('''
-                UPDATE availability 
-                SET seats_available = seats_available + ?
-                WHERE restaurant_id = ? AND date = ? AND time = ?
-            ''', (party_size, restaurant_id, date, time))
-            
-            conn.commit()
+                SELECT id, name, cuisine, location, rating FROM restaurants
+                WHERE id = ? OR cuisine = ? OR location = ?
+            ''', (restaurant_id, restaurant['cuisine'], restaurant['location']))
+            neighbours = {row[0]: dict(row) for row in cursor.fetchall()}
+        
+        candidates = []
+        for neighbour_id, neighbour in neighbours.items():
+            same_cuisine = neighbour['cuisine'] == restaurant['cuisine']
+            same_location = neighbour['location'] == restaurant['location']
+            if neighbour_id == restaurant_id:
+                penalty = ALTERNATIVE_PENALTIES["same_restaurant"]
+            elif same_cuisine and same_location:
+                penalty = ALTERNATIVE_PENALTIES["same_cuisine_and_location"]
+            elif same_location:
+                penalty = ALTERNATIVE_PENALTIES["same_location"]
+            else:
+                penalty = ALTERNATIVE_PENALTIES["same_cuisine"]
+            candidates.append((neighbour_id, penalty, neighbour['rating']))
+        
+        slots = slot_count(duration_minutes)
+        alternatives = (self.inventory.nearest_windows(candidates, date, time, party_size, slots,
+                                                       max_slot_distance, limit)
+                        if self.inventory else None)
+        if alternatives is None:
+            alternatives = self._nearest_windows_sql(candidates, date, time, party_size, slots,
+                                                     max_slot_distance, limit)
+        
+        for alternative in alternatives:
+            neighbour = neighbours[alternative['restaurant_id']]
+            alternative.update(restaurant_name=neighbour['name'], cuisine=neighbour['cuisine'],
+                               location=neighbour['location'], rating=neighbour['rating'])
+        return alternatives
+    
+    def _nearest_windows_sql(self, candidates: List[Tuple[int, float, float]], date: str, time: str,
+                             party_size: int, slots: int, max_slot_distance: int, limit: int) -> List[Dict]:
+        """SlotInventory.nearest_windows as one query (dates outside the inventory horizon)"""
+        hours, minutes = (int(part) for part in time.split(":")[:2])
+        requested = hours * 60 + minutes
+        values = ", ".join("(?, ?, ?)" for _ in candidates)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Window seats for every candidate's every start time in one pass, then
+            # keep those within reach and rank by slot distance plus penalty
+            cursor.execute(f'''
+                WITH candidates (restaurant_id, penalty, rating) AS (VALUES {values}),
+                slots AS (
+                    SELECT a.restaurant_id, a.time, a.seats_available, c.penalty, c.rating,
+                           CAST(substr(a.time, 1, 2) AS INTEGER) * 60
+                           + CAST(substr(a.time, 4, 2) AS INTEGER) AS minute
+                    FROM availability a
+                    JOIN candidates c ON c.restaurant_id = a.restaurant_id
+                    WHERE a.date = ?
+                ),
+                windows AS (
+                    SELECT restaurant_id, time, penalty, rating,
+                           (ABS(minute - ?) + {SLOT_MINUTES // 2}) / {SLOT_MINUTES} AS slot_distance,
+                           MIN(seats_available) OVER (
+                               PARTITION BY restaurant_id ORDER BY minute
+                               RANGE BETWEEN CURRENT ROW AND ? FOLLOWING
+                           ) AS window_seats
+                    FROM slots
+                )
+                SELECT restaurant_id, time, window_seats, slot_distance, slot_distance + penalty AS score
+                FROM windows
+                WHERE window_seats >= ? AND slot_distance <= ?
+                ORDER BY score, slot_distance, rating DESC, restaurant_id, time
+                LIMIT ?
+            ''', [value for candidate in candidates for value in candidate]
+                + [date, requested, slots * SLOT_MINUTES - 1, party_size, max_slot_distance, limit])
             
-            return {
-                "success": True,
-                "reservation_id": reservation_id,
-                "message": "Reservation cancelled successfully"
-            }
+            return [{
+                "restaurant_id": row[0],
+                "time": row[1],
+                "seats_available": row[2],
+                "slot_distance": row[3],
+                "score": float(row[4])
+            } for row in cursor.fetchall()]
+    
+    def _availability_version(self, cursor: sqlite3.Cursor) -> int:
+        """availability_version as seen inside the caller's transaction"""
+        cursor.execute("SELECT version FROM availability_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row[0] if row else 0
     
     def get_user_reservations(self, user_name: str = None, user_id: int = None) -> List[Dict]:
         """Get all reservations for a user (by name or ID)"""
@@ -429,36 +1206,53 @@ class DatabaseManager:
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
-    def get_available_times(self, restaurant_id: int, date: str, party_size: int) -> List[str]:
-        """Get all available time slots for a restaurant on a given date"""
+    def get_available_times(self, restaurant_id: int, date: str, party_size: int,
+                            duration_minutes: int = DEFAULT_DURATION_MINUTES) -> List[str]:
+        """Get all start times on a date where party_size seats are free for duration_minutes"""
+        slots = slot_count(duration_minutes)
+        times = (self.inventory.available_times(restaurant_id, date, party_size, slots)
+                 if self.inventory else None)
+        if times is not None:
+            return times
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # One pass over the day: a window function takes the minimum seats over
+            # the slots each start time's booking would cover (by clock time, so
+            # missing slots count as closed rather than shifting the window)
             cursor.execute('''
-                SELECT time, seats_available FROM availability
-                WHERE restaurant_id = ? AND date = ? AND seats_available >= ?
+                SELECT time FROM (
+                    SELECT time,
+                           MIN(seats_available) OVER (
+                               ORDER BY CAST(substr(time, 1, 2) AS INTEGER) * 60
+                                        + CAST(substr(time, 4, 2) AS INTEGER)
+                               RANGE BETWEEN CURRENT ROW AND ? FOLLOWING
+                           ) AS window_seats
+                    FROM availability
+                    WHERE restaurant_id = ? AND date = ?
+                )
+                WHERE window_seats >= ?
                 ORDER BY time
-            ''', (restaurant_id, date, party_size))
+            ''', (slots * SLOT_MINUTES - 1, restaurant_id, date, party_size))
             
             rows = cursor.fetchall()
             return [row[0] for row in rows]
     
     def get_analytics(self) -> Dict:
-        """Get booking analytics"""
+        """Get booking analytics from the trigger-maintained rollup tables"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # Total reservations
-            cursor.execute("SELECT COUNT(*) FROM reservations WHERE status = 'confirmed'")
-            total_reservations = cursor.fetchone()[0]
+            cursor.execute("SELECT confirmed_count FROM analytics_totals WHERE id = 1")
+            row = cursor.fetchone()
+            total_reservations = row[0] if row else 0
             
             # Popular cuisines
             cursor.execute('''
-                SELECT rest.cuisine, COUNT(*) as count
-                FROM reservations r
-                JOIN restaurants rest ON r.restaurant_id = rest.id
-                WHERE r.status = 'confirmed'
-                GROUP BY rest.cuisine
+                SELECT cuisine, count FROM analytics_cuisine_counts
+                WHERE count > 0
                 ORDER BY count DESC
                 LIMIT 5
             ''')
@@ -466,17 +1260,42 @@ class DatabaseManager:
             
             # Busiest times
             cursor.execute('''
-                SELECT time, COUNT(*) as count
-                FROM reservations
-                WHERE status = 'confirmed'
-                GROUP BY time
+                SELECT time, count FROM analytics_time_counts
+                WHERE count > 0
                 ORDER BY count DESC
                 LIMIT 5
             ''')
             busiest_times = [{"time": row[0], "count": row[1]} for row in cursor.fetchall()]
             
+            # Popular restaurants
+            cursor.execute('''
+                SELECT c.restaurant_id, rest.name, rest.cuisine, rest.location, c.count
+                FROM analytics_restaurant_counts c
+                JOIN restaurants rest ON c.restaurant_id = rest.id
+                WHERE c.count > 0
+                ORDER BY c.count DESC
+                LIMIT 5
+            ''')
+            popular_restaurants = [
+                {"restaurant_id": row[0], "name": row[1], "cuisine": row[2],
+                 "location": row[3], "count": row[4]}
+                for row in cursor.fetchall()
+            ]
+            
             return {
                 "total_reservations": total_reservations,
                 "popular_cuisines": popular_cuisines,
-                "busiest_times": busiest_times
+                "busiest_times": busiest_times,
+                "popular_restaurants": popular_restaurants
             }
+    
+    def get_daily_bookings(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict]:
+        """Get confirmed bookings per day (YYYY-MM-DD) within an optional date range"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT date, count FROM analytics_daily_counts
+                WHERE date >= ? AND date <= ? AND count > 0
+                ORDER BY date
+            ''', (date_from or "0000-00-00", date_to or "9999-99-99"))
+            return [{"date": row[0], "count": row[1]} for row in cursor.fetchall()]
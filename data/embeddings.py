@@ -4,34 +4,140 @@ Pre-compute and cache restaurant embeddings for semantic search
 """
 
 import json
+import hashlib
+import os
+import threading
 import numpy as np
-from typing import List, Dict
-from data.db_manager import DatabaseManager
+from typing import List, Dict, Optional
+from data.db_manager import DatabaseManager, get_database_manager
+from data.ann_index import IVFIndex
+from data.filter_index import RestaurantFilterIndex
 
 # Try to import sentence transformers, fallback to keyword search if not available
 try:
     from sentence_transformers import SentenceTransformer
-    from sklearn.metrics.pairwise import cosine_similarity
     EMBEDDINGS_AVAILABLE = True
 except (ImportError, OSError) as e:
     print(f"⚠️ Embeddings not available: {e}")
     print("📝 Using keyword-based search instead")
     EMBEDDINGS_AVAILABLE = False
 
-class EmbeddingManager:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.db = DatabaseManager()
-        self.restaurant_embeddings = {}
-        self.restaurants_cache = []
-        self.use_embeddings = EMBEDDINGS_AVAILABLE
-        
-        if self.use_embeddings:
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Catalogue size at which hybrid search switches from exact to approximate scoring;
+# below it IVF at n_probe=32 is no faster than the exact scan (ann_recall_benchmark)
+DEFAULT_ANN_THRESHOLD = 20000
+
+# Models are loaded once per process and shared by every EmbeddingManager
+_model_lock = threading.Lock()
+_models = {}
+
+# Managers (and their restaurant vectors) are shared by every orchestrator
+_manager_lock = threading.Lock()
+_managers = {}
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME):
+    """Load a SentenceTransformer model once per process (None if unavailable)"""
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    
+    with _model_lock:
+        if model_name not in _models:
             try:
-                self.model = SentenceTransformer(model_name)
+                _models[model_name] = SentenceTransformer(model_name)
             except Exception as e:
                 print(f"⚠️ Failed to load embedding model: {e}")
                 print("📝 Falling back to keyword search")
+                _models[model_name] = None
+        return _models[model_name]
+
+def get_embedding_manager(model_name: str = DEFAULT_MODEL_NAME,
+                          db: Optional[DatabaseManager] = None) -> "EmbeddingManager":
+    """Get the process-wide EmbeddingManager for a model and database"""
+    db = db or get_database_manager()
+    key = (model_name, os.path.abspath(db.db_path))
+    with _manager_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = EmbeddingManager(model_name=model_name, db=db)
+            _managers[key] = manager
+        return manager
+
+class _SearchIndex:
+    """One published version of the search data, replaced whole and never modified"""
+    
+    __slots__ = ("restaurants", "matrix", "restaurant_ids", "filter_index", "ann")
+    
+    def __init__(self, restaurants: List[Dict], matrix: np.ndarray, ann: Optional[IVFIndex] = None):
+        self.restaurants = restaurants
+        # Pre-normalised vectors, one row per entry in restaurants
+        self.matrix = matrix
+        self.restaurant_ids = np.array([r['id'] for r in restaurants], dtype=np.int64)
+        self.filter_index = RestaurantFilterIndex(restaurants)
+        self.ann = ann  # built over matrix, or None below the ANN threshold
+
+class EmbeddingManager:
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, db: Optional[DatabaseManager] = None,
+                 ann_threshold: int = DEFAULT_ANN_THRESHOLD, ann_index: Optional[IVFIndex] = None):
+        self.db = db or get_database_manager()
+        self.model_name = model_name
+        self.model = None
+        # Readers take this reference once per search; writers replace it in one assignment
+        self._index = _SearchIndex([], np.zeros((0, 0), dtype=np.float32))
+        self._catalog_version = None
+        # Approximate index settings; a copy is built once the catalogue reaches ann_threshold
+        self.ann_threshold = ann_threshold
+        self._ann_settings = ann_index or IVFIndex()
+        self.use_embeddings = EMBEDDINGS_AVAILABLE
+        self._index_ready = False
+        self._index_lock = threading.RLock()
+    
+    @property
+    def restaurants_cache(self) -> List[Dict]:
+        return self._index.restaurants
+    
+    @property
+    def embedding_matrix(self) -> np.ndarray:
+        return self._index.matrix
+    
+    @property
+    def restaurant_ids(self) -> np.ndarray:
+        return self._index.restaurant_ids
+    
+    @property
+    def filter_index(self) -> RestaurantFilterIndex:
+        return self._index.filter_index
+    
+    @property
+    def ann_index(self) -> Optional[IVFIndex]:
+        return self._index.ann
+    
+    def _ensure_model(self) -> bool:
+        """Load the shared model on first use; returns False if embeddings are unavailable"""
+        if self.use_embeddings and self.model is None:
+            self.model = get_embedding_model(self.model_name)
+            if self.model is None:
                 self.use_embeddings = False
+        return self.use_embeddings
+    
+    def ensure_index(self):
+        """Compute restaurant embeddings once, and again whenever the restaurants table changes"""
+        version = self.db.get_catalog_version()
+        if self._index_ready and version == self._catalog_version:
+            return
+        with self._index_lock:
+            if self._index_ready and version == self._catalog_version:
+                return
+            
+            old = self.restaurants_cache
+            restaurants = self.db.get_restaurants()
+            if self._index_ready and restaurants[:len(old)] == old:
+                # Only new restaurants were appended; extend the index instead of rebuilding it
+                if len(restaurants) > len(old):
+                    self._append_restaurants(restaurants[len(old):])
+            else:
+                self.compute_embeddings(restaurants)
+            self._catalog_version = version
     
     def generate_restaurant_text(self, restaurant: Dict) -> str:
         """Generate text representation of restaurant for embedding"""
@@ -44,36 +150,126 @@ class EmbeddingManager:
         
         return text
     
-    def compute_embeddings(self):
-        """Compute embeddings for all restaurants"""
-        restaurants = self.db.get_restaurants()
-        self.restaurants_cache = restaurants
+    def content_hash(self, text: str) -> str:
+        """Cache key for a restaurant text under the current model"""
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+    
+    def _load_vectors(self, restaurants: List[Dict], prune: bool = False) -> Optional[List[np.ndarray]]:
+        """Get vectors from the cache, encoding only new or changed restaurants (None if no model)"""
+        texts = [self.generate_restaurant_text(r) for r in restaurants]
+        hashes = [self.content_hash(text) for text in texts]
+        cached = self.db.get_cached_embeddings(self.model_name)
         
-        if not self.use_embeddings:
-            print("📝 Using keyword-based search (embeddings not available)")
+        vectors = [None] * len(restaurants)
+        missing = []
+        for i in range(len(restaurants)):
+            vector = cached.get(hashes[i])
+            if vector is not None:
+                vectors[i] = np.frombuffer(vector, dtype=np.float32)
+            else:
+                missing.append(i)
+        
+        if missing:
+            # The model is only needed when something has to be encoded
+            if not self._ensure_model():
+                return None
+            
+            print(f"🔄 Computing embeddings for {len(missing)} new or changed restaurants...")
+            embeddings = self.model.encode([texts[i] for i in missing], show_progress_bar=True)
+            
+            entries = []
+            for i, embedding in zip(missing, embeddings):
+                vector = np.asarray(embedding, dtype=np.float32)
+                vectors[i] = vector
+                entries.append((hashes[i], int(vector.shape[0]), vector.tobytes()))
+            
+            self.db.save_cached_embeddings(self.model_name, entries,
+                                           keep_hashes=hashes if prune else None)
+        
+        print(f"✅ Loaded embeddings for {len(restaurants)} restaurants "
+              f"({len(restaurants) - len(missing)} from cache)")
+        return vectors
+    
+    def compute_embeddings(self, restaurants: Optional[List[Dict]] = None):
+        """Load cached restaurant embeddings and encode only new or changed restaurants"""
+        with self._index_lock:
+            if restaurants is None:
+                restaurants = self.db.get_restaurants()
+            
+            vectors = self._load_vectors(restaurants, prune=True) if self.use_embeddings else None
+            if vectors is None:
+                print("📝 Using keyword-based search (embeddings not available)")
+                self._publish_index(restaurants, np.zeros((0, 0), dtype=np.float32))
+                return
+            
+            self._publish_index(restaurants, self._normalise(vectors))
+    
+    def add_restaurants(self, restaurants: List[Dict]):
+        """Incrementally add new restaurants without re-encoding or re-clustering the catalogue"""
+        self.ensure_index()
+        with self._index_lock:
+            self._append_restaurants(restaurants)
+    
+    def _append_restaurants(self, restaurants: List[Dict]):
+        """Append restaurants to the index (caller holds the index lock)"""
+        vectors = self._load_vectors(restaurants) if self.use_embeddings else None
+        if vectors is None:
+            self._publish_index(self.restaurants_cache + restaurants, self.embedding_matrix)
             return
         
-        print("🔄 Computing restaurant embeddings...")
-        texts = [self.generate_restaurant_text(r) for r in restaurants]
-        embeddings = self.model.encode(texts, show_progress_bar=True)
+        new_rows = self._normalise(vectors)
+        matrix = np.vstack([self.embedding_matrix, new_rows]) if len(self.embedding_matrix) else new_rows
+        self._publish_index(self.restaurants_cache + restaurants, matrix, appended=len(new_rows))
+    
+    def _normalise(self, vectors: List[np.ndarray]) -> np.ndarray:
+        """Stack vectors into one contiguous unit-norm float32 matrix"""
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+    
+    def _publish_index(self, restaurants: List[Dict], matrix: np.ndarray, appended: int = 0):
+        """
+        Build a complete snapshot (matrix, ids, filter index, ANN index) and
+        publish it in one assignment (caller holds the index lock)
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
         
-        for i, restaurant in enumerate(restaurants):
-            self.restaurant_embeddings[restaurant['id']] = embeddings[i]
+        ann = None
+        if len(matrix) >= self.ann_threshold:
+            previous = self._index.ann
+            if appended and previous is not None:
+                ann = previous.copy()
+                ann.add(matrix[-appended:])
+            else:
+                ann = self._ann_settings.copy()
+                ann.build(matrix)
         
-        print(f"✅ Computed embeddings for {len(restaurants)} restaurants")
+        self._index = _SearchIndex(restaurants, matrix, ann)
+        self._index_ready = True
+    
+    def use_approximate_search(self) -> bool:
+        """Whether the catalogue is large enough for approximate search to pay off (ANN index built)"""
+        return self._index.ann is not None
+    
+    def _filter_mask(self, filters: Dict = None) -> np.ndarray:
+        """Boolean mask over restaurants_cache rows matching the structured filters"""
+        return self._index.filter_index.mask(filters)
+    
+    def top_rated(self, filters: Dict = None, limit: int = 10) -> List[Dict]:
+        """Highest-rated restaurants matching the filters, straight from the filter index"""
+        self.ensure_index()
+        return self._index.filter_index.top_rated(filters, limit)
     
     def _keyword_search(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
         """Fallback keyword-based search when embeddings aren't available"""
-        if not self.restaurants_cache:
-            self.restaurants_cache = self.db.get_restaurants()
+        self.ensure_index()
         
         # Apply filters first
-        filtered_restaurants = self.restaurants_cache
-        if filters:
-            filtered_restaurants = [
-                r for r in self.restaurants_cache
-                if self._matches_filters(r, filters)
-            ]
+        filtered_restaurants = self._index.filter_index.filter(filters)
         
         if not filtered_restaurants:
             return []
@@ -114,67 +310,78 @@ class EmbeddingManager:
         
         return results
     
-    def semantic_search(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
-        """Search restaurants using semantic similarity or keyword matching"""
-        if not self.use_embeddings:
+    def semantic_search(self, query: str, top_k: int = 5, filters: Dict = None,
+                        approximate: Optional[bool] = None) -> List[Dict]:
+        """
+        Search restaurants using semantic similarity or keyword matching
+        
+        approximate: False forces exact scoring; True/None use the ANN index when the catalogue
+            reached ann_threshold (it is built when the index is published, never per query)
+        """
+        self.ensure_index()
+        
+        if not self.use_embeddings or not self._ensure_model():
             return self._keyword_search(query, top_k, filters)
         
-        if not self.restaurant_embeddings:
-            self.compute_embeddings()
+        # Encode and normalise query so a dot product is the cosine similarity
+        query_embedding = np.asarray(self.model.encode([query])[0], dtype=np.float32)
+        query_norm = np.linalg.norm(query_embedding)
+        if query_norm > 0:
+            query_embedding = query_embedding / query_norm
         
-        # Encode query
-        query_embedding = self.model.encode([query])[0]
+        # One snapshot for the whole search, so mask, matrix and rows always match
+        index = self._index
         
         # Apply filters first
-        filtered_restaurants = self.restaurants_cache
-        if filters:
-            filtered_restaurants = [
-                r for r in self.restaurants_cache
-                if self._matches_filters(r, filters)
-            ]
-        
-        if not filtered_restaurants:
+        mask = index.filter_index.mask(filters)
+        candidates = int(mask.sum())
+        if candidates == 0:
             return []
         
-        # Compute similarities
-        similarities = []
-        for restaurant in filtered_restaurants:
-            rest_embedding = self.restaurant_embeddings[restaurant['id']]
-            similarity = cosine_similarity([query_embedding], [rest_embedding])[0][0]
-            similarities.append((restaurant, similarity))
+        k = min(top_k, candidates)
+        if approximate is None:
+            approximate = index.ann is not None
+        
+        rows = None
+        if approximate and index.ann is not None:
+            rows, top_scores = index.ann.search(
+                query_embedding, k, mask=mask if candidates < len(mask) else None
+            )
+            # Very selective filters can leave the probed clusters short; score those exactly
+            if len(rows) < k:
+                rows = None
         
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        if rows is None:
+            rows, top_scores = self._exact_top_k(index.matrix, query_embedding, mask, candidates, k)
         
         # Return top_k with scores
         results = []
-        for restaurant, score in similarities[:top_k]:
-            result = restaurant.copy()
+        for row, score in zip(rows, top_scores):
+            result = index.restaurants[row].copy()
             result['similarity_score'] = float(score)
             results.append(result)
         
         return results
     
-    def _matches_filters(self, restaurant: Dict, filters: Dict) -> bool:
-        """Check if restaurant matches filters"""
-        if 'cuisine' in filters and restaurant['cuisine'] != filters['cuisine']:
-            return False
-        
-        if 'location' in filters and filters['location'].lower() not in restaurant['location'].lower():
-            return False
-        
-        if 'min_rating' in filters and restaurant['rating'] < filters['min_rating']:
-            return False
-        
-        if 'price_range' in filters and restaurant['price_range'] != filters['price_range']:
-            return False
+    def _exact_top_k(self, matrix: np.ndarray, query_embedding: np.ndarray, mask: np.ndarray,
+                     candidates: int, k: int):
+        """Brute-force top-k over the masked rows with one matrix-vector product"""
+        scores = matrix @ query_embedding
+        if candidates < len(scores):
+            scores = np.where(mask, scores, -np.inf)
         
-        return True
+        # Partial selection of top_k, then order just those
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
     
     def hybrid_search(self, query: str, filters: Dict = None, top_k: int = 5) -> List[Dict]:
         """Hybrid search combining semantic similarity and structured filters"""
-        # Get semantic results
-        semantic_results = self.semantic_search(query, top_k=top_k * 2, filters=filters)
+        # Get semantic results (approximate once the catalogue passes ann_threshold)
+        semantic_results = self.semantic_search(
+            query, top_k=top_k * 2, filters=filters,
+            approximate=self.use_approximate_search()
+        )
         
         # Re-rank based on rating and availability
         for result in semantic_results:
@@ -0,0 +1,115 @@
+"""
+Restaurant Filter Index
+In-memory inverted index for cuisine, location, price range and rating filters
+"""
+
+import re
+import numpy as np
+from typing import Dict, List, Optional
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens"""
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+class RestaurantFilterIndex:
+    """
+    Maps filter values to sorted arrays of row positions in `restaurants`, so a
+    filtered lookup costs O(matches) instead of a scan over every restaurant.
+    Filter semantics match DatabaseManager.get_restaurants: exact cuisine and
+    price range, case-insensitive location substring, and minimum rating.
+    """
+    
+    def __init__(self, restaurants: List[Dict]):
+        self.restaurants = restaurants
+        self.size = len(restaurants)
+        
+        cuisine_rows, price_rows, token_rows = {}, {}, {}
+        for row, restaurant in enumerate(restaurants):
+            cuisine_rows.setdefault(restaurant['cuisine'], []).append(row)
+            price_rows.setdefault(restaurant['price_range'], []).append(row)
+            for token in set(_tokenize(restaurant['location'])):
+                token_rows.setdefault(token, []).append(row)
+        
+        self.cuisine_rows = {k: np.array(v, dtype=np.int64) for k, v in cuisine_rows.items()}
+        self.price_rows = {k: np.array(v, dtype=np.int64) for k, v in price_rows.items()}
+        self.token_rows = {k: np.array(v, dtype=np.int64) for k, v in token_rows.items()}
+        self.locations = [r['location'].lower() for r in restaurants]
+        self._token_lookups = {}
+        
+        # Rows ordered by rating so min_rating is a binary search plus a slice
+        self.ratings = np.array([r['rating'] for r in restaurants], dtype=np.float64)
+        self.rating_order = np.argsort(self.ratings, kind='stable')
+        self.sorted_ratings = self.ratings[self.rating_order]
+    
+    def _rows_containing_token(self, token: str) -> np.ndarray:
+        """Rows with a location token containing `token` (scans the vocabulary, not the rows)"""
+        rows = self._token_lookups.get(token)
+        if rows is None:
+            matching = [r for t, r in self.token_rows.items() if token in t]
+            rows = np.unique(np.concatenate(matching)) if matching else np.zeros(0, dtype=np.int64)
+            self._token_lookups[token] = rows
+        return rows
+    
+    def _location_rows(self, location: str, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows (optionally within candidates) whose location contains the query text"""
+        needle = location.lower()
+        tokens = _tokenize(needle)
+        
+        # Any location containing the query contains every query token inside one of its own tokens
+        if candidates is None and tokens:
+            for token in tokens:
+                rows = self._rows_containing_token(token)
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+                if not len(candidates):
+                    return candidates
+        elif candidates is None:
+            candidates = np.arange(self.size, dtype=np.int64)
+        
+        # Confirm the full substring on the (small) candidate set
+        return np.array([row for row in candidates if needle in self.locations[row]], dtype=np.int64)
+    
+    def candidate_rows(self, filters: Optional[Dict] = None) -> np.ndarray:
+        """Sorted row positions matching all filters"""
+        if not filters:
+            return np.arange(self.size, dtype=np.int64)
+        
+        empty = np.zeros(0, dtype=np.int64)
+        row_sets = []
+        
+        if 'cuisine' in filters:
+            row_sets.append(self.cuisine_rows.get(filters['cuisine'], empty))
+        if 'price_range' in filters:
+            row_sets.append(self.price_rows.get(filters['price_range'], empty))
+        if 'min_rating' in filters:
+            start = np.searchsorted(self.sorted_ratings, float(filters['min_rating']), side='left')
+            row_sets.append(np.sort(self.rating_order[start:]))
+        
+        # Intersect the smallest sets first; location is checked last since it may verify substrings
+        row_sets.sort(key=len)
+        candidates = None
+        for rows in row_sets:
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                return empty
+        
+        if 'location' in filters:
+            candidates = self._location_rows(filters['location'], candidates)
+        
+        return candidates if candidates is not None else np.arange(self.size, dtype=np.int64)
+    
+    def mask(self, filters: Optional[Dict] = None) -> np.ndarray:
+        """Boolean mask over rows matching all filters"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.candidate_rows(filters)] = True
+        return mask
+    
+    def filter(self, filters: Optional[Dict] = None) -> List[Dict]:
+        """Restaurants matching all filters, in catalogue order"""
+        return [self.restaurants[row] for row in self.candidate_rows(filters)]
+    
+    def top_rated(self, filters: Optional[Dict] = None, limit: int = 10) -> List[Dict]:
+        """Highest-rated restaurants matching the filters"""
+        rows = self.candidate_rows(filters)
+        # Rating descending, ties in catalogue order (same as a stable sort of the filtered list)
+        rows = rows[np.lexsort((rows, -self.ratings[rows]))][:limit]
+        return [self.restaurants[row] for row in rows]
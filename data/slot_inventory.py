@@ -0,0 +1,338 @@
+"""
+Slot Inventory
+In-memory seat counts for a rolling horizon of days, indexed [restaurant, day, slot]
+"""
+
+import threading
+import time as time_module
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Marks (restaurant, day, slot) cells with no availability row
+NO_SLOT = -1
+
+def slot_index(time: str) -> Optional[int]:
+    """Column for an HH:MM time on the half-hour grid (None if off-grid or malformed)"""
+    try:
+        hours, minutes = (int(part) for part in time.split(":")[:2])
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60) or minutes % SLOT_MINUTES:
+        return None
+    return (hours * 60 + minutes) // SLOT_MINUTES
+
+def slot_time(slot: int) -> str:
+    """HH:MM for a slot column"""
+    minutes = int(slot) * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def slot_count(duration_minutes: int) -> int:
+    """Number of consecutive slots a booking of duration_minutes occupies (at least one)"""
+    return max(1, -(-int(duration_minutes) // SLOT_MINUTES))
+
+def window_end(time: str, duration_minutes: int) -> str:
+    """
+    Exclusive HH:MM end of the slot window starting at time
+    
+    Capped at "24:00" (sorts after every slot), so windows never wrap past midnight.
+    """
+    hours, minutes = (int(part) for part in time.split(":")[:2])
+    end = min(hours * 60 + minutes + slot_count(duration_minutes) * SLOT_MINUTES, 24 * 60)
+    return f"{end // 60:02d}:{end % 60:02d}"
+
+def window_min(cells: np.ndarray) -> np.ndarray:
+    """
+    Seats free for a whole window: the minimum over the last axis, ignoring
+    slots that don't exist (closed), and NO_SLOT where the first slot is missing
+    """
+    present = cells != NO_SLOT
+    mins = np.where(present, cells, np.iinfo(np.int32).max).min(axis=-1)
+    return np.where(present[..., 0], mins, NO_SLOT)
+
+class SlotInventory:
+    """
+    Seats available per (restaurant, day, half-hour slot) in one int32 array
+    covering today plus horizon_days - 1 days.
+    
+    SQLite stays the source of truth. DatabaseManager commits a booking or
+    cancellation first and then applies the same delta here (write-through);
+    since the array is only ever rebuilt from committed rows, reloading after a
+    crash or restart is always consistent. Writes made elsewhere (other
+    processes, scripts) bump the trigger-maintained availability_version, which
+    is compared at most every max_staleness seconds; catalog_version is checked
+    alongside it for the cached restaurant names. Lookups outside the
+    horizon or off the half-hour grid return None so callers fall back to SQL.
+    
+    Queries take a window of `slots` consecutive slots (a booking's duration);
+    the seats reported for a window are the fewest free in any of its slots.
+    """
+    
+    def __init__(self, connection_factory: Callable, horizon_days: int = 31, max_staleness: float = 1.0):
+        self.connection_factory = connection_factory
+        self.horizon_days = horizon_days
+        self.max_staleness = max_staleness
+        self.seats = np.full((0, horizon_days, SLOTS_PER_DAY), NO_SLOT, dtype=np.int32)
+        self.restaurant_ids = np.zeros(0, dtype=np.int64)
+        self.row_of = {}  # restaurant_id -> first axis position
+        self.names = {}  # restaurant_id -> name, for booking confirmations
+        self.start_date = None
+        self.day_of = {}  # YYYY-MM-DD -> second axis position
+        self.version = None
+        self.catalog_version = None
+        self.loads = 0
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # one reload at a time
+        self._pending = None  # write-throughs that arrive while a load runs
+    
+    def load(self):
+        """Rebuild the array from the availability table for the current horizon"""
+        start = datetime.now().date()
+        first, last = start.isoformat(), (start + timedelta(days=self.horizon_days - 1)).isoformat()
+        
+        # Buffer write-throughs from here on: those committed after the snapshot
+        # below are replayed onto it instead of invalidating it
+        with self._lock:
+            self._pending = []
+        
+        with self.connection_factory() as conn:
+            cursor = conn.cursor()
+            # One read transaction so the version matches the rows (WAL snapshot)
+            cursor.execute("BEGIN")
+            try:
+                version, catalog_version = self._read_versions(cursor)
+                cursor.execute("SELECT id, name FROM restaurants ORDER BY id")
+                names = {r[0]: r[1] for r in cursor.fetchall()}
+                cursor.execute('''
+                    SELECT restaurant_id, date, time, seats_available FROM availability
+                    WHERE date BETWEEN ? AND ?
+                ''', (first, last))
+                rows = cursor.fetchall()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+            finally:
+                conn.commit()
+        
+        # Availability rows for restaurants missing from the catalogue still count
+        restaurant_ids = sorted(set(names) | {r[0] for r in rows})
+        row_of = {restaurant_id: i for i, restaurant_id in enumerate(restaurant_ids)}
+        seats = np.full((len(restaurant_ids), self.horizon_days, SLOTS_PER_DAY), NO_SLOT, dtype=np.int32)
+        day_of = {(start + timedelta(days=d)).isoformat(): d for d in range(self.horizon_days)}
+        
+        if rows:
+            slots = [slot_index(r[2]) for r in rows]
+            on_grid = [i for i, slot in enumerate(slots) if slot is not None]
+            seats[
+                np.array([row_of[rows[i][0]] for i in on_grid], dtype=np.int64),
+                np.array([day_of[rows[i][1]] for i in on_grid], dtype=np.int64),
+                np.array([slots[i] for i in on_grid], dtype=np.int64)
+            ] = np.array([rows[i][3] for i in on_grid], dtype=np.int32)
+        
+        with self._lock:
+            pending, self._pending = self._pending or [], None
+            self.seats = seats
+            self.restaurant_ids = np.array(restaurant_ids, dtype=np.int64)
+            self.row_of = row_of
+            self.names = names
+            self.start_date = start
+            self.day_of = day_of
+            self.version = version
+            self.catalog_version = catalog_version
+            self.loads += 1
+            self._checked_at = time_module.monotonic()
+            for change in pending:
+                if change[4] > version:
+                    self._apply(*change)
+    
+    def _refresh(self):
+        """Reload on first use, when the day rolls over, or when another writer changed availability"""
+        now = time_module.monotonic()
+        if self.start_date is not None and now - self._checked_at < self.max_staleness:
+            return
+        if self.start_date is not None and self.start_date == datetime.now().date():
+            with self.connection_factory() as conn:
+                versions = self._read_versions(conn.cursor())
+            with self._lock:
+                self._checked_at = now
+                if versions == (self.version, self.catalog_version):
+                    return
+        with self._load_lock:
+            if self.start_date is not None and self._checked_at > now:
+                return  # another thread reloaded while this one waited
+            self.load()
+    
+    def _read_versions(self, cursor) -> Tuple[int, int]:
+        """Current (availability_version, catalog_version)"""
+        cursor.execute('''
+            SELECT (SELECT version FROM availability_version WHERE id = 1),
+                   (SELECT version FROM catalog_version WHERE id = 1)
+        ''')
+        availability, catalog = cursor.fetchone()
+        return availability or 0, catalog or 0
+    
+    def _day(self, date: str) -> Optional[int]:
+        """Second axis position for a YYYY-MM-DD date (None outside the horizon)"""
+        return self.day_of.get(date)
+    
+    def restaurant_name(self, restaurant_id: int) -> Optional[str]:
+        """Cached restaurant name (None if unknown)"""
+        self._refresh()
+        with self._lock:
+            return self.names.get(int(restaurant_id))
+    
+    def seats_at(self, restaurant_id: int, date: str, time: str, slots: int = 1) -> Optional[int]:
+        """Seats free for a window (NO_SLOT if its first slot doesn't exist, None if the inventory can't answer)"""
+        self._refresh()
+        with self._lock:
+            day, slot = self._day(date), slot_index(time)
+            if day is None or slot is None:
+                return None
+            row = self.row_of.get(int(restaurant_id))
+            if row is None:
+                return NO_SLOT
+            return int(window_min(self.seats[row, day, slot:slot + slots]))
+    
+    def seats_for(self, restaurant_ids: List[int], date: str, time: str,
+                  slots: int = 1) -> Optional[Dict[int, int]]:
+        """Seats free for a window at many restaurants, omitting those without its first slot"""
+        self._refresh()
+        with self._lock:
+            day, slot = self._day(date), slot_index(time)
+            if day is None or slot is None:
+                return None
+            known = [(int(r), self.row_of[int(r)]) for r in restaurant_ids if int(r) in self.row_of]
+            if not known:
+                return {}
+            values = window_min(self.seats[[row for _, row in known], day, slot:slot + slots])
+            return {restaurant_id: int(seats) for (restaurant_id, _), seats in zip(known, values)
+                    if seats != NO_SLOT}
+    
+    def restaurants_with_seats(self, date: str, time: str, party_size: int,
+                               slots: int = 1) -> Optional[List[int]]:
+        """Ids of every restaurant with party_size seats for a whole window (one vectorised scan)"""
+        self._refresh()
+        with self._lock:
+            day, slot = self._day(date), slot_index(time)
+            if day is None or slot is None:
+                return None
+            mask = window_min(self.seats[:, day, slot:slot + slots]) >= max(int(party_size), 0)
+            return self.restaurant_ids[mask].tolist()
+    
+    def available_times(self, restaurant_id: int, date: str, party_size: int,
+                        slots: int = 1) -> Optional[List[str]]:
+        """Start times on a date whose whole window has party_size seats, in order"""
+        self._refresh()
+        with self._lock:
+            day = self._day(date)
+            if day is None:
+                return None
+            row = self.row_of.get(int(restaurant_id))
+            if row is None:
+                return []
+            # Every start slot's window at once; slots past midnight count as closed
+            padded = np.concatenate([self.seats[row, day], np.full(slots - 1, NO_SLOT, dtype=np.int32)])
+            windows = np.lib.stride_tricks.sliding_window_view(padded, slots)
+            starts = np.flatnonzero(window_min(windows) >= max(int(party_size), 0))
+            return [slot_time(slot) for slot in starts]
+    
+    def nearest_windows(self, candidates: List[Tuple[int, float, float]], date: str, time: str,
+                        party_size: int, slots: int = 1, max_distance: int = 4,
+                        limit: int = 5) -> Optional[List[Dict]]:
+        """
+        The `limit` best (restaurant, start time) windows with party_size seats
+        within max_distance slots of time, over all candidates in one pass
+        
+        Args:
+            candidates: (restaurant_id, penalty, rating) tuples; penalty is added
+                to the slot distance to score another restaurant
+        
+        Returns:
+            Dicts with restaurant_id, time, seats_available, slot_distance and
+            score, best first (ties: closer in time, higher rating, earlier)
+        """
+        self._refresh()
+        with self._lock:
+            day, slot = self._day(date), slot_index(time)
+            if day is None or slot is None:
+                return None
+            known = [(c, self.row_of[int(c[0])]) for c in candidates if int(c[0]) in self.row_of]
+            if not known:
+                return []
+            
+            # [candidate, start slot] seats free for the whole window starting there
+            cells = self.seats[[row for _, row in known], day]
+            padded = np.pad(cells, ((0, 0), (0, slots - 1)), constant_values=NO_SLOT)
+            seats = window_min(np.lib.stride_tricks.sliding_window_view(padded, slots, axis=1))
+        
+        ids = np.array([int(c[0]) for c, _ in known], dtype=np.int64)
+        penalties = np.array([c[1] for c, _ in known], dtype=np.float64)
+        ratings = np.array([c[2] for c, _ in known], dtype=np.float64)
+        distance = np.abs(np.arange(SLOTS_PER_DAY) - slot)
+        
+        rows, starts = np.nonzero((seats >= max(int(party_size), 0)) & (distance <= max_distance))
+        scores = distance[starts] + penalties[rows]
+        order = np.lexsort((starts, ids[rows], -ratings[rows], distance[starts], scores))[:limit]
+        
+        return [{
+            "restaurant_id": int(ids[rows[i]]),
+            "time": slot_time(starts[i]),
+            "seats_available": int(seats[rows[i], starts[i]]),
+            "slot_distance": int(distance[starts[i]]),
+            "score": float(scores[i])
+        } for i in order]
+    
+    def apply_delta(self, restaurant_id: int, date: str, time: str, delta: int,
+                    version: int, rows_changed: int = 1, slots: int = 1):
+        """
+        Write-through of a committed seat change
+        
+        Args:
+            delta: Seats added to each slot of the window (negative for a booking)
+            version: availability_version read inside the committing transaction
+            rows_changed: availability rows the transaction updated (version bumps)
+            slots: Window length in slots, starting at time
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((restaurant_id, date, time, delta, version, rows_changed, slots))
+            self._apply(restaurant_id, date, time, delta, version, rows_changed, slots)
+    
+    def _apply(self, restaurant_id: int, date: str, time: str, delta: int,
+               version: int, rows_changed: int, slots: int):
+        """Apply one write-through to the current array (caller holds the lock)"""
+        if self.version is None:
+            return  # not loaded yet; the first read loads committed state
+        day, slot = self._day(date), slot_index(time)
+        row = self.row_of.get(int(restaurant_id))
+        if self.version != version - rows_changed or (row is None and day is not None):
+            # Missed another writer's change, or a restaurant we don't know: reload on next read
+            self._invalidate()
+            return
+        self.version = version
+        if day is not None and slot is not None:
+            cells = self.seats[row, day, slot:slot + slots]
+            cells[cells != NO_SLOT] += delta
+    
+    def _invalidate(self):
+        """Force a reload on the next read (caller holds the lock)"""
+        self.version = None
+        self.start_date = None
+        self.day_of = {}
+    
+    def stats(self) -> Dict:
+        """Shape, memory footprint and reload count"""
+        with self._lock:
+            return {
+                "restaurants": len(self.restaurant_ids),
+                "days": self.horizon_days,
+                "slots_per_day": SLOTS_PER_DAY,
+                "bytes": int(self.seats.nbytes),
+                "version": self.version,
+                "loads": self.loads
+            }
@@ -0,0 +1,71 @@
+"""
+ANN Recall Benchmark
+Compare IVFIndex recall and latency against exact brute-force search
+"""
+
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.ann_index import IVFIndex
+
+def generate_catalogue(n: int, dim: int = 384, n_topics: int = 200, seed: int = 7) -> np.ndarray:
+    """Synthetic unit-norm vectors clustered around topics, like cuisine/location groups"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    assignments = rng.integers(0, n_topics, size=n)
+    vectors = topics[assignments] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k rows"""
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+def run_benchmark(n: int = 20000, dim: int = 384, k: int = 10, n_queries: int = 200,
+                  probes: List[int] = (1, 2, 4, 8, 16, 32)) -> List[Dict]:
+    """Measure recall@k and per-query latency for each n_probe setting"""
+    matrix = generate_catalogue(n, dim)
+    queries = generate_catalogue(n_queries, dim, seed=11)
+    
+    started = time.perf_counter()
+    index = IVFIndex()
+    index.build(matrix)
+    build_time = time.perf_counter() - started
+    print(f"Built IVF index over {n:,} vectors ({index.list_count} lists) in {build_time:.2f}s")
+    
+    started = time.perf_counter()
+    truth = [set(exact_top_k(matrix, q, k)) for q in queries]
+    exact_ms = (time.perf_counter() - started) / n_queries * 1000
+    
+    results = [{"mode": "exact", "n_probe": None, "recall": 1.0, "latency_ms": exact_ms}]
+    for n_probe in probes:
+        started = time.perf_counter()
+        found = [index.search(q, k, n_probe=n_probe)[0] for q in queries]
+        latency_ms = (time.perf_counter() - started) / n_queries * 1000
+        
+        recall = np.mean([len(truth[i].intersection(found[i])) / k for i in range(n_queries)])
+        results.append({"mode": "ivf", "n_probe": n_probe, "recall": float(recall), "latency_ms": latency_ms})
+    
+    return results
+
+def main():
+    """Print a recall/latency table for a few catalogue sizes"""
+    for n in (5000, 20000, 50000):
+        print("\n" + "="*60)
+        print(f"CATALOGUE SIZE: {n:,}")
+        print("="*60)
+        print(f"{'Mode':<8} | {'n_probe':>7} | {'Recall@10':>9} | {'Latency':>10}")
+        print("-" * 60)
+        for row in run_benchmark(n=n):
+            n_probe = row['n_probe'] if row['n_probe'] is not None else "-"
+            print(f"{row['mode']:<8} | {n_probe:>7} | {row['recall']:>9.3f} | {row['latency_ms']:>8.3f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Booking Contention Benchmark
+Many concurrent writers booking peak-hour slots through create_reservation
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.db_manager import DatabaseManager, DEFAULT_DB_PATH
+from data.slot_inventory import window_end
+
+# Friday-night peak: every writer competes for the same few evenings and slots
+PEAK_TIMES = ["19:00", "19:30", "20:00", "20:30"]
+PEAK_DAYS = 3
+
+def run_writer(writer_id: int, db: DatabaseManager, bookings: int, seed: int) -> List[Dict]:
+    """Attempt `bookings` reservations and return one record per attempt"""
+    rng = random.Random(seed * 1000 + writer_id)
+    restaurant_ids = [r['id'] for r in db.get_restaurants()]
+    records = []
+    
+    for _ in range(bookings):
+        date = (datetime.now() + timedelta(days=rng.randrange(1, PEAK_DAYS + 1))).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+        result = db.create_reservation(
+            restaurant_id=rng.choice(restaurant_ids),
+            user_name=f"bench_writer_{writer_id}",
+            date=date,
+            time=rng.choice(PEAK_TIMES),
+            party_size=rng.randint(2, 6)
+        )
+        error = result.get("error", "")
+        records.append({
+            "latency": time.perf_counter() - started,
+            "booked": result["success"],
+            # Lock timeouts and other errors, as opposed to "not enough seats"
+            "failed": error.startswith("Booking failed")
+        })
+    
+    return records
+
+def check_seat_accounting(db_path: str, initial: Dict) -> int:
+    """Slots whose seats taken differ from the party sizes of the bookings covering them"""
+    conn = sqlite3.connect(db_path)
+    taken = {}
+    for restaurant_id, date, slot_start, party_size, duration in conn.execute(
+            "SELECT restaurant_id, date, time, party_size, duration_minutes FROM reservations "
+            "WHERE status = 'confirmed' AND user_name LIKE 'bench_writer_%'"):
+        for slot_time, in conn.execute(
+                "SELECT time FROM availability WHERE restaurant_id = ? AND date = ? AND time >= ? AND time < ?",
+                (restaurant_id, date, slot_start, window_end(slot_start, duration))):
+            key = (restaurant_id, date, slot_time)
+            taken[key] = taken.get(key, 0) + party_size
+    
+    mismatches = 0
+    for restaurant_id, date, slot_time, seats in conn.execute(
+            "SELECT restaurant_id, date, time, seats_available FROM availability"):
+        key = (restaurant_id, date, slot_time)
+        if seats < 0 or initial[key] - seats != taken.get(key, 0):
+            mismatches += 1
+    conn.close()
+    return mismatches
+
+def run_benchmark(writers: int = 32, bookings_per_writer: int = 50, db_path: str = DEFAULT_DB_PATH,
+                  seed: int = 42) -> Dict:
+    """Run concurrent writers against a copy of the database and summarise throughput"""
+    workdir = tempfile.mkdtemp(prefix="booking_benchmark_")
+    try:
+        copy_path = os.path.join(workdir, "restaurants.db")
+        shutil.copy(db_path, copy_path)
+        
+        # One pooled connection per writer so the database lock, not the pool, is measured
+        db = DatabaseManager(copy_path, max_connections=writers)
+        with db.get_connection() as conn:
+            initial = {(r[0], r[1], r[2]): r[3] for r in conn.execute(
+                "SELECT restaurant_id, date, time, seats_available FROM availability")}
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            futures = [executor.submit(run_writer, i, db, bookings_per_writer, seed) for i in range(writers)]
+            records = [record for f in futures for record in f.result()]
+        elapsed = time.perf_counter() - started
+        
+        db.close()
+        mismatches = check_seat_accounting(copy_path, initial)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    latencies = np.array([r["latency"] for r in records]) * 1000
+    booked = sum(r["booked"] for r in records)
+    return {
+        "writers": writers,
+        "attempts": len(records),
+        "booked": booked,
+        "rejected": len(records) - booked - sum(r["failed"] for r in records),
+        "failed": sum(r["failed"] for r in records),
+        "elapsed_s": elapsed,
+        "attempts_per_s": len(records) / elapsed if elapsed else 0.0,
+        "bookings_per_s": booked / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "seat_mismatches": mismatches
+    }
+
+def main():
+    """Print booking throughput and latency under write contention"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--bookings", type=int, default=50, help="booking attempts per writer")
+    args = parser.parse_args()
+    
+    summary = run_benchmark(args.writers, args.bookings)
+    
+    print("\n" + "="*60)
+    print(f"BOOKING CONTENTION BENCHMARK - {summary['writers']} concurrent writers")
+    print("="*60)
+    print(f"Attempts: {summary['attempts']} in {summary['elapsed_s']:.2f}s "
+          f"({summary['attempts_per_s']:.0f} attempts/s)")
+    print(f"Booked: {summary['booked']} ({summary['bookings_per_s']:.0f} bookings/s) | "
+          f"sold out: {summary['rejected']} | failed: {summary['failed']}")
+    print(f"Latency: p50 {summary['p50_ms']:.1f}ms | p95 {summary['p95_ms']:.1f}ms | "
+          f"p99 {summary['p99_ms']:.1f}ms")
+    status = "OK" if summary["seat_mismatches"] == 0 else f"{summary['seat_mismatches']} slots wrong"
+    print(f"Seat accounting (no overbooking, no lost updates): {status}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Orchestrator Benchmark
+Run many concurrent simulated sessions through process_message with a mock LLM
+"""
+
+import os
+import sys
+import time
+import shutil
+import pstats
+import cProfile
+import argparse
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.orchestrator import AgentOrchestrator
+from agent.session_manager import SessionManager
+from agent.llm_backends import LLMBackend, MockLLMBackend, LatencyModel
+from data.db_manager import DatabaseManager, DEFAULT_DB_PATH
+from tools.registry import build_tool_registry
+from evaluation.test_scenarios import TEST_SCENARIOS
+
+class TimedBackend(LLMBackend):
+    """Wraps a backend and records time spent inside it per thread"""
+    
+    def __init__(self, inner: LLMBackend, timings: threading.local):
+        self.inner = inner
+        self.timings = timings
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        started = time.perf_counter()
+        try:
+            return self.inner.complete(messages, **params)
+        finally:
+            self.timings.llm += time.perf_counter() - started
+
+class TimedOrchestrator(AgentOrchestrator):
+    """Orchestrator that records time spent executing tools per thread"""
+    
+    def __init__(self, timings: threading.local, **kwargs):
+        super().__init__(**kwargs)
+        self.timings = timings
+    
+    def _execute_tools(self, tool_calls: List[Dict]) -> List[Dict]:
+        started = time.perf_counter()
+        try:
+            return super()._execute_tools(tool_calls)
+        finally:
+            self.timings.tools += time.perf_counter() - started
+
+def run_session(session_id: int, sessions: SessionManager, timings: threading.local) -> List[Dict]:
+    """Play one TEST_SCENARIOS conversation and return per-turn timings"""
+    scenario = TEST_SCENARIOS[session_id % len(TEST_SCENARIOS)]
+    turns = []
+    
+    for turn in scenario["conversation"]:
+        timings.llm = timings.tools = 0.0
+        started = time.perf_counter()
+        sessions.process_message(f"bench_{session_id}", turn["user"], f"bench_user_{session_id}", None)
+        total = time.perf_counter() - started
+        turns.append({
+            "total": total,
+            "llm": timings.llm,
+            "tools": timings.tools,
+            "local": max(0.0, total - timings.llm - timings.tools)
+        })
+    
+    return turns
+
+def run_benchmark(sessions_count: int = 200, concurrency: int = 50, latency_ms: float = 0.0,
+                  ms_per_token: float = 0.0, db_path: str = DEFAULT_DB_PATH,
+                  profile: bool = False) -> Dict:
+    """Run simulated sessions against a copy of the database and summarise timings"""
+    workdir = tempfile.mkdtemp(prefix="orchestrator_benchmark_")
+    try:
+        copy_path = os.path.join(workdir, "restaurants.db")
+        shutil.copy(db_path, copy_path)
+        db = DatabaseManager(copy_path)
+        registry = build_tool_registry(db)
+        backend = MockLLMBackend(LatencyModel(median_ms=latency_ms, ms_per_token=ms_per_token, seed=42))
+        timings = threading.local()
+        
+        # One shared orchestrator; each simulated user only gets a session
+        orchestrator = TimedOrchestrator(timings, tools=registry, backend=TimedBackend(backend, timings))
+        sessions = SessionManager(orchestrator, max_sessions=sessions_count + 1)
+        
+        # Warm up lazily built indexes so the first sessions aren't penalised
+        run_session(-1, sessions, timings)
+        
+        profiler = cProfile.Profile() if profile else None
+        started = time.perf_counter()
+        if profiler:
+            # Profiling is per-thread, so profiled runs are sequential
+            profiler.enable()
+            results = [run_session(i, sessions, timings) for i in range(sessions_count)]
+            profiler.disable()
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [executor.submit(run_session, i, sessions, timings)
+                           for i in range(sessions_count)]
+                results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - started
+        
+        pool_stats = db.get_pool_stats()
+        session_stats = sessions.stats()
+        registry.shutdown()
+        db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    turns = [turn for session in results for turn in session]
+    totals = np.array([t["total"] for t in turns]) * 1000
+    summary = {
+        "sessions": sessions_count,
+        "concurrency": 1 if profile else concurrency,
+        "turns": len(turns),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(turns) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(totals, 50)),
+        "p95_ms": float(np.percentile(totals, 95)),
+        "p99_ms": float(np.percentile(totals, 99)),
+        "phase_ms": {phase: 1000 * float(np.mean([t[phase] for t in turns]))
+                     for phase in ("llm", "tools", "local")},
+        "pool": pool_stats,
+        "session_state": session_stats
+    }
+    if profiler:
+        summary["profile"] = pstats.Stats(profiler)
+    return summary
+
+def main():
+    """Print throughput, latency percentiles and where per-turn time goes"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="median simulated LLM time to first token (0 = local overhead only)")
+    parser.add_argument("--ms-per-token", type=float, default=0.0,
+                        help="simulated LLM time per output token")
+    parser.add_argument("--profile", action="store_true",
+                        help="run sessions sequentially under cProfile and print the hottest functions")
+    args = parser.parse_args()
+    
+    summary = run_benchmark(args.sessions, args.concurrency, args.latency_ms, args.ms_per_token,
+                            profile=args.profile)
+    
+    print("\n" + "="*60)
+    print(f"ORCHESTRATOR BENCHMARK - {summary['sessions']} sessions, "
+          f"concurrency {summary['concurrency']}, mock latency {args.latency_ms:g}ms")
+    print("="*60)
+    print(f"Turns: {summary['turns']} in {summary['elapsed_s']:.2f}s "
+          f"({summary['turns_per_s']:.1f} turns/s)")
+    print(f"Turn latency: p50 {summary['p50_ms']:.1f}ms | p95 {summary['p95_ms']:.1f}ms | "
+          f"p99 {summary['p99_ms']:.1f}ms")
+    print("Mean time per turn:")
+    for phase, label in (("llm", "LLM backend"), ("tools", "Tool execution"), ("local", "Orchestration")):
+        print(f"  {label:<16} {summary['phase_ms'][phase]:>8.2f}ms")
+    pool = summary["pool"]
+    state = summary["session_state"]
+    print(f"Session state: {state['active_sessions']} sessions, "
+          f"{state['avg_state_bytes'] / 1024:.1f}KB each on average")
+    print(f"DB pool: {pool['checkouts']} checkouts, {pool['waits']} waits, "
+          f"max wait {pool['max_wait_time'] * 1000:.1f}ms")
+    
+    if "profile" in summary:
+        print("\nHottest functions (cumulative):")
+        summary["profile"].sort_stats("cumulative").print_stats(25)
+
+if __name__ == "__main__":
+    main()
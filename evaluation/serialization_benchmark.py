@@ -0,0 +1,122 @@
+"""
+Tool Result Serialization Benchmark
+Compare context tokens for pretty JSON vs compact tool results over TEST_SCENARIOS
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.context_manager import estimate_tokens
+from agent.result_format import format_tool_results
+from data.db_manager import DatabaseManager, DEFAULT_DB_PATH
+from tools.registry import build_tool_registry
+from evaluation.test_scenarios import TEST_SCENARIOS
+
+BENCHMARK_USER = "serialization_benchmark"
+
+def _turn_args(user_text: str) -> Dict:
+    """Date/time/party size for a scenario turn (tomorrow 19:00 for 2 unless stated)"""
+    party = re.search(r'\bfor (\d+)\b', user_text)
+    hour = re.search(r'\b(\d{1,2})\s*pm\b', user_text)
+    return {
+        "date": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "time": f"{int(hour.group(1)) % 12 + 12:02d}:00" if hour else "19:00",
+        "party_size": int(party.group(1)) if party else 2
+    }
+
+def collect_tool_results(db: DatabaseManager) -> List[Dict]:
+    """Run each scenario turn's expected tools against the database and keep the results"""
+    registry = build_tool_registry(db)
+    collected = []
+    restaurant_id = 1
+    
+    # A few existing bookings so reservation listings aren't empty
+    for offset in range(3):
+        registry.execute("book_reservation", {
+            "restaurant_id": offset + 1, "user_name": BENCHMARK_USER, **_turn_args("")
+        })
+    
+    for scenario in TEST_SCENARIOS:
+        for turn in scenario["conversation"]:
+            base = _turn_args(turn["user"])
+            for function_name in turn["expected_tools"]:
+                if function_name == "recommend_restaurants":
+                    args = {"query": turn["user"], **base}
+                elif function_name in ("check_availability", "book_reservation"):
+                    args = {"restaurant_id": restaurant_id, "user_name": BENCHMARK_USER, **base}
+                    if function_name == "check_availability":
+                        args.pop("user_name")
+                elif function_name == "get_user_reservations":
+                    args = {"user_name": BENCHMARK_USER}
+                elif function_name == "cancel_reservation":
+                    reservations = db.get_user_reservations(user_name=BENCHMARK_USER)
+                    args = {"reservation_id": reservations[0]["id"] if reservations else 0}
+                else:
+                    args = {}
+                
+                result = registry.execute(function_name, args)
+                if function_name == "recommend_restaurants" and result.get("recommendations"):
+                    restaurant_id = result["recommendations"][0]["id"]
+                
+                collected.append({"scenario": scenario["name"], "function": function_name,
+                                  "args": args, "result": result})
+    
+    registry.shutdown()
+    return collected
+
+def run_benchmark(db_path: str = DEFAULT_DB_PATH) -> Dict[str, Dict]:
+    """Estimated tokens per tool for the json and compact formats"""
+    # Work on a copy so benchmark bookings and cancellations never touch real data
+    workdir = tempfile.mkdtemp(prefix="serialization_benchmark_")
+    try:
+        copy_path = os.path.join(workdir, "restaurants.db")
+        shutil.copy(db_path, copy_path)
+        db = DatabaseManager(copy_path)
+        results = collect_tool_results(db)
+        db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    per_tool = {}
+    for result in results:
+        stats = per_tool.setdefault(result["function"], {"calls": 0, "json": 0, "compact": 0})
+        stats["calls"] += 1
+        stats["json"] += estimate_tokens(format_tool_results([result], mode="json"))
+        stats["compact"] += estimate_tokens(format_tool_results([result], mode="compact"))
+    
+    return per_tool
+
+def main():
+    """Print a per-tool token comparison"""
+    per_tool = run_benchmark()
+    
+    print("\n" + "="*72)
+    print("TOOL RESULT TOKENS PER CALL (estimated) - TEST_SCENARIOS")
+    print("="*72)
+    print(f"{'Tool':<24} | {'Calls':>5} | {'JSON':>7} | {'Compact':>7} | {'Saved':>6}")
+    print("-" * 72)
+    
+    total_json = total_compact = 0
+    for function_name, stats in sorted(per_tool.items()):
+        calls = stats["calls"]
+        total_json += stats["json"]
+        total_compact += stats["compact"]
+        saved = 1 - stats["compact"] / stats["json"] if stats["json"] else 0.0
+        print(f"{function_name:<24} | {calls:>5} | {stats['json'] / calls:>7.0f} | "
+              f"{stats['compact'] / calls:>7.0f} | {saved:>5.0%}")
+    
+    print("-" * 72)
+    saved = 1 - total_compact / total_json if total_json else 0.0
+    print(f"{'All tools (total)':<24} | {'':>5} | {total_json:>7} | {total_compact:>7} | {saved:>5.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -307,22 +307,60 @@ class ConversationEvaluator:
 def main():
     """Main evaluation function"""
     import os
+    import time
+    import shutil
+    import tempfile
     from dotenv import load_dotenv
     from agent.orchestrator import AgentOrchestrator
+    from agent.llm_backends import LLMBackend
+    from agent.llm_cache import ResponseCache, get_response_cache
+    from data.db_manager import DatabaseManager, DEFAULT_DB_PATH
+    from tools.registry import build_tool_registry
     
     load_dotenv()
     
+    # Replayed runs (EVAL_RUNS > 1) answer identical requests from the response cache.
+    # LLM_CACHE_MODE=record stores responses on disk; LLM_CACHE_MODE=replay then runs
+    # without calling Groq, which measures local orchestration overhead alone.
+    runs = int(os.getenv("EVAL_RUNS", "1"))
+    response_cache = get_response_cache() or ResponseCache()
+    replaying = not response_cache.allows_live_calls
+    
+    # Replay never reaches the backend (a miss raises), so it needs no Groq key
     api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        print("❌ GROQ_API_KEY not found in environment")
+    if not api_key and not replaying:
+        print("❌ GROQ_API_KEY not found in environment (set LLM_CACHE_MODE=replay to run offline)")
         return
+    backend = LLMBackend() if replaying else None
     
-    print("🚀 Initializing agent...")
-    orchestrator = AgentOrchestrator(api_key)
+    # Every run books on a fresh copy of the database, so tool results, confirmation
+    # codes and therefore cache keys are the same from one run (and recording) to the next
+    workdir = tempfile.mkdtemp(prefix="evaluation_")
+    try:
+        for run in range(1, runs + 1):
+            copy_path = os.path.join(workdir, f"restaurants_run{run}.db")
+            shutil.copy(DEFAULT_DB_PATH, copy_path)
+            db = DatabaseManager(copy_path)
+            registry = build_tool_registry(db)
+            
+            print(f"🚀 Initializing agent (run {run}/{runs})...")
+            orchestrator = AgentOrchestrator(api_key, tools=registry, response_cache=response_cache,
+                                             backend=backend)
+            
+            print(f"🧪 Starting evaluation (run {run}/{runs})...")
+            evaluator = ConversationEvaluator(orchestrator)
+            started = time.perf_counter()
+            summary = evaluator.run_all_scenarios()
+            print(f"⏱️ Run {run} took {time.perf_counter() - started:.2f}s")
+            
+            registry.shutdown()
+            db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
     
-    print("🧪 Starting evaluation...")
-    evaluator = ConversationEvaluator(orchestrator)
-    summary = evaluator.run_all_scenarios()
+    stats = response_cache.stats()
+    print(f"\n💾 LLM response cache ({stats['mode']}): {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.0%} hit rate, {stats['stored_entries']} stored)")
     
     # Save results
     evaluator.save_results()
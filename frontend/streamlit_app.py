@@ -6,6 +6,7 @@ Main chat interface for the restaurant reservation agent
 import streamlit as st
 import os
 import sys
+import uuid
 from pathlib import Path
 
 # Add project root to Python path
@@ -14,7 +15,8 @@ sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
 from agent.orchestrator import AgentOrchestrator
-from data.db_manager import DatabaseManager
+from agent.session_manager import SessionManager, SQLiteSessionStore
+from data.db_manager import get_database_manager
 
 # Load environment variables
 load_dotenv()
@@ -80,17 +82,30 @@ st.markdown("""
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-if "orchestrator" not in st.session_state:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        st.error("⚠️ GROQ_API_KEY not found in environment variables. Please set it in .env file.")
-        st.stop()
-    
-    model_name = os.getenv("MODEL_NAME", "llama-3.3-70b-versatile")
-    st.session_state.orchestrator = AgentOrchestrator(api_key, model_name)
+@st.cache_resource
+def get_session_manager(api_key: str, model_name: str) -> SessionManager:
+    """One orchestrator (tools, model, LLM client) shared by every browser session"""
+    store_path = os.getenv("SESSION_STORE_PATH")
+    return SessionManager(
+        AgentOrchestrator(api_key, model_name),
+        max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+        idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+        store=SQLiteSessionStore(store_path) if store_path else None
+    )
+
+api_key = os.getenv("GROQ_API_KEY")
+if not api_key:
+    st.error("⚠️ GROQ_API_KEY not found in environment variables. Please set it in .env file.")
+    st.stop()
+
+sessions = get_session_manager(api_key, os.getenv("MODEL_NAME", "llama-3.3-70b-versatile"))
+
+# Each browser session keeps only an id; conversation state lives in the session manager
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 if "db" not in st.session_state:
-    st.session_state.db = DatabaseManager()
+    st.session_state.db = get_database_manager()
 
 # Authentication state
 if "authenticated" not in st.session_state:
@@ -202,7 +217,7 @@ with st.sidebar:
         prompt = "Show me my reservations"
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.spinner("Checking reservations..."):
-            response = st.session_state.orchestrator.process_message(prompt, user['username'], user['id'])
+            response = sessions.process_message(st.session_state.session_id, prompt, user['username'], user['id'])
             st.session_state.messages.append({"role": "assistant", "content": response})
         st.rerun()
     
@@ -210,7 +225,7 @@ with st.sidebar:
         prompt = "I'm looking for restaurant recommendations"
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.spinner("Finding restaurants..."):
-            response = st.session_state.orchestrator.process_message(prompt, user['username'], user['id'])
+            response = sessions.process_message(st.session_state.session_id, prompt, user['username'], user['id'])
             st.session_state.messages.append({"role": "assistant", "content": response})
         st.rerun()
     
@@ -229,7 +244,7 @@ with st.sidebar:
     # Reset conversation
     if st.button("🔄 New Conversation", use_container_width=True):
         st.session_state.messages = []
-        st.session_state.orchestrator.reset_conversation()
+        sessions.reset(st.session_state.session_id)
         st.rerun()
     
     st.markdown("---")
@@ -239,7 +254,8 @@ with st.sidebar:
         st.session_state.authenticated = False
         st.session_state.user = None
         st.session_state.messages = []
-        st.session_state.orchestrator.reset_conversation()
+        sessions.end_session(st.session_state.session_id)
+        st.session_state.session_id = uuid.uuid4().hex
         st.rerun()
     
     st.markdown("---")
@@ -267,16 +283,17 @@ if prompt := st.chat_input("Ask me anything about reservations..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Get assistant response
+    # Stream assistant response token by token (tool-call XML is filtered out)
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            # Pass both username and user_id for proper database linking
-            response = st.session_state.orchestrator.process_message(
-                prompt, 
+        # Pass both username and user_id for proper database linking
+        response = st.write_stream(
+            sessions.process_message_stream(
+                st.session_state.session_id,
+                prompt,
                 st.session_state.user['username'],
                 st.session_state.user['id']
             )
-            st.markdown(response)
+        )
     
     # Add assistant message
     st.session_state.messages.append({"role": "assistant", "content": response})
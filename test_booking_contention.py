@@ -0,0 +1,99 @@
+"""
+Check conditional bookings under contention and write-throughs that race an inventory reload
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from data.db_manager import DatabaseManager
+
+DATE = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+EVENING = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"]
+
+def _make_db() -> DatabaseManager:
+    """One restaurant with 10 seats in every evening slot tomorrow"""
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), "contention.db"), max_connections=16)
+    with db.get_connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO restaurants (name, location, cuisine, capacity, opening_hours, rating,
+                                     price_range, special_features, description)
+            VALUES ('GoodFoods - Italian - Koramangala', 'Koramangala', 'Italian', 40, '{}', 4.5, '$$', '[]', '')
+        ''')
+        conn.executemany(
+            "INSERT INTO availability (restaurant_id, date, time, seats_available) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, DATE, time, 10) for time in EVENING])
+        conn.commit()
+    return db
+
+def _sql_seats(db, time):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT seats_available FROM availability WHERE restaurant_id = 1 AND date = ? AND time = ?",
+                            (DATE, time)).fetchone()[0]
+
+def test_concurrent_bookings_never_overbook():
+    db = _make_db()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda i: db.create_reservation(1, f"Guest {i}", DATE, "19:00", 2),
+                                    range(20)))
+    assert sum(r["success"] for r in results) == 5
+    # Seats only go down here, so every rejection sees the final count
+    assert all(r["error"] == "Only 0 seats available, need 2" for r in results if not r["success"])
+    assert _sql_seats(db, "19:00") == 0
+    assert db.inventory.seats_at(1, DATE, "19:00") == 0
+
+def test_rejection_explained_after_writer_lock_released():
+    db = _make_db()
+    assert db.create_reservation(1, "Asha", DATE, "19:00", 10)["success"]
+    held = []
+    explain = db._booking_rejection
+    
+    def recording_rejection(*args):
+        held.append(db._write_lock.locked())
+        return explain(*args)
+    
+    db._booking_rejection = recording_rejection
+    # Force the explanation's availability read to reload the inventory
+    with db.inventory._lock:
+        db.inventory._invalidate()
+    result = db.create_reservation(1, "Ravi", DATE, "19:00", 2)
+    assert not result["success"]
+    assert held == [False]
+
+def test_write_through_during_reload_is_replayed():
+    db = _make_db()
+    inventory = db.inventory
+    db.check_availability(1, DATE, "19:00", 2)
+    factory = inventory.connection_factory
+    
+    @contextmanager
+    def booking_after_snapshot():
+        with factory() as conn:
+            yield conn
+        # The reload has read its snapshot; a booking commits before it is installed
+        if not booked:
+            booked.append(True)
+            writer = threading.Thread(target=db.create_reservation, args=(1, "Asha", DATE, "19:00", 4))
+            writer.start()
+            writer.join()
+    
+    booked = []
+    inventory.connection_factory = booking_after_snapshot
+    inventory.load()
+    inventory.connection_factory = factory
+    
+    assert booked
+    # Without the replay the snapshot would overwrite the booking's write-through
+    assert inventory.seats_at(1, DATE, "19:00", slots=3) == 6 == _sql_seats(db, "19:30")
+    loads = inventory.loads
+    inventory.max_staleness = 0.0
+    assert db.check_availability(1, DATE, "19:00", 7)["available"] is False
+    assert inventory.loads == loads  # versions agree, so no further reload
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,99 @@
+"""
+Check that a booking holds, and a cancellation restores, every slot its duration overlaps
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from data.db_manager import DatabaseManager
+
+DATE = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+EVENING = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"]
+
+def _make_db(seats=None) -> DatabaseManager:
+    """One restaurant open 18:00-21:30; seats maps a slot to its count (default 10)"""
+    seats = seats or {}
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), "window.db"))
+    with db.get_connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO restaurants (name, location, cuisine, capacity, opening_hours, rating,
+                                     price_range, special_features, description)
+            VALUES ('GoodFoods - Italian - Koramangala', 'Koramangala', 'Italian', 40, '{}', 4.5, '$$', '[]', '')
+        ''')
+        conn.executemany(
+            "INSERT INTO availability (restaurant_id, date, time, seats_available) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, DATE, time, seats.get(time, 10)) for time in EVENING if seats.get(time, 10) is not None])
+        conn.commit()
+    return db
+
+def _seats(db):
+    with db.get_connection() as conn:
+        return dict(conn.execute("SELECT time, seats_available FROM availability WHERE restaurant_id = 1 AND date = ?",
+                                 (DATE,)).fetchall())
+
+def _book(db, time, party_size=4):
+    return db.create_reservation(1, "Asha", DATE, time, party_size, duration_minutes=90)
+
+def test_booking_holds_every_slot_in_window():
+    db = _make_db()
+    assert _book(db, "19:00")["success"]
+    seats = _seats(db)
+    assert [seats[t] for t in ("19:00", "19:30", "20:00")] == [6, 6, 6]
+    # The window is half-open: the slot the booking ends at, and earlier ones, are untouched
+    assert [seats[t] for t in ("18:00", "18:30", "20:30", "21:00", "21:30")] == [10] * 5
+
+def test_short_slot_inside_window_rejects_whole_booking():
+    db = _make_db({"20:00": 2})
+    before = _seats(db)
+    result = _book(db, "19:00")
+    assert not result["success"]
+    assert _seats(db) == before
+    # Starting after the short slot fits
+    assert _book(db, "20:30")["success"]
+
+def test_overlapping_bookings_share_slots():
+    db = _make_db({"19:30": 6})
+    assert _book(db, "19:00")["success"]  # 19:30 down to 2
+    assert not _book(db, "18:30")["success"]  # needs 19:30 too
+    assert _book(db, "20:00")["success"]  # starts where the first one ends
+    assert _seats(db)["19:30"] == 2
+
+def test_cancel_restores_every_slot_once():
+    db = _make_db()
+    before = _seats(db)
+    reservation_id = _book(db, "19:00")["reservation_id"]
+    assert db.cancel_reservation(reservation_id)["success"]
+    assert not db.cancel_reservation(reservation_id)["success"]
+    assert _seats(db) == before
+
+def test_booking_near_closing_holds_remaining_slots():
+    db = _make_db()
+    # 21:00 + 90 minutes runs past the last slot; only the slots that exist are held
+    assert _book(db, "21:00")["success"]
+    seats = _seats(db)
+    assert (seats["21:00"], seats["21:30"], seats["20:30"]) == (6, 6, 10)
+    assert _book(db, "21:30", party_size=6)["success"]
+    assert not _book(db, "21:30", party_size=1)["success"]
+
+def test_missing_start_slot_is_rejected():
+    db = _make_db({"19:00": None})
+    before = _seats(db)
+    result = _book(db, "19:00")
+    # The later slots of the window exist and have seats, but the booking must start on a real slot
+    assert not result["success"]
+    assert result["error"] == "No availability slots for this time"
+    assert _seats(db) == before
+
+def test_missing_middle_slot_does_not_block_window():
+    # A gap in the grid (e.g. a closed half hour) holds nothing and blocks nothing
+    db = _make_db({"19:30": None})
+    assert _book(db, "19:00")["success"]
+    seats = _seats(db)
+    assert (seats["19:00"], seats["20:00"]) == (6, 6)
+    assert "19:30" not in seats
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
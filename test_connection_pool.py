@@ -0,0 +1,100 @@
+"""
+Check connection pool checkout, nesting, rollback, exhaustion and shutdown
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from data.connection_pool import ConnectionPool
+
+def _make_pool(**kwargs):
+    pool = ConnectionPool(os.path.join(tempfile.mkdtemp(), "pool.db"), **kwargs)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.commit()
+    return pool
+
+def _count(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+def test_nested_checkout_gets_its_own_connection():
+    pool = _make_pool(max_connections=1)
+    with pool.connection() as outer:
+        outer.execute("INSERT INTO items VALUES ('outer')")
+        # Even at the limit, a nested checkout neither waits nor shares the outer transaction
+        with pool.connection() as inner:
+            assert inner is not outer
+            inner.execute("SELECT COUNT(*) FROM items").fetchone()
+            inner.commit()
+        assert outer.in_transaction
+        outer.rollback()
+    assert _count(pool) == 0
+    stats = pool.stats()
+    assert stats["nested_checkouts"] == 1
+    # The overflow connection is closed on release rather than kept
+    assert stats["open_connections"] == 1
+
+def test_release_rolls_back_uncommitted_work():
+    pool = _make_pool()
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO items VALUES ('lost')")
+    assert _count(pool) == 0
+
+def test_exhausted_pool_times_out():
+    pool = _make_pool(max_connections=1, checkout_timeout=0.1)
+    held = threading.Event()
+    done = threading.Event()
+    
+    def hold():
+        with pool.connection():
+            held.set()
+            done.wait(5)
+    
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    try:
+        with pool.connection():
+            raise AssertionError("checkout should have timed out")
+    except sqlite3.OperationalError as e:
+        assert "Timed out" in str(e)
+    finally:
+        done.set()
+        holder.join()
+    # The released connection serves the next checkout
+    assert _count(pool) == 0
+
+def test_close_closes_idle_and_released_connections():
+    pool = _make_pool(max_connections=2)
+    with pool.connection() as held:
+        pool.close()
+        assert pool.stats()["open_connections"] == 1
+    assert pool.stats()["open_connections"] == 0
+    try:
+        held.execute("SELECT 1")
+        raise AssertionError("released connection should be closed")
+    except sqlite3.ProgrammingError:
+        pass
+    try:
+        with pool.connection():
+            raise AssertionError("closed pool should refuse checkouts")
+    except sqlite3.ProgrammingError:
+        pass
+
+def test_stale_connection_health_checked_on_checkout():
+    pool = _make_pool(health_check_interval=0.0)
+    with pool.connection() as conn:
+        first = conn
+    first.close()  # broken behind the pool's back
+    with pool.connection() as conn:
+        assert conn is not first
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.stats()["health_check_failures"] == 1
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
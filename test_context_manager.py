@@ -0,0 +1,72 @@
+"""
+Check the token budget, rolling summary and tool-result digests of ContextManager
+"""
+
+from agent.context_manager import ContextManager, SUMMARY_HEADER, DIGEST_HEADER, estimate_tokens
+
+SYSTEM_PROMPT = "You are the GoodFoods reservation assistant."
+
+def _context(**kwargs):
+    context = ContextManager(**kwargs)
+    context.add_message("system", SYSTEM_PROMPT)
+    return context
+
+def test_history_stays_within_token_budget():
+    context = _context(max_history=100, max_tokens=300, summary_max_tokens=100)
+    for turn in range(20):
+        context.add_message("user", f"Turn {turn}: tell me about Italian places in Koramangala please")
+        context.add_message("assistant", f"Reply {turn}: here are three Italian restaurants worth a look")
+    assert context.get_token_count() <= 300
+    messages = context.build_messages()
+    # The system prompt stays first, byte for byte, and the latest turn is kept
+    assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert [m["content"][:8] for m in messages[-3:-1]] == ["Turn 19:", "Reply 19"]
+    assert messages[-1]["content"].startswith(SUMMARY_HEADER)
+
+def test_trimmed_messages_fold_into_capped_summary():
+    context = _context(max_history=5, summary_max_tokens=60)
+    for turn in range(12):
+        context.add_message("user", f"Question {turn} about booking")
+        context.add_message("assistant", f"Answer {turn} about booking")
+    assert len(context.conversation_history) <= 5
+    summary = context.get_summary()
+    assert summary.startswith(SUMMARY_HEADER)
+    assert estimate_tokens("\n".join(context.summary_lines)) <= 60
+    # Oldest lines are dropped first
+    assert "Question 0 " not in summary
+    assert "Answer" in summary
+
+def test_current_turn_is_never_summarised():
+    context = _context(max_tokens=50)
+    long_question = "Which restaurants " + "really " * 100 + "have outdoor seating?"
+    context.add_message("user", long_question)
+    assert context.conversation_history[-1]["content"] == long_question
+    assert context.get_summary() == ""
+
+def test_tool_results_replaced_by_digest_on_next_turn():
+    context = _context()
+    context.add_message("user", "Is restaurant 12 free tomorrow at 7pm for 4?")
+    context.add_message("system", "Tool Results:\n" + "x" * 2000, kind="tool_results",
+                        digest="check_availability: restaurant #12 2025-11-11 19:00 available")
+    assert context.conversation_history[-1]["kind"] == "tool_results"
+    
+    context.add_message("user", "Book it")
+    stale = context.conversation_history[2]
+    assert stale["kind"] == "tool_digest"
+    assert stale["content"] == f"{DIGEST_HEADER}\ncheck_availability: restaurant #12 2025-11-11 19:00 available"
+    assert stale["tokens"] < 50
+
+def test_instructions_follow_history():
+    context = _context()
+    context.add_message("user", "Hi")
+    messages = context.build_messages(instructions=["Reply briefly."])
+    assert messages[0]["content"] == SYSTEM_PROMPT
+    assert messages[-1] == {"role": "system", "content": "Reply briefly."}
+    # One-off instructions are not kept in the history
+    assert len(context.build_messages()) == 2
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,120 @@
+"""
+Check idempotency-key replay, expired-key purging and bulk cancellation
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from data import db_manager
+from data.db_manager import DatabaseManager
+
+DATE = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+EVENING = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"]
+
+def _make_db() -> DatabaseManager:
+    """One restaurant with 20 seats in every evening slot tomorrow"""
+    db = DatabaseManager(os.path.join(tempfile.mkdtemp(), "idempotency.db"))
+    with db.get_connection() as conn:
+        cursor = conn.execute('''
+            INSERT INTO restaurants (name, location, cuisine, capacity, opening_hours, rating,
+                                     price_range, special_features, description)
+            VALUES ('GoodFoods - Italian - Koramangala', 'Koramangala', 'Italian', 40, '{}', 4.5, '$$', '[]', '')
+        ''')
+        conn.executemany(
+            "INSERT INTO availability (restaurant_id, date, time, seats_available) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, DATE, time, 20) for time in EVENING])
+        conn.commit()
+    return db
+
+def _seats(db, time="19:00"):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT seats_available FROM availability WHERE restaurant_id = 1 AND date = ? AND time = ?",
+                            (DATE, time)).fetchone()[0]
+
+def _book(db, key=None, party_size=2):
+    return db.create_reservation(1, "Asha", DATE, "19:00", party_size, idempotency_key=key)
+
+def test_booking_retry_replays_confirmation():
+    db = _make_db()
+    first = _book(db, key="book-1")
+    retry = _book(db, key="book-1")
+    assert first["success"] and "replayed" not in first
+    assert retry["replayed"] is True
+    assert retry["confirmation_code"] == first["confirmation_code"]
+    assert _seats(db) == 18
+    assert len(db.get_user_reservations(user_name="Asha")) == 1
+
+def test_key_reused_for_different_request_is_refused():
+    db = _make_db()
+    _book(db, key="book-1")
+    result = _book(db, key="book-1", party_size=4)
+    assert not result["success"]
+    assert "different request" in result["error"]
+    assert _seats(db) == 18
+
+def test_cancel_retry_replays_success():
+    db = _make_db()
+    reservation_id = _book(db)["reservation_id"]
+    first = db.cancel_reservation(reservation_id, idempotency_key="cancel-1")
+    retry = db.cancel_reservation(reservation_id, idempotency_key="cancel-1")
+    assert first["success"] and retry["success"]
+    assert retry["replayed"] is True
+    # Without the key a second cancel is reported as such, and seats come back once
+    assert db.cancel_reservation(reservation_id)["error"] == "Reservation already cancelled"
+    assert _seats(db) == 20
+
+def test_failed_cancel_is_not_replayed():
+    db = _make_db()
+    assert db.cancel_reservation(1, idempotency_key="cancel-1")["error"] == "Reservation not found"
+    # The reservation turns up (e.g. a lagging replica); the retry must run, not replay "not found"
+    _book(db)
+    retry = db.cancel_reservation(1, idempotency_key="cancel-1")
+    assert retry["success"] and "replayed" not in retry
+    assert _seats(db) == 20
+
+def test_purge_forgets_expired_keys_only():
+    db = _make_db()
+    _book(db, key="old")
+    _book(db, key="new")
+    with db.get_connection() as conn:
+        conn.execute("UPDATE idempotency_keys SET created_at = datetime('now', '-2 days') WHERE key = 'old'")
+        conn.commit()
+    assert db.purge_idempotency_keys() == 1
+    with db.get_connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT key FROM idempotency_keys")] == ["new"]
+
+def test_write_paths_purge_at_most_once_per_interval():
+    db = _make_db()
+    calls = []
+    purge = db.purge_idempotency_keys
+    db.purge_idempotency_keys = lambda: calls.append(1) or purge()
+    for _ in range(5):
+        _book(db)
+    assert len(calls) == 1
+
+def test_bulk_cancel_reports_each_id_and_restores_seats_once():
+    db = _make_db()
+    ids = [_book(db)["reservation_id"] for _ in range(5)]
+    db.cancel_reservation(ids[0])
+    assert _seats(db) == 12
+    
+    # Small batches so the RETURNING update and the existence check both span several statements
+    batch_size = db_manager.CANCEL_BATCH_SIZE
+    db_manager.CANCEL_BATCH_SIZE = 2
+    try:
+        result = db.cancel_reservations(ids + [999, ids[1]])
+    finally:
+        db_manager.CANCEL_BATCH_SIZE = batch_size
+    
+    assert result["success"]
+    assert result["cancelled"] == ids[1:]
+    assert result["already_cancelled"] == [ids[0]]
+    assert result["not_found"] == [999]
+    # Every slot of the 90-minute window gets its seats back exactly once
+    assert [_seats(db, time) for time in ("19:00", "19:30", "20:00", "20:30")] == [20, 20, 20, 20]
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
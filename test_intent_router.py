@@ -0,0 +1,67 @@
+"""
+Check which messages the intent router sends straight to a tool and which it leaves to the LLM
+"""
+
+from agent.intent_router import IntentRouter
+
+def _router():
+    # Keyword rules only, so results don't depend on an embedding model being installed
+    return IntentRouter(use_embeddings=False)
+
+def test_explicit_view_takes_fast_path():
+    route = _router().route("Show me my reservations")
+    assert route["function"] == "get_user_reservations"
+    assert route["confidence"] >= 0.95
+
+def test_view_mixed_with_search_goes_to_llm():
+    router = _router()
+    assert router.route("Can you show me my reservation options for Italian places?") is None
+    assert router.route("What are my options? Do I have any bookings?") is None
+
+def test_view_without_possessive_phrase_is_not_certain():
+    # Only an embedding match (unavailable here) could lift this over the threshold
+    assert _router().route("Do I have anything booked, any reservations?") is None
+
+def test_availability_fully_specified():
+    route = _router().route("Is restaurant 12 available on 2025-11-11 at 7pm for 4 people?")
+    assert route["function"] == "check_availability"
+    assert route["args"] == {"restaurant_id": 12, "date": "2025-11-11", "time": "19:00", "party_size": 4}
+
+def test_impossible_date_goes_to_llm():
+    assert _router().route("Is restaurant 12 available on 2025-13-45 at 7pm for 4 people?") is None
+
+def test_12am_goes_to_llm():
+    assert _router().route("Is restaurant 12 available tomorrow at 12am for 4 people?") is None
+
+def test_open_is_not_an_availability_keyword():
+    assert _router().route("Is restaurant 12 open tomorrow at 7pm for 4 people?") is None
+
+def test_imperative_cancel_takes_fast_path():
+    route = _router().route("Cancel GF-0043")
+    assert route["function"] == "cancel_reservation"
+    assert route["args"] == {"reservation_id": 43}
+
+def test_negated_or_hypothetical_cancel_goes_to_llm():
+    router = _router()
+    for message in ("Don't cancel GF-0043", "do not cancel reservation 12 yet",
+                    "Should I cancel GF-0043?", "What happens if I cancel GF-0043?",
+                    "Never cancel reservation 12", "If it rains, cancel GF-0043"):
+        assert router.route(message) is None, message
+
+def test_out_of_range_party_size_goes_to_llm():
+    router = _router()
+    assert router.route("Is restaurant 12 available tomorrow at 7pm for 0 people?") is None
+    assert router.route("Is restaurant 12 available tomorrow at 7pm for 00") is None
+    assert router.route("Is restaurant 12 available tomorrow at 7pm for 45 people?") is None
+
+def test_view_with_filter_goes_to_llm():
+    router = _router()
+    assert router.route("Can you show me my reservations for Italian?") is None
+    assert router.route("Show me my reservations for next week") is None
+    assert router.route("Show me my reservations for tomorrow")["function"] == "get_user_reservations"
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
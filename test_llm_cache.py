@@ -0,0 +1,113 @@
+"""
+Check LLM response cache keys, the in-process LRU, record/replay modes and cached orchestrator turns
+"""
+
+import os
+import tempfile
+from typing import Dict, List
+from agent.orchestrator import AgentOrchestrator
+from agent.intent_router import IntentRouter
+from agent.llm_backends import LLMBackend
+from agent.llm_cache import ResponseCache, ResponseCacheMiss, SQLiteResponseStore, make_cache_key
+from tools.registry import ToolRegistry
+
+PARAMS = {"model": "test", "temperature": 0.7}
+
+class CountingBackend(LLMBackend):
+    """Plain replies (no tool calls), counting how often it is asked"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.requests = []
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        self.calls += 1
+        self.requests.append(messages)
+        return f"Reply {self.calls}"
+
+def _orchestrator(backend, cache):
+    # No tools and no fast path, so every turn is one LLM request
+    return AgentOrchestrator(tools=ToolRegistry(), backend=backend, response_cache=cache,
+                             router=IntentRouter(confidence_threshold=1.01, use_embeddings=False))
+
+def test_key_ignores_whitespace_noise_but_not_content_or_params():
+    suffix = [{"role": "user", "content": "Hi there"}]
+    key = make_cache_key("prefix", suffix, PARAMS)
+    assert make_cache_key("prefix", [{"role": "user", "content": "Hi there  \r\n"}], PARAMS) == key
+    assert make_cache_key("prefix", [{"role": "user", "content": "Hi here"}], PARAMS) != key
+    assert make_cache_key("other", suffix, PARAMS) != key
+    assert make_cache_key("prefix", suffix, dict(PARAMS, temperature=0.0)) != key
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # a is now the most recent
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 1, 2)
+
+def test_identical_conversation_served_from_cache():
+    backend = CountingBackend()
+    cache = ResponseCache()
+    for _ in range(2):
+        orchestrator = _orchestrator(backend, cache)
+        first = orchestrator.process_message("Hello", "Asha")
+        second = orchestrator.process_message("What can you do?", "Asha")
+    assert backend.calls == 2
+    assert (first, second) == ("Reply 1", "Reply 2")
+
+def test_prefix_is_byte_stable_across_turns_and_conversations():
+    backend = CountingBackend()
+    orchestrator = _orchestrator(backend, ResponseCache())
+    orchestrator.process_message("Hello", "Asha")
+    orchestrator.process_message("Any Italian places?", "Asha")
+    _orchestrator(backend, ResponseCache()).process_message("Hi", "Ravi")
+    prefixes = [messages[0] for messages in backend.requests]
+    assert prefixes[0]["role"] == "system"
+    assert all(prefix == prefixes[0] for prefix in prefixes)
+    assert orchestrator.context_manager.get_prefix_hash() == orchestrator.new_context().get_prefix_hash()
+
+def _store():
+    return SQLiteResponseStore(os.path.join(tempfile.mkdtemp(), "llm_cache.db"))
+
+def test_record_then_replay_without_backend():
+    store = _store()
+    recording = CountingBackend()
+    _orchestrator(recording, ResponseCache(store=store, mode="record")).process_message("Hello", "Asha")
+    # Recording always calls the LLM, even for a request it has already stored
+    _orchestrator(recording, ResponseCache(store=store, mode="record")).process_message("Hello", "Asha")
+    assert recording.calls == 2
+    assert store.count() == 1
+    
+    # A fresh process-level cache replays from disk and never reaches the backend
+    replaying = CountingBackend()
+    cache = ResponseCache(store=store, mode="replay")
+    assert _orchestrator(replaying, cache).process_message("Hello", "Asha") == "Reply 2"
+    assert replaying.calls == 0
+    assert cache.stats()["store_hits"] == 1
+
+def test_replay_miss_fails_the_turn():
+    cache = ResponseCache(store=_store(), mode="replay")
+    backend = CountingBackend()
+    try:
+        _orchestrator(backend, cache).process_message("Never recorded", "Asha")
+        raise AssertionError("a replay miss should raise")
+    except ResponseCacheMiss:
+        pass
+    assert backend.calls == 0
+
+def test_unknown_mode_is_rejected():
+    try:
+        ResponseCache(mode="sometimes")
+        raise AssertionError("unknown mode should raise")
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,73 @@
+"""
+Check that the hot queries use the indexes created by DatabaseManager migrations
+"""
+
+import os
+import tempfile
+from data.db_manager import DatabaseManager
+
+def _plan(db, query, params=()):
+    return " | ".join(db.explain_query_plan(query, params))
+
+def _make_db(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    return DatabaseManager(path, **kwargs)
+
+def _executed(db, call):
+    """SQL statements (parameters inlined) that call() runs on the pool's one connection"""
+    statements = []
+    with db.get_connection() as conn:
+        pass
+    # Everything so far ran on one thread, so call() checks out this same idle connection
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    assert db.get_pool_stats()["open_connections"] == 1
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+def test_schema_version_recorded():
+    db = _make_db()
+    assert db.get_schema_version() == DatabaseManager.MIGRATIONS[-1][0]
+
+def test_available_times_window_uses_index():
+    # SQL path only; the slot inventory answers first otherwise
+    db = _make_db(use_inventory=False)
+    statements = _executed(db, lambda: db.get_available_times(1, "2025-11-11", 2, 90))
+    assert len(statements) == 1
+    plan = _plan(db, statements[0])
+    # The window function reads one restaurant-day from the covering index
+    assert "COVERING INDEX idx_availability_slot_seats (restaurant_id=? AND date=?)" in plan
+    assert "SCAN availability" not in plan
+
+def test_user_reservations_use_partial_index():
+    db = _make_db()
+    for column, index in [("user_id", "idx_reservations_user_id_confirmed"),
+                          ("user_name", "idx_reservations_user_name_confirmed")]:
+        plan = _plan(db, f'''
+            SELECT r.*, rest.name as restaurant_name, rest.location
+            FROM reservations r
+            JOIN restaurants rest ON r.restaurant_id = rest.id
+            WHERE r.{column} = ? AND r.status = 'confirmed'
+            ORDER BY r.date, r.time
+        ''', (1,))
+        assert f"SEARCH r USING INDEX {index}" in plan
+        assert "TEMP B-TREE FOR ORDER BY" not in plan
+
+def test_analytics_read_rollups():
+    db = _make_db()
+    statements = _executed(db, db.get_analytics)
+    assert statements
+    for statement in statements:
+        plan = _plan(db, statement)
+        # Only the trigger-maintained rollups (and restaurant lookups by id) are read
+        assert "reservations" not in plan
+        assert "SCAN" not in plan
+        assert "TEMP B-TREE" not in plan
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
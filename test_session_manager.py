@@ -0,0 +1,82 @@
+"""
+Check that SessionManager isolates conversations, expires idle ones and resumes stored ones
+"""
+
+import os
+import time
+import tempfile
+from typing import Dict, List
+from agent.orchestrator import AgentOrchestrator
+from agent.intent_router import IntentRouter
+from agent.llm_backends import LLMBackend
+from agent.session_manager import SessionManager, SQLiteSessionStore
+from tools.registry import ToolRegistry
+
+class EchoBackend(LLMBackend):
+    """Replies with how many user messages the conversation holds"""
+    
+    def complete(self, messages: List[Dict], **params) -> str:
+        return f"user messages: {sum(1 for m in messages if m['role'] == 'user')}"
+
+def _manager(**kwargs):
+    orchestrator = AgentOrchestrator(tools=ToolRegistry(), backend=EchoBackend(),
+                                     router=IntentRouter(confidence_threshold=1.01, use_embeddings=False))
+    return SessionManager(orchestrator, **kwargs)
+
+def _store():
+    return SQLiteSessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+
+def test_sessions_share_orchestrator_but_not_history():
+    sessions = _manager()
+    sessions.process_message("asha", "Hello")
+    assert sessions.process_message("asha", "Again") == "user messages: 2"
+    assert sessions.process_message("ravi", "Hello") == "user messages: 1"
+    # The shared orchestrator's own context is untouched
+    assert sessions.orchestrator.get_conversation_history() == []
+
+def test_idle_sessions_expire():
+    sessions = _manager(idle_timeout=0.05)
+    sessions.process_message("asha", "Hello")
+    sessions.process_message("ravi", "Hello")
+    time.sleep(0.1)
+    sessions.process_message("ravi", "Still here")
+    assert sessions.evict_idle() == 1
+    assert sessions.stats()["active_sessions"] == 1
+    # Without a store an expired conversation starts over
+    assert sessions.process_message("asha", "Back") == "user messages: 1"
+
+def test_least_recently_used_evicted_beyond_cap():
+    sessions = _manager(max_sessions=2)
+    for session_id in ("a", "b", "a", "c"):
+        sessions.process_message(session_id, "Hello")
+    stats = sessions.stats()
+    assert (stats["active_sessions"], stats["evicted"]) == (2, 1)
+    assert sessions.process_message("a", "Hello") == "user messages: 3"
+    assert sessions.process_message("b", "Hello") == "user messages: 1"
+
+def test_evicted_session_resumes_from_store():
+    store = _store()
+    sessions = _manager(idle_timeout=0.0, store=store)
+    sessions.process_message("asha", "Hello")
+    sessions.evict_idle()
+    assert sessions.process_message("asha", "Again") == "user messages: 2"
+    assert sessions.stats()["restored"] == 1
+    
+    sessions.end_session("asha")
+    assert store.get("asha") is None
+
+def test_store_purges_old_sessions():
+    store = _store()
+    store.put("old", {"history": []})
+    store.put("new", {"history": []})
+    with store.pool.connection() as conn:
+        conn.execute("UPDATE conversation_sessions SET updated_at = '2000-01-01T00:00:00' WHERE session_id = 'old'")
+        conn.commit()
+    assert store.purge(3600) == 1
+    assert (store.get("old"), store.count()) == (None, 1)
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
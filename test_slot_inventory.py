@@ -0,0 +1,76 @@
+"""
+Check that the in-memory slot inventory answers like SQL and follows writes without reloading
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from data.db_manager import DatabaseManager
+
+DATE = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+FAR_DATE = (datetime.now() + timedelta(days=60)).strftime("%Y-%m-%d")
+EVENING = ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"]
+
+def _make_db(path=None, **kwargs) -> DatabaseManager:
+    """Two restaurants with 10 seats in every evening slot tomorrow and in 60 days"""
+    path = path or os.path.join(tempfile.mkdtemp(), "inventory.db")
+    db = DatabaseManager(path, **kwargs)
+    with db.get_connection() as conn:
+        if conn.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0] == 0:
+            for name in ("GoodFoods - Italian - Koramangala", "GoodFoods - Chinese - Indiranagar"):
+                cursor = conn.execute('''
+                    INSERT INTO restaurants (name, location, cuisine, capacity, opening_hours, rating,
+                                             price_range, special_features, description)
+                    VALUES (?, 'Koramangala', 'Italian', 40, '{}', 4.5, '$$', '[]', '')
+                ''', (name,))
+                conn.executemany(
+                    "INSERT INTO availability (restaurant_id, date, time, seats_available) VALUES (?, ?, ?, ?)",
+                    [(cursor.lastrowid, date, time, 10) for date in (DATE, FAR_DATE) for time in EVENING])
+            conn.commit()
+    return db
+
+def _answers(db):
+    """Everything the availability reads report for restaurant 1 tomorrow"""
+    return ([db.check_availability(1, DATE, time, 4) for time in EVENING],
+            db.get_available_times(1, DATE, 4, 90))
+
+def test_inventory_matches_sql_after_writes():
+    db = _make_db()
+    sql = _make_db(db.db_path, use_inventory=False)
+    for time, party_size in (("19:00", 4), ("19:30", 4), ("21:00", 6)):
+        assert db.create_reservation(1, "Asha", DATE, time, party_size)["success"]
+    assert _answers(db) == _answers(sql)
+    assert db.inventory.seats_at(1, DATE, "19:30") == 2
+
+def test_own_writes_apply_without_reload():
+    db = _make_db()
+    db.check_availability(1, DATE, "19:00", 2)
+    loads = db.inventory.loads
+    reservation_id = db.create_reservation(1, "Asha", DATE, "19:00", 4)["reservation_id"]
+    assert db.inventory.seats_at(1, DATE, "19:00", slots=3) == 6
+    db.cancel_reservation(reservation_id)
+    assert db.inventory.seats_at(1, DATE, "19:00", slots=3) == 10
+    assert db.inventory.loads == loads
+
+def test_other_writers_trigger_reload():
+    db = _make_db()
+    db.check_availability(1, DATE, "19:00", 2)
+    db.inventory.max_staleness = 0.0
+    loads = db.inventory.loads
+    # Another process (a separate manager, so no write-through) books at 19:00
+    other = _make_db(db.db_path, use_inventory=False)
+    other.create_reservation(1, "Ravi", DATE, "19:00", 8)
+    assert db.check_availability(1, DATE, "19:00", 4)["available"] is False
+    assert db.inventory.loads == loads + 1
+
+def test_dates_beyond_horizon_fall_back_to_sql():
+    db = _make_db()
+    assert db.inventory.seats_at(1, FAR_DATE, "19:00") is None
+    assert db.check_availability(1, FAR_DATE, "19:00", 4)["available"] is True
+    assert db.get_available_times(1, FAR_DATE, 4, 90) == EVENING
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
@@ -0,0 +1,52 @@
+"""
+Check that ToolCallStreamFilter hides tool calls however the stream is chunked
+"""
+
+from agent.stream_filter import ToolCallStreamFilter
+
+TOOL_CALL = ('<tool_call>\n<function>check_availability</function>\n'
+             '<args>{"restaurant_id": 12}</args>\n</tool_call>')
+
+def _stream(text, size):
+    """Feed text in chunks of `size` characters; return (visible text, filter)"""
+    stream_filter = ToolCallStreamFilter()
+    shown = [stream_filter.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    shown.append(stream_filter.flush())
+    return "".join(shown), stream_filter
+
+def test_tool_call_hidden_at_every_chunk_split():
+    text = "Let me check that for you. " + TOOL_CALL + " Done."
+    for size in range(1, len(text) + 1):
+        visible, stream_filter = _stream(text, size)
+        assert visible == "Let me check that for you.  Done.", size
+        assert stream_filter.raw == text
+        assert stream_filter.saw_tool_call
+
+def test_plain_prose_passes_through_unchanged():
+    text = "Restaurant 12 has a table at 7pm <3 and takes 4 < 5 guests."
+    for size in (1, 2, 5, len(text)):
+        visible, stream_filter = _stream(text, size)
+        assert visible == text
+        assert not stream_filter.saw_tool_call
+
+def test_text_after_tool_results_echo_is_dropped():
+    text = "Booked! Tool Results: {\"success\": true} more noise"
+    for size in (1, 3, 7):
+        visible, _ = _stream(text, size)
+        assert visible == "Booked! "
+
+def test_partial_tag_is_released_on_flush():
+    stream_filter = ToolCallStreamFilter()
+    assert stream_filter.feed("See you at <tool") == "See you at "
+    assert stream_filter.flush() == "<tool"
+
+def test_unterminated_tool_call_never_leaks():
+    visible, stream_filter = _stream("Checking <tool_call><function>book", 4)
+    assert visible == "Checking "
+    assert stream_filter.saw_tool_call
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
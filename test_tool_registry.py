@@ -0,0 +1,74 @@
+"""
+Check that read-only tool calls run concurrently and mutating calls act as barriers
+"""
+
+import time
+import threading
+from tools.registry import ToolRegistry
+
+def _registry(log, **kwargs):
+    registry = ToolRegistry(**kwargs)
+    
+    def read(args):
+        log.append(("start", args["id"]))
+        time.sleep(args.get("sleep", 0.1))
+        log.append(("end", args["id"]))
+        return {"success": True, "id": args["id"]}
+    
+    def write(args):
+        log.append(("write", args["id"]))
+        return {"success": True, "id": args["id"]}
+    
+    def fail(args):
+        raise RuntimeError("boom")
+    
+    registry.register("read", read, read_only=True)
+    registry.register("write", write)
+    registry.register("fail", fail, read_only=True)
+    return registry
+
+def test_read_only_calls_overlap_and_keep_order():
+    log = []
+    registry = _registry(log)
+    started = time.perf_counter()
+    results = registry.execute_batch([("read", {"id": i, "sleep": 0.2 - 0.04 * i}) for i in range(4)])
+    elapsed = time.perf_counter() - started
+    registry.shutdown()
+    # About as long as the slowest call, not the sum (0.56s)
+    assert elapsed < 0.4
+    assert [r["id"] for r in results] == [0, 1, 2, 3]
+
+def test_write_waits_for_earlier_reads_and_blocks_later_ones():
+    log = []
+    registry = _registry(log)
+    results = registry.execute_batch([("read", {"id": 1}), ("read", {"id": 2}),
+                                      ("write", {"id": 3}), ("read", {"id": 4})])
+    registry.shutdown()
+    assert [r["id"] for r in results] == [1, 2, 3, 4]
+    write = log.index(("write", 3))
+    assert log.index(("end", 1)) < write and log.index(("end", 2)) < write
+    assert log.index(("start", 4)) > write
+
+def test_timeout_and_errors_become_results():
+    log = []
+    registry = _registry(log, default_timeout=0.05)
+    results = registry.execute_batch([("read", {"id": 1, "sleep": 0.3}), ("fail", {}), ("missing", {})])
+    registry.shutdown()
+    assert "timed out" in results[0]["error"]
+    assert results[1] == {"success": False, "error": "Error running fail: boom"}
+    assert results[2] == {"success": False, "error": "Unknown tool: missing"}
+
+def test_batch_of_reads_uses_worker_threads():
+    registry = ToolRegistry()
+    threads = set()
+    registry.register("where", lambda args: threads.add(threading.current_thread().name) or {"success": True},
+                      read_only=True)
+    registry.execute_batch([("where", {})] * 3)
+    registry.shutdown()
+    assert threads and all(name.startswith("tool") for name in threads)
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"✅ {name}")
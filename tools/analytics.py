@@ -3,12 +3,12 @@ Analytics Tool
 Track and analyze booking patterns and user behavior
 """
 
-from typing import Dict
-from data.db_manager import DatabaseManager
+from typing import Dict, Optional
+from data.db_manager import DatabaseManager, get_database_manager
 
 class AnalyticsTool:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or get_database_manager()
     
     def execute(self, args: Dict = None) -> Dict:
         """
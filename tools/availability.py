@@ -3,12 +3,12 @@ Availability Tool
 Check restaurant availability for specific date/time/party size
 """
 
-from typing import Dict
-from data.db_manager import DatabaseManager
+from typing import Dict, Optional
+from data.db_manager import DatabaseManager, get_database_manager, DEFAULT_DURATION_MINUTES
 
 class AvailabilityTool:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or get_database_manager()
     
     def execute(self, args: Dict) -> Dict:
         """
@@ -19,6 +19,7 @@ class AvailabilityTool:
             date: str (YYYY-MM-DD format)
             time: str (HH:MM format)
             party_size: int
+            duration_minutes: int (optional, default 90)
         
         Returns:
             Dict with availability status and details
@@ -60,6 +61,7 @@ class AvailabilityTool:
                 }
             
             party_size = int(party_size_raw)
+            duration_minutes = int(args.get('duration_minutes') or DEFAULT_DURATION_MINUTES)
             
             # Validate inputs
             if not all([restaurant_id, date, time, party_size]):
@@ -77,7 +79,7 @@ class AvailabilityTool:
                 }
             
             # Check availability
-            availability = self.db.check_availability(restaurant_id, date, time, party_size)
+            availability = self.db.check_availability(restaurant_id, date, time, party_size, duration_minutes)
             
             result = {
                 "success": True,
@@ -96,10 +98,14 @@ class AvailabilityTool:
                 result['reason'] = availability['reason']
                 result['message'] = f"❌ {restaurant['name']} is not available: {availability['reason']}"
                 
-                # Suggest alternative times
-                alternative_times = self.db.get_available_times(restaurant_id, date, party_size)
-                if alternative_times:
-                    result['alternative_times'] = alternative_times[:5]
+                # Nearest open slots here or at similar restaurants nearby, best first
+                alternatives = self.db.find_alternative_slots(restaurant_id, date, time, party_size,
+                                                              duration_minutes)
+                if alternatives:
+                    result['alternatives'] = alternatives
+                    alternative_times = [a['time'] for a in alternatives if a['restaurant_id'] == restaurant_id]
+                    if alternative_times:
+                        result['alternative_times'] = alternative_times
             
             return result
             
@@ -117,17 +123,19 @@ class AvailabilityTool:
             restaurant_id: int
             date: str (YYYY-MM-DD format)
             party_size: int
+            duration_minutes: int (optional, default 90)
         """
         try:
             restaurant_id = int(args.get('restaurant_id'))
             date = args.get('date')
             party_size = int(args.get('party_size'))
+            duration_minutes = int(args.get('duration_minutes') or DEFAULT_DURATION_MINUTES)
             
             restaurant = self.db.get_restaurant_by_id(restaurant_id)
             if not restaurant:
                 return {"success": False, "error": "Restaurant not found"}
             
-            available_times = self.db.get_available_times(restaurant_id, date, party_size)
+            available_times = self.db.get_available_times(restaurant_id, date, party_size, duration_minutes)
             
             return {
                 "success": True,
@@ -3,12 +3,12 @@ Booking Tool
 Create, modify, and cancel reservations
 """
 
-from typing import Dict
-from data.db_manager import DatabaseManager
+from typing import Dict, Optional
+from data.db_manager import DatabaseManager, get_database_manager, DEFAULT_DURATION_MINUTES
 
 class BookingTool:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or get_database_manager()
     
     def execute(self, args: Dict) -> Dict:
         """
@@ -23,6 +23,8 @@ class BookingTool:
             party_size: int
             user_email: str (optional)
             special_requests: str (optional)
+            duration_minutes: int (optional, default 90)
+            idempotency_key: str (optional, makes retries safe)
         
         Returns:
             Dict with reservation confirmation
@@ -36,6 +38,7 @@ class BookingTool:
             party_size = int(args.get('party_size'))
             user_email = args.get('user_email')
             special_requests = args.get('special_requests')
+            duration_minutes = int(args.get('duration_minutes') or DEFAULT_DURATION_MINUTES)
             
             # Validate required fields
             if not all([restaurant_id, user_name, date, time, party_size]):
@@ -53,7 +56,9 @@ class BookingTool:
                 party_size=party_size,
                 user_id=user_id,
                 user_email=user_email,
-                special_requests=special_requests
+                special_requests=special_requests,
+                duration_minutes=duration_minutes,
+                idempotency_key=args.get('idempotency_key')
             )
             print("result:",result);
             
@@ -81,11 +86,12 @@ class BookingTool:
         
         Args:
             reservation_id: int
+            idempotency_key: str (optional, makes retries safe)
         """
         try:
             reservation_id = int(args.get('reservation_id'))
             
-            result = self.db.cancel_reservation(reservation_id)
+            result = self.db.cancel_reservation(reservation_id, idempotency_key=args.get('idempotency_key'))
             
             if result['success']:
                 result['message'] = f"✅ Reservation #{reservation_id} has been cancelled successfully"
@@ -3,16 +3,17 @@ Recommendation Tool
 Suggest restaurants based on user preferences using hybrid search
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
-from data.db_manager import DatabaseManager
-from data.embeddings import EmbeddingManager
+from data.db_manager import DatabaseManager, get_database_manager
+from data.embeddings import EmbeddingManager, get_embedding_manager
 
 class RecommendationTool:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.embeddings = EmbeddingManager()
-        self.embeddings.compute_embeddings()
+    def __init__(self, db: Optional[DatabaseManager] = None,
+                 embeddings: Optional[EmbeddingManager] = None):
+        self.db = db or get_database_manager()
+        # Shared model and vectors, loaded lazily on the first search
+        self.embeddings = embeddings or get_embedding_manager(db=self.db)
     
     def execute(self, args: Dict) -> Dict:
         """
@@ -56,19 +57,20 @@ class RecommendationTool:
                     top_k=10
                 )
             else:
-                # Fallback to database query
-                recommendations = self.db.get_restaurants(filters)
-                # Sort by rating
-                recommendations.sort(key=lambda x: x['rating'], reverse=True)
-                recommendations = recommendations[:10]
+                # Fallback to the in-memory filter index, sorted by rating
+                recommendations = [
+                    r.copy() for r in self.embeddings.top_rated(filters if filters else None, limit=10)
+                ]
             
             # Filter by availability if date/time provided
             if date and time and party_size:
+                # One round trip for the whole candidate set
+                availability_by_id = self.db.check_availability_bulk(
+                    [restaurant['id'] for restaurant in recommendations], date, time, int(party_size)
+                )
                 available_recommendations = []
                 for restaurant in recommendations:
-                    availability = self.db.check_availability(
-                        restaurant['id'], date, time, int(party_size)
-                    )
+                    availability = availability_by_id[restaurant['id']]
                     restaurant['available'] = availability['available']
                     if availability['available']:
                         restaurant['seats_available'] = availability['seats_available']
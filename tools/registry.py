@@ -0,0 +1,150 @@
+"""
+Tool Registry
+Maps LLM function names to tool handlers that share one database handle
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+from data.db_manager import DatabaseManager, get_database_manager
+from tools.recommendations import RecommendationTool
+from tools.availability import AvailabilityTool
+from tools.booking import BookingTool
+from tools.analytics import AnalyticsTool
+
+# Seconds a read-only tool may run before its result is replaced with a timeout error
+DEFAULT_TOOL_TIMEOUT = 15.0
+
+class ToolRegistry:
+    def __init__(self, max_workers: int = 8, default_timeout: float = DEFAULT_TOOL_TIMEOUT):
+        self._handlers: Dict[str, Callable[[Dict], Dict]] = {}
+        self._read_only = set()
+        self._timeouts: Dict[str, float] = {}
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    def register(self, function_name: str, handler: Callable[[Dict], Dict],
+                 read_only: bool = False, timeout: Optional[float] = None):
+        """
+        Register a handler for an LLM function name
+        
+        Args:
+            function_name: Name the LLM uses to call the tool
+            handler: Callable taking the args dict and returning a result dict
+            read_only: Tool never writes, so it may run concurrently with other read-only tools
+            timeout: Seconds to wait for a read-only tool (defaults to default_timeout)
+        """
+        self._handlers[function_name] = handler
+        if read_only:
+            self._read_only.add(function_name)
+        else:
+            self._read_only.discard(function_name)
+        if timeout is not None:
+            self._timeouts[function_name] = timeout
+    
+    def has(self, function_name: str) -> bool:
+        """Check if a function name is registered"""
+        return function_name in self._handlers
+    
+    def is_read_only(self, function_name: str) -> bool:
+        """Check if a function name is registered as read-only"""
+        return function_name in self._read_only
+    
+    def names(self) -> List[str]:
+        """Get all registered function names"""
+        return list(self._handlers.keys())
+    
+    def execute(self, function_name: str, args: Dict) -> Dict:
+        """Run the handler registered for a function name"""
+        handler = self._handlers.get(function_name)
+        if handler is None:
+            return {"success": False, "error": f"Unknown tool: {function_name}"}
+        try:
+            return handler(args)
+        except Exception as e:
+            return {"success": False, "error": f"Error running {function_name}: {str(e)}"}
+    
+    def execute_batch(self, calls: List[Tuple[str, Dict]]) -> List[Dict]:
+        """
+        Run several tool calls, returning results in call order
+        
+        Consecutive read-only calls run concurrently on a thread pool, so a turn
+        that checks five restaurants takes about as long as the slowest check.
+        A mutating call is a barrier: it waits for everything emitted before it,
+        runs alone, and finishes before anything emitted after it starts.
+        """
+        results: List[Optional[Dict]] = [None] * len(calls)
+        pending: List[Tuple[int, str, object, float]] = []
+        
+        for index, (function_name, args) in enumerate(calls):
+            if self.is_read_only(function_name):
+                future = self._get_executor().submit(self.execute, function_name, args)
+                pending.append((index, function_name, future, time.monotonic()))
+            else:
+                self._collect(pending, results)
+                pending = []
+                results[index] = self.execute(function_name, args)
+        
+        self._collect(pending, results)
+        return results
+    
+    def _collect(self, pending: List[Tuple[int, str, object, float]], results: List[Optional[Dict]]):
+        """Wait for submitted read-only calls, cancelling any that exceed their timeout"""
+        for index, function_name, future, submitted in pending:
+            timeout = self._timeouts.get(function_name, self.default_timeout)
+            remaining = max(0.0, submitted + timeout - time.monotonic())
+            try:
+                results[index] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # A call that already started can't be interrupted; its result is discarded
+                future.cancel()
+                results[index] = {
+                    "success": False,
+                    "error": f"{function_name} timed out after {timeout:g}s. Please try again."
+                }
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for read-only tools, created on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="tool")
+            return self._executor
+    
+    def shutdown(self):
+        """Stop the worker threads, cancelling calls that haven't started"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def build_tool_registry(db: Optional[DatabaseManager] = None) -> ToolRegistry:
+    """Create the standard tools around a single DatabaseManager"""
+    db = db or get_database_manager()
+    
+    booking = BookingTool(db=db)
+    
+    registry = ToolRegistry()
+    registry.register("recommend_restaurants", RecommendationTool(db=db).execute, read_only=True)
+    registry.register("check_availability", AvailabilityTool(db=db).execute, read_only=True)
+    registry.register("book_reservation", booking.execute)
+    registry.register("cancel_reservation", booking.cancel)
+    registry.register("get_user_reservations", booking.get_user_reservations, read_only=True)
+    registry.register("get_analytics", AnalyticsTool(db=db).execute, read_only=True)
+    
+    return registry
+
+# Tools are stateless apart from the shared database, so one registry serves every orchestrator
+_default_lock = threading.Lock()
+_default_registry = None
+
+def get_default_registry() -> ToolRegistry:
+    """Get the process-wide tool registry, building it on first use"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = build_tool_registry()
+        return _default_registry